@@ -0,0 +1,256 @@
+"""
+Benchmark of building the graph `%ng_draw` renders, from a synthetic subgraph
+of n nodes and 2n relationships. The time per element should stay flat as the
+graph grows, i.e. drawing is linear in the number of elements.
+
+Usage:
+    python benchmarks/draw.py [--sizes 1000,2000,4000,8000,16000] [--baseline]
+                              [--dataframe] [--layout sfdp]
+                              [--centrality pagerank] [--graph]
+
+--baseline also times populating pyvis with add_node/add_edge one element at a
+time, which checks membership in a list for each of them. --dataframe also times
+building the graph from a DataFrame of the result instead of its rows.
+--layout also times computing the layout of the graph, --centrality the
+centrality the nodes are sized by, compared with networkx. --graph also times
+materializing the result with `%ng_graph` and running PageRank on it, compared
+with a networkx graph of GraphBuilder.
+
+Exits with 1 when the time per element of the largest graph is more than 3
+times that of the smallest one.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+
+def subgraph(n: int, seed: int = 42):
+    """
+    A GET SUBGRAPH like ResultSet: each node once in a row, with a list of its
+    relationships, whose ends are mostly already known nodes
+    """
+    from nebula3.common.ttypes import (
+        DataSet,
+        Edge,
+        ErrorCode,
+        NList,
+        Row,
+        Tag,
+        Value,
+        Vertex,
+    )
+    from nebula3.data.ResultSet import ResultSet
+    from nebula3.graph.ttypes import ExecutionResponse
+
+    rng = random.Random(seed)
+
+    def vid(i):
+        return Value(sVal=f"player{i}".encode())
+
+    def node(i):
+        props = {
+            b"name": Value(sVal=f"name {i}".encode()),
+            b"age": Value(iVal=20 + i % 30),
+        }
+        return Value(vVal=Vertex(vid=vid(i), tags=[Tag(name=b"player", props=props)]))
+
+    def relationship(i):
+        edge = Edge(
+            src=vid(i % n),
+            dst=vid(rng.randrange(n)),
+            type=1,
+            name=b"follow",
+            ranking=0,
+            props={b"degree": Value(iVal=rng.randrange(100))},
+        )
+        return Value(eVal=edge)
+
+    rows = [
+        Row(
+            values=[
+                node(i),
+                Value(
+                    lVal=NList(values=[relationship(2 * i), relationship(2 * i + 1)])
+                ),
+            ]
+        )
+        for i in range(n)
+    ]
+    response = ExecutionResponse(
+        error_code=ErrorCode.SUCCEEDED,
+        latency_in_us=0,
+        data=DataSet(column_names=[b"node", b"relationships"], rows=rows),
+    )
+    return ResultSet(response, all_latency=0)
+
+
+def network():
+    from pyvis.network import Network
+
+    return Network(notebook=True, directed=True, cdn_resources="in_line")
+
+
+def build(result):
+    from ngql.draw import GraphBuilder
+
+    builder = GraphBuilder().add_result(result)
+    g = builder.to_pyvis(network())
+    builder.to_networkx()
+    return len(g.nodes) + len(g.edges)
+
+
+def build_dataframe(result):
+    import pandas as pd
+
+    from ngql.draw import GraphBuilder
+
+    # what %ng_draw did before: cast every cell into a DataFrame first
+    df = pd.DataFrame(
+        {key: [v.cast() for v in result.column_values(key)] for key in result.keys()}
+    )
+    builder = GraphBuilder()
+    for row in df.itertuples(index=False):
+        builder.add_all(row)
+    g = builder.to_pyvis(network())
+    builder.to_networkx()
+    return len(g.nodes) + len(g.edges)
+
+
+def build_baseline(result):
+    from ngql.draw import GraphBuilder
+
+    # the same labels, but pyvis populated one element at a time
+    builder = GraphBuilder().add_result(result)
+    g = network()
+    for node_id, (options, _) in builder.nodes.items():
+        g.add_node(node_id, **options)
+    for src_id, dst_id, options, _ in builder.edges.values():
+        g.add_edge(src_id, dst_id, **options)
+    return len(g.nodes) + len(g.edges)
+
+
+def build_layout(result, method):
+    from ngql.draw import GraphBuilder
+    from ngql.layout import apply_layout
+
+    g = GraphBuilder().add_result(result).to_pyvis(network())
+    apply_layout(g, method)
+    return len(g.nodes) + len(g.edges)
+
+
+def centrality_vectorized(builder, metric):
+    from ngql.centrality import centrality
+
+    centrality(
+        list(builder.nodes),
+        [(src_id, dst_id) for src_id, dst_id, _, _ in builder.edges.values()],
+        metric,
+    )
+    return len(builder)
+
+
+def centrality_networkx(builder, metric):
+    import networkx as nx
+
+    # what %ng_draw did before, for pagerank
+    g_nx = builder.to_networkx()
+    if metric == "degree":
+        dict(g_nx.degree())
+    elif metric == "betweenness":
+        nx.betweenness_centrality(nx.DiGraph(g_nx), k=64, seed=42)
+    else:
+        nx.pagerank(g_nx)
+    return len(builder)
+
+
+def analytics_graph(result):
+    from ngql.graph import AnalyticsGraph
+
+    g = AnalyticsGraph.from_result(result)
+    g.pagerank()
+    return g.number_of_nodes + g.number_of_edges
+
+
+def analytics_networkx(result):
+    import networkx as nx
+
+    from ngql.draw import GraphBuilder
+
+    g_nx = GraphBuilder().add_result(result).to_networkx()
+    nx.pagerank(g_nx)
+    return g_nx.number_of_nodes() + g_nx.number_of_edges()
+
+
+def timed(fn, rows):
+    start = time.perf_counter()
+    elements = fn(rows)
+    return elements, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,2000,4000,8000,16000")
+    parser.add_argument("--baseline", action="store_true")
+    parser.add_argument("--dataframe", action="store_true")
+    parser.add_argument("--layout", default=None)
+    parser.add_argument("--centrality", default=None)
+    parser.add_argument("--graph", action="store_true")
+    args = parser.parse_args()
+
+    # imports of pyvis and networkx are not accounted to the first size
+    build(subgraph(10))
+    if args.layout:
+        build_layout(subgraph(10), args.layout)
+    if args.centrality:
+        from ngql.draw import GraphBuilder
+
+        centrality_vectorized(GraphBuilder().add_result(subgraph(10)), args.centrality)
+    if args.graph:
+        analytics_graph(subgraph(10))
+    per_element = []
+    for n in [int(size) for size in args.sizes.split(",")]:
+        rows = subgraph(n)
+        elements, elapsed = timed(build, rows)
+        per_element.append(elapsed / elements)
+        line = (
+            f"nodes {n:>7}, elements {elements:>7}: {elapsed * 1000:8.1f} ms, "
+            f"{elapsed / elements * 1e6:6.2f} us/element"
+        )
+        if args.dataframe:
+            _, via_dataframe = timed(build_dataframe, rows)
+            line += f", via DataFrame: {via_dataframe * 1000:8.1f} ms"
+        if args.layout:
+            _, with_layout = timed(lambda r: build_layout(r, args.layout), rows)
+            line += f", {args.layout} layout: {with_layout * 1000:8.1f} ms"
+        if args.centrality:
+            metric = args.centrality
+            from ngql.draw import GraphBuilder
+
+            builder = GraphBuilder().add_result(rows)
+            _, vectorized = timed(lambda b: centrality_vectorized(b, metric), builder)
+            _, networkx = timed(lambda b: centrality_networkx(b, metric), builder)
+            line += (
+                f", {metric}: {vectorized * 1000:8.1f} ms, "
+                f"networkx: {networkx * 1000:8.1f} ms"
+            )
+        if args.graph:
+            _, analytics = timed(analytics_graph, rows)
+            _, networkx = timed(analytics_networkx, rows)
+            line += (
+                f", %ng_graph + pagerank: {analytics * 1000:8.1f} ms, "
+                f"networkx: {networkx * 1000:8.1f} ms"
+            )
+        if args.baseline:
+            _, baseline = timed(build_baseline, rows)
+            line += f", one by one: {baseline * 1000:8.1f} ms"
+        print(line)
+
+    ratio = per_element[-1] / per_element[0]
+    print(f"time per element, largest / smallest: {ratio:.2f}")
+    return 1 if ratio > 3 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
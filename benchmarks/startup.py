@@ -0,0 +1,71 @@
+"""
+Benchmark of `import ngql`, which is what `%load_ext ngql` pays before any
+connection exists. Heavy dependencies should only be imported when the magic
+that needs them first runs.
+
+Usage:
+    python benchmarks/startup.py [--repeat 5]
+
+Exits with 1 when a heavy dependency is imported by `import ngql`.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+HEAVY_MODULES = [
+    "jinja2",
+    "nebula3",
+    "networkx",
+    "numpy",
+    "pandas",
+    "pyarrow",
+    "pydantic",
+    "pyvis",
+    "requests",
+    "scipy",
+    "tqdm",
+]
+
+PROBE = """
+import json, sys, time
+import IPython  # the host of the extension, not accounted to ngql
+before = set(sys.modules)
+start = time.perf_counter()
+import ngql
+elapsed = time.perf_counter() - start
+imported = sorted(set(sys.modules) - before)
+print(json.dumps({"elapsed": elapsed, "imported": imported}))
+"""
+
+
+def probe():
+    # a fresh interpreter each time, nothing is cached in sys.modules
+    output = subprocess.check_output([sys.executable, "-c", PROBE], text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [probe() for _ in range(args.repeat)]
+    elapsed_ms = [run["elapsed"] * 1000 for run in runs]
+    imported = runs[-1]["imported"]
+    heavy = sorted({name.split(".")[0] for name in imported} & set(HEAVY_MODULES))
+
+    print(
+        f"import ngql: median {statistics.median(elapsed_ms):.1f} ms, "
+        f"min {min(elapsed_ms):.1f} ms, max {max(elapsed_ms):.1f} ms"
+    )
+    print(f"modules imported: {len(imported)}")
+    print(f"heavy modules imported: {', '.join(heavy) if heavy else 'none'}")
+    return 1 if heavy else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
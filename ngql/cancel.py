@@ -0,0 +1,154 @@
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+from ngql.utils import FancyPrinter
+
+if TYPE_CHECKING:
+    from nebula3.data.ResultSet import ResultSet
+    from nebula3.gclient.net import Session
+
+
+fancy_print = FancyPrinter()
+
+# Seconds to wait for graphd to answer a killed query before giving up on it
+KILL_GRACE_PERIOD = 5.0
+# Slice of waiting, so that KeyboardInterrupt is handled promptly
+WAIT_SLICE = 0.1
+
+
+def kill_query(get_session: Callable[[], "Session"], session_id: int) -> List[int]:
+    """
+    KILL QUERY all running plans of a session, from another session, return
+    the ids of the killed plans, raise RuntimeError if none could be killed
+    """
+    session = get_session()
+    try:
+        # SHOW QUERIES only lists the plans of the calling session
+        queries = session.execute("SHOW ALL QUERIES")
+        if not queries.is_succeeded():
+            raise RuntimeError(queries.error_msg())
+        plans = [
+            plan.as_int()
+            for sid, plan in zip(
+                queries.column_values("SessionID"),
+                queries.column_values("ExecutionPlanID"),
+            )
+            if sid.as_int() == session_id
+        ]
+        if not plans:
+            raise RuntimeError(f"no running plan of session {session_id} found")
+        killed = []
+        for plan in plans:
+            result = session.execute(f"KILL QUERY (session={session_id}, plan={plan})")
+            if result.is_succeeded():
+                killed.append(plan)
+            else:
+                error = result.error_msg()
+        if not killed:
+            raise RuntimeError(error)
+        return killed
+    finally:
+        session.release()
+
+
+class CancellableQuery:
+    """
+    Run a query in a worker thread, so that it could be killed on graphd when
+    it times out or the cell is interrupted, instead of running on after the
+    notebook gave up on it.
+
+    The session is only released once the query returned, if graphd doesn't
+    answer in time after KILL QUERY, the worker releases it later.
+    """
+
+    def __init__(self, session: "Session", query: str):
+        self.session = session
+        self.query = query
+        self.result: Optional["ResultSet"] = None
+        self.error: Optional[BaseException] = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._release_on_done = False
+        self._released = False
+        self.start = time.perf_counter()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def _run(self):
+        try:
+            self.result = self.session.execute(self.query)
+        except BaseException as e:
+            self.error = e
+        finally:
+            with self._lock:
+                self._done.set()
+                release = self._release_on_done
+            if release:
+                self._release()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def _wait(self, timeout: Optional[float]) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._done.is_set():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            self._done.wait(
+                WAIT_SLICE
+                if deadline is None
+                else min(WAIT_SLICE, max(0.0, deadline - time.monotonic()))
+            )
+        return True
+
+    def _cancel(self, reason: str, get_session: Callable[[], "Session"]):
+        elapsed = self.elapsed
+        try:
+            plans = kill_query(get_session, self.session._session_id)
+        except Exception as e:
+            self._wait(KILL_GRACE_PERIOD)
+            fancy_print(
+                f"[ERROR] Query {reason} after {elapsed:.2f}s, but failed to kill"
+                f" it on graphd, it may still be running: {e}",
+                color="red",
+            )
+            return
+        self._wait(KILL_GRACE_PERIOD)
+        fancy_print(
+            f"[CANCELLED] Query {reason} after {elapsed:.2f}s,"
+            f" killed {len(plans)} running plan(s)",
+            color="pink",
+        )
+
+    def wait(
+        self, timeout: Optional[float], get_session: Callable[[], "Session"]
+    ) -> "ResultSet":
+        """
+        Wait for the result, raise TimeoutError or KeyboardInterrupt after the
+        query is killed on graphd
+        """
+        try:
+            finished = self._wait(timeout)
+        except KeyboardInterrupt:
+            self._cancel("interrupted", get_session)
+            raise
+        if not finished:
+            self._cancel("timed out", get_session)
+            raise TimeoutError(f"Query timed out after {timeout}s")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def _release(self):
+        if not self._released:
+            self._released = True
+            self.session.release()
+
+    def release(self):
+        with self._lock:
+            if not self._done.is_set():
+                self._release_on_done = True
+                return
+        self._release()
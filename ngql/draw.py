@@ -0,0 +1,261 @@
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from nebula3.common.ttypes import Value
+from nebula3.data.DataObject import Node, PathWrapper, Relationship
+
+if TYPE_CHECKING:
+    from nebula3.data.ResultSet import ResultSet
+
+from ngql.utils import get_color, is_human_readable, truncate
+
+
+# properties of these values are not shown
+EMPTY_VALUES = ("__NULL__", "__EMPTY__")
+
+
+def _str_props(props: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        k: str(v.cast()) if hasattr(v, "cast") else str(v) for k, v in props.items()
+    }
+
+
+class GraphBuilder:
+    """
+    Collect the nodes and relationships of query results into dicts keyed by
+    id, de-duplicated as they are added, then populate pyvis and networkx in
+    bulk, thus drawing is linear in the number of elements.
+
+    Nodes only known as the end of a relationship are placeholders, replaced
+    once the node itself shows up. Otherwise the first occurrence wins.
+    """
+
+    def __init__(self):
+        # node id -> pyvis options, networkx attributes
+        self.nodes: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+        self.placeholders: set = set()
+        # node id -> tags, empty for placeholders
+        self.tags: Dict[str, List[str]] = {}
+        # src->dst@rank:edge_name -> src, dst, pyvis options, networkx attributes
+        self.edges: Dict[str, Tuple[str, str, Dict[str, Any], Dict[str, Any]]] = {}
+
+    def __len__(self):
+        return len(self.nodes) + len(self.edges)
+
+    def add(self, item: Any):
+        """
+        Add a Node, Relationship, PathWrapper, a list of them, or their struct
+        dicts of the arrow result style, other values are ignored
+        """
+        if isinstance(item, Node):
+            props_raw: Dict[str, Any] = dict()
+            tags = item.tags()  # list of strings
+            for tag in tags:
+                props_raw.update(item.properties(tag))
+            self.add_node(str(item.get_id().cast()), tags, _str_props(props_raw))
+        elif isinstance(item, Relationship):
+            self.add_relationship(
+                str(item.start_vertex_id().cast()),
+                str(item.end_vertex_id().cast()),
+                item.edge_name(),
+                item.ranking(),
+                _str_props(item.properties()),
+            )
+        elif isinstance(item, PathWrapper):
+            for node in item.nodes():
+                self.add(node)
+            for relationship in item.relationships():
+                self.add(relationship)
+        elif isinstance(item, dict):
+            # struct columns of the arrow result style
+            if {"vid", "tags", "properties"} <= item.keys():
+                self.add_node(
+                    str(item["vid"]),
+                    list(item["tags"] or []),
+                    _str_props(dict(item["properties"] or {})),
+                )
+            elif {"src", "dst", "type", "rank"} <= item.keys():
+                self.add_relationship(
+                    str(item["src"]),
+                    str(item["dst"]),
+                    item["type"],
+                    item["rank"],
+                    _str_props(dict(item["properties"] or {})),
+                )
+            elif {"nodes", "relationships"} <= item.keys():
+                for it in list(item["nodes"] or []) + list(item["relationships"] or []):
+                    self.add(it)
+        elif isinstance(item, list):
+            for it in item:
+                self.add(it)
+
+    def add_all(self, items: Iterable[Any]) -> "GraphBuilder":
+        for item in items:
+            self.add(item)
+        return self
+
+    def add_value(self, value: Value):
+        """
+        Add a raw value of a result row, only vertices, edges and paths(also
+        inside lists and sets) are wrapped, other values are skipped as is
+        """
+        value_type = value.getType()
+        if value_type == Value.VVAL:
+            self.add(Node(value.get_vVal()))
+        elif value_type == Value.EVAL:
+            self.add(Relationship(value.get_eVal()))
+        elif value_type == Value.PVAL:
+            self.add(PathWrapper(value.get_pVal()))
+        elif value_type == Value.LVAL:
+            for item in value.get_lVal().values:
+                self.add_value(item)
+        elif value_type == Value.UVAL:
+            for item in value.get_uVal().values:
+                self.add_value(item)
+
+    def add_result(self, result: "ResultSet") -> "GraphBuilder":
+        """
+        Add the vertices, edges and paths of a ResultSet, traversing its rows
+        directly rather than converting it into a DataFrame first
+        """
+        for row in result.rows():
+            for value in row.values:
+                self.add_value(value)
+        return self
+
+    def add_node(self, node_id: str, tags: List[str], props: Dict[str, str]):
+        if node_id in self.nodes and node_id not in self.placeholders:
+            return
+        self.placeholders.discard(node_id)
+
+        tags_str = tags[0] if len(tags) == 1 else ",".join(tags)
+        # populating empty and null properties
+        props = {k: v for k, v in props.items() if v not in EMPTY_VALUES}
+
+        if "name" in props:
+            label = props["name"]
+        else:
+            if is_human_readable(node_id):
+                label = f"tag: {tags_str},\nid: {node_id}"
+            else:
+                label = f"tag: {tags_str},\nid: {node_id[:3]}..{node_id[-3:]}"
+            for k in props:
+                if "name" in str(k).lower():
+                    label = props[k]
+                    break
+
+        if "id" not in props:
+            props["id"] = node_id
+        title = "\n".join([f"{k}: {v}" for k, v in props.items()])
+
+        # networkx
+        if len(tags) > 1:
+            props["__tags__"] = ",".join(tags)
+        self.nodes[node_id] = (
+            {"label": label, "title": title, "color": get_color(node_id)},
+            props,
+        )
+        self.tags[node_id] = list(tags)
+
+    def _add_placeholder(self, node_id: str):
+        if node_id in self.nodes:
+            return
+        label = (
+            f"tag: {node_id[:3]}..{node_id[-3:]}"
+            if not is_human_readable(node_id)
+            else node_id
+        )
+        self.nodes[node_id] = (
+            {"label": label, "title": node_id, "color": get_color(node_id)},
+            {},
+        )
+        self.placeholders.add(node_id)
+        self.tags[node_id] = []
+
+    @staticmethod
+    def edge_key(src_id: str, dst_id: str, edge_name: str, rank: int) -> str:
+        return f"{src_id}->{dst_id}@{rank}:{edge_name}"
+
+    def add_relationship(
+        self,
+        src_id: str,
+        dst_id: str,
+        edge_name: str,
+        rank: int,
+        props: Dict[str, Any],
+    ):
+        edge_key = self.edge_key(src_id, dst_id, edge_name, rank)
+        if edge_key in self.edges:
+            return
+        # ensure start and end vertex exist in graph
+        self._add_placeholder(src_id)
+        self._add_placeholder(dst_id)
+
+        if rank != 0:
+            props.update({"rank": rank})
+        # populating empty and null properties
+        props = {k: v for k, v in props.items() if v not in EMPTY_VALUES}
+        props_str_list: List[str] = []
+        for k in props:
+            if len(props_str_list) >= 1:
+                break
+            props_str_list.append(f"{truncate(k, 7)}: {truncate(str(props[k]), 8)}")
+        props_str = "\n".join(props_str_list)
+
+        label = f"{props_str}\n{edge_name}" if props else edge_name
+        if props:
+            title = (
+                "{\n  " + "\n  ".join([f"{k}: {v}" for k, v in props.items()]) + "\n}"
+            )
+        else:
+            title = edge_name
+        options = {"label": label, "title": title, "weight": props.get("rank", 0)}
+        # networkx
+        props["edge_type"] = edge_name
+        self.edges[edge_key] = (src_id, dst_id, options, props)
+
+    def subgraph(self, node_ids: Iterable[str]) -> "GraphBuilder":
+        """
+        A builder of the given nodes and the relationships among them
+        """
+        kept = set(node_ids)
+        builder = GraphBuilder()
+        builder.nodes = {k: v for k, v in self.nodes.items() if k in kept}
+        builder.placeholders = self.placeholders & kept
+        builder.tags = {k: v for k, v in self.tags.items() if k in kept}
+        builder.edges = {
+            k: v for k, v in self.edges.items() if v[0] in kept and v[1] in kept
+        }
+        return builder
+
+    def to_pyvis(self, g):
+        """
+        Populate a pyvis Network in bulk, bypassing the per element
+        membership checks of add_node/add_edge which are linear in the size of
+        the network
+        """
+        from pyvis.edge import Edge
+        from pyvis.node import Node as PyvisNode
+
+        existing = set(g.node_ids)
+        for node_id, (options, _) in self.nodes.items():
+            if node_id in existing:
+                continue
+            n = PyvisNode(node_id, "dot", font_color=g.font_color, **dict(options))
+            g.nodes.append(n.options)
+            g.node_ids.append(node_id)
+            g.node_map[node_id] = n.options
+        for src_id, dst_id, options, _ in self.edges.values():
+            g.edges.append(Edge(src_id, dst_id, g.directed, **dict(options)).options)
+        return g
+
+    def to_networkx(self, g_nx: Optional[Any] = None):
+        import networkx as nx
+
+        g_nx = nx.MultiDiGraph() if g_nx is None else g_nx
+        g_nx.add_nodes_from(
+            (node_id, props) for node_id, (_, props) in self.nodes.items()
+        )
+        g_nx.add_edges_from(
+            (src_id, dst_id, props) for src_id, dst_id, _, props in self.edges.values()
+        )
+        return g_nx
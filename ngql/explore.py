@@ -0,0 +1,428 @@
+import json
+import time
+import uuid
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Tuple
+
+from ngql.draw import GraphBuilder
+from ngql.render import VIS_CDN
+from ngql.utils import vid_literal
+
+if TYPE_CHECKING:
+    from nebula3.data.ResultSet import ResultSet
+
+# neighbors fetched per expanded node, at most
+EXPLORE_LIMIT = 100
+
+
+class Explorer:
+    """
+    Graph state of an exploration kept in the kernel: every node and
+    relationship fetched so far, the neighborhood of each expanded node, and
+    what is shown. Expanding nodes fetches the neighborhoods not fetched yet
+    with one query, then returns only what the front end doesn't show yet.
+    Neighborhoods are cached, a node whose neighborhood was cut at the limit
+    fetches the next neighbors when it's expanded while already expanded.
+    """
+
+    def __init__(
+        self,
+        execute: Callable[[str], "ResultSet"],
+        int_vid: bool = False,
+        edge_types: Optional[List[str]] = None,
+        limit: int = EXPLORE_LIMIT,
+    ):
+        self.execute = execute
+        self.int_vid = int_vid
+        self.edge_types = edge_types or []
+        self.limit = limit
+        self.builder = GraphBuilder()
+        # expanded node -> the node ids and edge keys of its neighborhood
+        self.neighborhoods: Dict[str, Tuple[List[str], List[str]]] = {}
+        # expanded nodes whose neighborhood was cut at the limit
+        self.truncated: Set[str] = set()
+        self.expanded: Set[str] = set()
+        self.seeds: List[str] = []
+        # node id -> options last sent to the front end, edge keys sent
+        self.shown_nodes: Dict[str, Dict[str, Any]] = {}
+        self.shown_edges: Set[str] = set()
+        self.queries = 0
+
+    def neighbor_query(
+        self, vids: List[str], exclude: Optional[List[str]] = None
+    ) -> str:
+        edge_types = "|".join(f"`{edge_type}`" for edge_type in self.edge_types)
+        ids = ", ".join(vid_literal(vid, self.int_vid) for vid in vids)
+        known = ", ".join(vid_literal(vid, self.int_vid) for vid in exclude or [])
+        # the limit applies to each node, a hub can't crowd out the others
+        return (
+            f"MATCH (v)-[e{':' + edge_types if edge_types else ''}]-(n) "
+            f"WHERE id(v) IN [{ids}] "
+            + (f"AND NOT id(n) IN [{known}] " if known else "")
+            + f"WITH v, collect([e, n])[0..{self.limit}] AS pairs "
+            "UNWIND pairs AS pair "
+            "RETURN v, pair[0] AS e, pair[1] AS n"
+        )
+
+    def fetch(self, vids: List[str], exclude: Optional[List[str]] = None):
+        """
+        Fetch the neighborhoods of the nodes in one query, at most limit
+        neighbors each but the excluded ones, which are added to the cached
+        neighborhoods, nodes without any are fetched by themselves
+        """
+        result = self.execute(self.neighbor_query(vids, exclude))
+        self.queries += 1
+        if result is None or not result.is_succeeded():
+            raise RuntimeError(
+                "Failed to fetch the neighbors"
+                + (f": {result.error_msg()}" if result is not None else "")
+            )
+        neighborhoods: Dict[str, Tuple[List[str], List[str]]] = {
+            vid: ([], []) for vid in vids
+        }
+        for v, e, n in zip(
+            result.column_values("v"),
+            result.column_values("e"),
+            result.column_values("n"),
+        ):
+            node, relationship, neighbor = (
+                v.as_node(),
+                e.as_relationship(),
+                n.as_node(),
+            )
+            self.builder.add_all([node, neighbor, relationship])
+            node_ids, edge_keys = neighborhoods[str(node.get_id().cast())]
+            node_ids.append(str(neighbor.get_id().cast()))
+            edge_keys.append(
+                GraphBuilder.edge_key(
+                    str(relationship.start_vertex_id().cast()),
+                    str(relationship.end_vertex_id().cast()),
+                    relationship.edge_name(),
+                    relationship.ranking(),
+                )
+            )
+        lonely = [vid for vid in vids if vid not in self.builder.nodes]
+        if lonely:
+            ids = ", ".join(vid_literal(vid, self.int_vid) for vid in lonely)
+            result = self.execute(f"MATCH (v) WHERE id(v) IN [{ids}] RETURN v")
+            self.queries += 1
+            if result is not None and result.is_succeeded():
+                self.builder.add_result(result)
+        for vid, (node_ids, edge_keys) in neighborhoods.items():
+            if len(node_ids) >= self.limit:
+                self.truncated.add(vid)
+            else:
+                self.truncated.discard(vid)
+            cached_nodes, cached_edges = self.neighborhoods.setdefault(vid, ([], []))
+            cached_nodes.extend(node_ids)
+            cached_edges.extend(edge_keys)
+
+    def _vis_node(self, node_id: str) -> Dict[str, Any]:
+        options, _ = self.builder.nodes[node_id]
+        return {"id": node_id, "shape": "dot", **options}
+
+    def _vis_edge(self, edge_key: str) -> Dict[str, Any]:
+        src_id, dst_id, options, _ = self.builder.edges[edge_key]
+        return {"id": edge_key, "from": src_id, "to": dst_id, "arrows": "to", **options}
+
+    def _delta(self, node_ids: List[str], edge_keys: List[str]) -> Dict[str, Any]:
+        """
+        What the front end should add or update, marked as shown
+        """
+        add_nodes, update_nodes = [], []
+        for node_id in list(dict.fromkeys(node_ids)) + list(self.shown_nodes):
+            if node_id not in self.builder.nodes:
+                continue
+            node = self._vis_node(node_id)
+            if node_id not in self.shown_nodes:
+                add_nodes.append(node)
+            elif self.shown_nodes[node_id] != node:
+                # a placeholder got its properties
+                update_nodes.append(node)
+            self.shown_nodes[node_id] = node
+        add_edges = []
+        for edge_key in dict.fromkeys(edge_keys):
+            if edge_key not in self.shown_edges and edge_key in self.builder.edges:
+                add_edges.append(self._vis_edge(edge_key))
+                self.shown_edges.add(edge_key)
+        return {
+            "add_nodes": add_nodes,
+            "update_nodes": update_nodes,
+            "add_edges": add_edges,
+            "remove_nodes": [],
+            "remove_edges": [],
+        }
+
+    def expand(self, vids: List[str]) -> Tuple[Dict[str, Any], int]:
+        """
+        Show the neighborhoods of the nodes, return the delta and how many of
+        them were fetched, the others come from the cache. Expanding a node
+        that is expanded already and was cut at the limit fetches its next
+        neighbors.
+        """
+        missing = [vid for vid in dict.fromkeys(vids) if vid not in self.neighborhoods]
+        if missing:
+            self.fetch(missing)
+        more = [
+            vid
+            for vid in dict.fromkeys(vids)
+            if vid in self.truncated and vid in self.expanded
+        ]
+        for vid in more:
+            self.fetch([vid], exclude=self.neighborhoods[vid][0])
+        node_ids, edge_keys = list(vids), []
+        for vid in vids:
+            nodes, edges = self.neighborhoods[vid]
+            node_ids.extend(nodes)
+            edge_keys.extend(edges)
+            self.expanded.add(vid)
+        return self._delta(node_ids, edge_keys), len(missing) + len(more)
+
+    def start(self, vids: List[str]) -> Tuple[Dict[str, Any], int]:
+        """
+        Show the seed nodes with their neighborhoods
+        """
+        self.seeds = list(dict.fromkeys(vids))
+        return self.expand(self.seeds)
+
+    def collapse(self, vid: str) -> Dict[str, Any]:
+        """
+        Hide the neighbors shown by expanding the node, but the ones still
+        reachable from other expanded nodes or seeds
+        """
+        self.expanded.discard(vid)
+        keep: Set[str] = set(self.seeds)
+        for expanded in self.expanded:
+            keep.add(expanded)
+            keep.update(self.neighborhoods.get(expanded, ([], []))[0])
+        node_ids, _ = self.neighborhoods.get(vid, ([], []))
+        remove_nodes = [
+            node_id
+            for node_id in dict.fromkeys(node_ids)
+            if node_id not in keep and node_id != vid and node_id in self.shown_nodes
+        ]
+        for node_id in remove_nodes:
+            del self.shown_nodes[node_id]
+        remove_edges = []
+        for edge_key in list(self.shown_edges):
+            src_id, dst_id, _, _ = self.builder.edges[edge_key]
+            if src_id not in self.shown_nodes or dst_id not in self.shown_nodes:
+                self.shown_edges.discard(edge_key)
+                remove_edges.append(edge_key)
+        return {
+            "add_nodes": [],
+            "update_nodes": [],
+            "add_edges": [],
+            "remove_nodes": remove_nodes,
+            "remove_edges": remove_edges,
+        }
+
+
+EXPLORE_JS = """
+(function () {
+  var uid = %(uid)s;
+  var explore = window.ngExplore = window.ngExplore || {};
+  var state = explore[uid] = explore[uid] || {pending: []};
+  state.apply = function (delta) {
+    if (!state.network) { state.pending.push(delta); return; }
+    state.edges.remove(delta.remove_edges);
+    state.nodes.remove(delta.remove_nodes);
+    state.nodes.update(delta.update_nodes);
+    state.nodes.add(delta.add_nodes);
+    state.edges.add(delta.add_edges);
+  };
+  // clicks are sent to the kernel through the hidden text widget
+  var count = 0;
+  function send(message) {
+    var input = document.querySelector(%(bridge)s + " input");
+    if (!input) return;
+    message.n = ++count;
+    input.value = JSON.stringify(message);
+    input.dispatchEvent(new Event("input", {bubbles: true}));
+  }
+  function init() {
+    state.nodes = new vis.DataSet([]);
+    state.edges = new vis.DataSet([]);
+    state.network = new vis.Network(
+      document.getElementById(%(container)s),
+      {nodes: state.nodes, edges: state.edges},
+      %(options)s
+    );
+    state.network.on("click", function (params) {
+      if (params.nodes.length) send({action: "select", id: params.nodes[0]});
+    });
+    state.network.on("doubleClick", function (params) {
+      if (params.nodes.length) send({action: "toggle", id: params.nodes[0]});
+    });
+    state.pending.splice(0).forEach(state.apply);
+  }
+  if (window.vis && window.vis.Network) {
+    init();
+  } else {
+    var link = document.createElement("link");
+    link.rel = "stylesheet";
+    link.href = %(css)s;
+    document.head.appendChild(link);
+    var script = document.createElement("script");
+    script.src = %(js)s;
+    script.onload = init;
+    document.head.appendChild(script);
+  }
+})();
+"""
+
+EXPLORE_OPTIONS = {
+    "physics": {
+        "solver": "repulsion",
+        "repulsion": {
+            "nodeDistance": 90,
+            "centralGravity": 0.2,
+            "springLength": 200,
+            "springConstant": 0.05,
+            "damping": 0.09,
+        },
+    },
+    "nodes": {"font": {"color": "#93A1A1"}},
+    "edges": {"smooth": {"type": "continuous"}},
+}
+
+
+class ExploreWidget:
+    """
+    ipywidgets view of an Explorer: the vis.js network is rendered once, then
+    only the deltas of expanding or collapsing nodes are sent to it. Double
+    click a node to expand or collapse it, or use the toolbar.
+    """
+
+    def __init__(self, explorer: Explorer, height: str = "500px"):
+        import ipywidgets as widgets
+
+        self.explorer = explorer
+        self.uid = uuid.uuid4().hex[:12]
+        self.selected: Optional[str] = None
+        self.vid_input = widgets.Text(placeholder="Node id", layout={"width": "240px"})
+        self.expand_button = widgets.Button(description="Expand", icon="plus")
+        self.collapse_button = widgets.Button(description="Collapse", icon="minus")
+        self.status = widgets.Label()
+        # the front end writes clicks into it, never shown
+        self.bridge = widgets.Text(layout={"display": "none"})
+        self.bridge.add_class(f"ng-explore-bridge-{self.uid}")
+        self.canvas = widgets.Output(
+            layout={"height": height, "border": "1px solid lightgray"}
+        )
+        # deltas are sent as scripts through it, cleared before each one
+        self.channel = widgets.Output(layout={"display": "none"})
+        self.view = widgets.VBox(
+            [
+                widgets.HBox(
+                    [
+                        self.vid_input,
+                        self.expand_button,
+                        self.collapse_button,
+                        self.status,
+                    ]
+                ),
+                self.canvas,
+                self.channel,
+                self.bridge,
+            ]
+        )
+        self.expand_button.on_click(lambda _: self._on_button("expand"))
+        self.collapse_button.on_click(lambda _: self._on_button("collapse"))
+        self.bridge.observe(self._on_message, names="value")
+        self._render(height)
+
+    def _render(self, height: str):
+        from IPython.display import HTML, Javascript, display
+
+        container = f"ng-explore-{self.uid}"
+        with self.canvas:
+            display(
+                HTML(
+                    f'<div id="{container}" style="width: 100%; height: {height}; '
+                    'background-color: #002B36;"></div>'
+                )
+            )
+            display(
+                Javascript(
+                    EXPLORE_JS
+                    % {
+                        "uid": json.dumps(self.uid),
+                        "bridge": json.dumps(f".ng-explore-bridge-{self.uid}"),
+                        "container": json.dumps(container),
+                        "options": json.dumps(EXPLORE_OPTIONS),
+                        "css": json.dumps(f"{VIS_CDN}/dist/dist/vis-network.min.css"),
+                        "js": json.dumps(f"{VIS_CDN}/dist/vis-network.min.js"),
+                    }
+                )
+            )
+
+    def send(self, delta: Dict[str, Any]):
+        from IPython.display import Javascript, display
+
+        payload = json.dumps(delta, separators=(",", ":")).replace("</", "<\\/")
+        # the network may not be there yet, then the delta waits for it
+        self.channel.clear_output()
+        with self.channel:
+            display(
+                Javascript(
+                    "var explore = window.ngExplore = window.ngExplore || {};"
+                    f"var state = explore[{json.dumps(self.uid)}] ="
+                    f" explore[{json.dumps(self.uid)}] || {{pending: []}};"
+                    f"state.apply ? state.apply({payload}) : state.pending.push({payload});"
+                )
+            )
+
+    def _on_button(self, action: str):
+        vid = self.vid_input.value.strip() or self.selected
+        if vid:
+            self.handle({"action": action, "id": vid})
+
+    def _on_message(self, change):
+        try:
+            message = json.loads(change["new"])
+        except (TypeError, ValueError):
+            return
+        self.handle(message)
+
+    def handle(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Act on a message of the front end or the toolbar, send the delta back
+        """
+        action, vid = message.get("action"), str(message.get("id", ""))
+        if not vid:
+            return None
+        if action == "select":
+            self.selected = vid
+            self.vid_input.value = vid
+            return None
+        if action == "toggle":
+            action = "collapse" if vid in self.explorer.expanded else "expand"
+        start = time.perf_counter()
+        try:
+            if action == "expand":
+                delta, fetched = self.explorer.expand([vid])
+                source = "fetched" if fetched else "cached"
+            elif action == "collapse":
+                delta, source = self.explorer.collapse(vid), "collapsed"
+            else:
+                return None
+        except Exception as e:
+            self.status.value = f"Failed to {action} {vid}: {e}"
+            return None
+        self.send(delta)
+        self.status.value = (
+            f"{vid}: +{len(delta['add_nodes'])}/-{len(delta['remove_nodes'])} nodes, "
+            f"+{len(delta['add_edges'])}/-{len(delta['remove_edges'])} edges, "
+            f"{source} in {(time.perf_counter() - start) * 1000:.0f} ms"
+            + (
+                f", cut at {self.explorer.limit} neighbors, expand again for more"
+                if vid in self.explorer.truncated and vid in self.explorer.expanded
+                else ""
+            )
+        )
+        return delta
+
+    def _ipython_display_(self):
+        from IPython.display import display
+
+        display(self.view)
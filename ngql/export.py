@@ -0,0 +1,433 @@
+import datetime
+import functools
+import json
+import os
+from typing import TYPE_CHECKING, Any, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+    from nebula3.data.ResultSet import ResultSet
+    from nebula3.data.DataObject import ValueWrapper
+
+
+FORMAT_PARQUET = "parquet"
+FORMAT_ARROW = "arrow"
+FORMAT_CSV = "csv"
+
+EXTENSION_FORMATS = {
+    ".parquet": FORMAT_PARQUET,
+    ".arrow": FORMAT_ARROW,
+    ".feather": FORMAT_ARROW,
+    ".csv": FORMAT_CSV,
+}
+
+
+def _pa():
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("Please install pyarrow to export query results")
+    return pa
+
+
+@functools.lru_cache(maxsize=None)
+def _properties_type():
+    pa = _pa()
+    return pa.map_(pa.string(), pa.string())
+
+
+@functools.lru_cache(maxsize=None)
+def node_type():
+    pa = _pa()
+    return pa.struct(
+        [
+            ("vid", pa.string()),
+            ("tags", pa.list_(pa.string())),
+            ("properties", _properties_type()),
+        ]
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def relationship_type():
+    pa = _pa()
+    return pa.struct(
+        [
+            ("src", pa.string()),
+            ("dst", pa.string()),
+            ("type", pa.string()),
+            ("rank", pa.int64()),
+            ("properties", _properties_type()),
+        ]
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def path_type():
+    pa = _pa()
+    return pa.struct(
+        [
+            ("nodes", pa.list_(node_type())),
+            ("relationships", pa.list_(relationship_type())),
+        ]
+    )
+
+
+def _is_null(value: "ValueWrapper") -> bool:
+    return value.is_null() or value.is_empty()
+
+
+def arrow_type(value: "ValueWrapper") -> Optional["pa.DataType"]:
+    """
+    Arrow type of a value, None for null. Nodes, relationships and paths are
+    flattened into struct columns, values without an Arrow counterpart(map,
+    time, duration, geography) are kept as string.
+    """
+    pa = _pa()
+    if _is_null(value):
+        return None
+    if value.is_bool():
+        return pa.bool_()
+    if value.is_int():
+        return pa.int64()
+    if value.is_double():
+        return pa.float64()
+    if value.is_string():
+        return pa.string()
+    if value.is_date():
+        return pa.date32()
+    if value.is_datetime():
+        return pa.timestamp("us")
+    if value.is_vertex():
+        return node_type()
+    if value.is_edge():
+        return relationship_type()
+    if value.is_path():
+        return path_type()
+    if value.is_list() or value.is_set():
+        items = value.as_list() if value.is_list() else list(value.as_set())
+        for item in items:
+            item_type = arrow_type(item)
+            if item_type is not None:
+                return pa.list_(item_type)
+        return pa.list_(pa.string())
+    return pa.string()
+
+
+def _vid(vid: "ValueWrapper") -> str:
+    return str(vid.cast())
+
+
+def _properties(props: dict) -> List[tuple]:
+    return [
+        (k, None if _is_null(v) else str(v.cast_primitive())) for k, v in props.items()
+    ]
+
+
+def _node(node) -> dict:
+    properties = []
+    for tag in node.tags():
+        properties.extend(_properties(node.properties(tag)))
+    return {"vid": _vid(node.get_id()), "tags": node.tags(), "properties": properties}
+
+
+def _relationship(relationship) -> dict:
+    return {
+        "src": _vid(relationship.start_vertex_id()),
+        "dst": _vid(relationship.end_vertex_id()),
+        "type": relationship.edge_name(),
+        "rank": relationship.ranking(),
+        "properties": _properties(relationship.properties()),
+    }
+
+
+def to_python(value: "ValueWrapper", type_: "pa.DataType") -> Any:
+    """
+    Python value of a nebula value to be put into an Arrow column of type_
+    """
+    pa = _pa()
+    if _is_null(value):
+        return None
+    if type_ == node_type():
+        return _node(value.as_node()) if value.is_vertex() else None
+    if type_ == relationship_type():
+        return _relationship(value.as_relationship()) if value.is_edge() else None
+    if type_ == path_type():
+        if not value.is_path():
+            return None
+        path = value.as_path()
+        return {
+            "nodes": [_node(n) for n in path.nodes()],
+            "relationships": [_relationship(r) for r in path.relationships()],
+        }
+    if pa.types.is_list(type_):
+        if value.is_list():
+            items = value.as_list()
+        elif value.is_set():
+            items = list(value.as_set())
+        else:
+            items = [value]
+        return [to_python(item, type_.value_type) for item in items]
+    if pa.types.is_date32(type_) and value.is_date():
+        date = value.as_date()
+        return datetime.date(date.get_year(), date.get_month(), date.get_day())
+    if pa.types.is_timestamp(type_) and value.is_datetime():
+        dt = value.as_datetime()
+        return datetime.datetime(
+            dt.get_year(),
+            dt.get_month(),
+            dt.get_day(),
+            dt.get_hour(),
+            dt.get_minute(),
+            dt.get_sec(),
+            dt.get_microsec(),
+        )
+    if pa.types.is_string(type_):
+        if value.is_string():
+            return value.as_string()
+        # map, time, duration, geography or nested values of CSV as JSON
+        primitive = value.cast_primitive()
+        if isinstance(primitive, set):
+            primitive = list(primitive)
+        if isinstance(primitive, (dict, list)):
+            return json.dumps(primitive, default=str)
+        return str(primitive)
+    return value.cast_primitive()
+
+
+def column_type(
+    values: List["ValueWrapper"], null_type: Optional["pa.DataType"] = None
+) -> "pa.DataType":
+    """
+    Arrow type of a column, from its first non-null value, null_type(string
+    by default) if all null
+    """
+    for value in values:
+        type_ = arrow_type(value)
+        if type_ is not None:
+            return type_
+    return null_type if null_type is not None else _pa().string()
+
+
+def common_type(a: "pa.DataType", b: "pa.DataType") -> Optional["pa.DataType"]:
+    """
+    The type values of both a and b fit in: null fits anywhere, int64 widens to
+    float64, other scalars to string. None if there is none, i.e. a node and
+    a string.
+    """
+    pa = _pa()
+    if a == b or pa.types.is_null(b):
+        return a
+    if pa.types.is_null(a):
+        return b
+
+    def numeric(type_):
+        return pa.types.is_integer(type_) or pa.types.is_floating(type_)
+
+    if numeric(a) and numeric(b):
+        return pa.float64()
+    if pa.types.is_list(a) and pa.types.is_list(b):
+        value_type = common_type(a.value_type, b.value_type)
+        return None if value_type is None else pa.list_(value_type)
+    if pa.types.is_nested(a) or pa.types.is_nested(b):
+        return None
+    return pa.string()
+
+
+def _dictionary_encoded(array: "pa.Array", max_ratio: float) -> "pa.Array":
+    # only worth it when the strings repeat, i.e. tags, edge names and vids
+    import pyarrow.compute as pc
+
+    if len(array) == 0 or not _pa().types.is_string(array.type):
+        return array
+    if pc.count_distinct(array).as_py() > len(array) * max_ratio:
+        return array
+    return array.dictionary_encode()
+
+
+def result_table(result: "ResultSet", max_distinct_ratio: float = 0.5) -> "pa.Table":
+    """
+    Convert a ResultSet into a pyarrow Table, string columns whose distinct
+    values are at most max_distinct_ratio of the rows are dictionary-encoded
+    """
+    pa = _pa()
+    arrays, fields = [], []
+    for column in result.keys():
+        values = result.column_values(column)
+        type_ = column_type(values)
+        array = _dictionary_encoded(
+            pa.array([to_python(v, type_) for v in values], type=type_),
+            max_distinct_ratio,
+        )
+        arrays.append(array)
+        fields.append(pa.field(column, array.type))
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def arrow_dataframe(result: "ResultSet", max_distinct_ratio: float = 0.5):
+    """
+    A DataFrame of Arrow-backed dtypes, dictionary-encoded columns become
+    pandas categoricals, nodes, relationships and paths are struct columns
+    """
+    import pandas as pd
+
+    pa = _pa()
+
+    def types_mapper(type_):
+        if pa.types.is_dictionary(type_):
+            return None
+        return pd.ArrowDtype(type_)
+
+    return result_table(result, max_distinct_ratio).to_pandas(types_mapper=types_mapper)
+
+
+def _csv_type(type_: "pa.DataType") -> "pa.DataType":
+    pa = _pa()
+    if pa.types.is_nested(type_):
+        return pa.string()
+    return type_
+
+
+class ResultWriter:
+    """
+    Write query results into a Parquet, Arrow IPC or CSV file, one record
+    batch per ResultSet, thus only one page is held in memory at a time.
+
+    The schema is inferred from the first ResultSet. When a later one doesn't
+    fit in it, i.e. floats after ints or values after nulls only, the columns
+    are widened to their common type and the batches written so far are
+    rewritten with it, which only happens once per widening.
+    """
+
+    def __init__(self, path: str):
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in EXTENSION_FORMATS:
+            raise ValueError(
+                f"Unsupported output file type '{extension}', "
+                f"please use one of {', '.join(EXTENSION_FORMATS)}"
+            )
+        self.path = path
+        self.format = EXTENSION_FORMATS[extension]
+        self.schema = None
+        self.writer = None
+        self.rows = 0
+        self.batches = 0
+
+    def _infer_schema(self, result: "ResultSet"):
+        pa = _pa()
+        fields = []
+        for column in result.keys():
+            # all null columns are typed by the first page with a value
+            type_ = column_type(result.column_values(column), pa.null())
+            if self.format == FORMAT_CSV:
+                type_ = _csv_type(type_)
+            fields.append(pa.field(column, type_))
+        return pa.schema(fields)
+
+    def _widened(self, result: "ResultSet"):
+        """
+        The schema the result fits in along with what's written, None if it
+        fits in the current one
+        """
+        pa = _pa()
+        fields, widened = [], False
+        for field, page_field in zip(self.schema, self._infer_schema(result)):
+            type_ = common_type(field.type, page_field.type)
+            if type_ is None:
+                raise ValueError(
+                    f"Column '{field.name}' is {field.type} in earlier pages but "
+                    f"{page_field.type} in a later one, which can't be combined"
+                )
+            widened = widened or type_ != field.type
+            fields.append(pa.field(field.name, type_))
+        return pa.schema(fields) if widened else None
+
+    def _written_batches(self, path: str, schema: "pa.Schema"):
+        pa = _pa()
+        if self.format == FORMAT_PARQUET:
+            import pyarrow.parquet as pq
+
+            yield from pq.ParquetFile(path).iter_batches()
+        elif self.format == FORMAT_ARROW:
+            with pa.memory_map(path) as source:
+                reader = pa.ipc.open_file(source)
+                for i in range(reader.num_record_batches):
+                    yield reader.get_batch(i)
+        else:
+            import pyarrow.csv as pa_csv
+
+            yield from pa_csv.open_csv(
+                path,
+                convert_options=pa_csv.ConvertOptions(
+                    column_types=schema,
+                    strings_can_be_null=True,
+                    quoted_strings_can_be_null=False,
+                ),
+            )
+
+    def _rewrite(self, schema: "pa.Schema"):
+        """
+        Reopen the file with the widened schema, casting the batches written
+        so far into it
+        """
+        pa = _pa()
+        self.writer.close()
+        written = f"{self.path}.widening"
+        os.replace(self.path, written)
+        try:
+            batches = self._written_batches(written, self.schema) if self.rows else []
+            self.schema = schema
+            self.writer = self._open()
+            # read with the schema they were written with, one at a time
+            for batch in batches:
+                table = pa.Table.from_batches([batch]).cast(schema)
+                for casted in table.to_batches():
+                    self.writer.write_batch(casted)
+        finally:
+            os.remove(written)
+
+    def _open(self):
+        pa = _pa()
+        if self.format == FORMAT_PARQUET:
+            import pyarrow.parquet as pq
+
+            return pq.ParquetWriter(self.path, self.schema)
+        if self.format == FORMAT_ARROW:
+            return pa.ipc.new_file(self.path, self.schema)
+        import pyarrow.csv as pa_csv
+
+        return pa_csv.CSVWriter(self.path, self.schema)
+
+    def _column(self, result: "ResultSet", field) -> List[Any]:
+        return [to_python(v, field.type) for v in result.column_values(field.name)]
+
+    def write(self, result: "ResultSet"):
+        pa = _pa()
+        if self.schema is None:
+            self.schema = self._infer_schema(result)
+            self.writer = self._open()
+        if result.row_size() == 0:
+            return
+        schema = self._widened(result)
+        if schema is not None:
+            self._rewrite(schema)
+        arrays = [
+            pa.array(self._column(result, field), type=field.type)
+            for field in self.schema
+        ]
+        self.writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        self.rows += result.row_size()
+        self.batches += 1
+
+    def write_all(self, results: Iterable["ResultSet"]) -> "ResultWriter":
+        try:
+            for result in results:
+                self.write(result)
+        finally:
+            self.close()
+        return self
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
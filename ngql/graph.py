@@ -0,0 +1,446 @@
+from typing import TYPE_CHECKING, Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from nebula3.common.ttypes import Value
+from nebula3.data.DataObject import Node, PathWrapper, Relationship, ValueWrapper
+
+if TYPE_CHECKING:
+    from nebula3.data.ResultSet import ResultSet
+
+
+# the thrift union is read as is, its getters check the type on every call
+_PLAIN_TYPES = (Value.IVAL, Value.FVAL, Value.BVAL)
+_NULL_TYPES = (Value.NVAL, Value.__EMPTY__)
+
+
+def _primitive(value: Value) -> Any:
+    """
+    Python value of a raw property value, without wrapping the common types
+    """
+    field = value.field
+    if field in _PLAIN_TYPES:
+        return value.value
+    if field == Value.SVAL:
+        return value.value.decode("utf-8", errors="replace")
+    if field in _NULL_TYPES:
+        return None
+    return ValueWrapper(value).cast_primitive()
+
+
+def _column(values: List[Any]) -> Any:
+    """
+    Typed array of the values, i.e. Int64, Float64, boolean or string, with
+    missing ones as NA, values of mixed types are kept as objects
+    """
+    try:
+        return pd.array(values)
+    except (TypeError, ValueError):
+        return pd.array(values, dtype=object)
+
+
+def _dense(values: Dict[int, Any], n: int) -> List[Any]:
+    # vertices get their properties in any order, e.g. after the edges that
+    # created them as placeholders, so the column is laid out by index
+    return [values.get(i) for i in range(n)]
+
+
+class GraphCollector:
+    """
+    Collect the vertices and edges of query results as integer indexes and
+    per property columns, reading the raw values of the rows instead of
+    wrapping each of them. Vertices only known as the end of an edge have no
+    tags until they show up themselves, otherwise the first occurrence wins,
+    edges are de-duplicated by their ends, type and rank.
+    """
+
+    def __init__(self):
+        self.vids: List[Hashable] = []
+        self.index: Dict[Hashable, int] = {}
+        self.tags: List[str] = []
+        # property -> node index -> value
+        self.node_props: Dict[str, Dict[int, Any]] = {}
+        self.src: List[int] = []
+        self.dst: List[int] = []
+        self.edge_types: List[str] = []
+        self.ranks: List[int] = []
+        self.edge_keys: Dict[Tuple[int, int, str, int], int] = {}
+        self.edge_props: Dict[str, Dict[int, Any]] = {}
+        # tag, edge type and property names repeat in every row, decoded once
+        self.names: Dict[bytes, str] = {}
+
+    def _name(self, name: bytes) -> str:
+        decoded = self.names.get(name)
+        if decoded is None:
+            decoded = self.names[name] = name.decode("utf-8")
+        return decoded
+
+    def _node(self, vid: Hashable) -> int:
+        i = self.index.get(vid)
+        if i is None:
+            i = self.index[vid] = len(self.vids)
+            self.vids.append(vid)
+            self.tags.append("")
+        return i
+
+    def _vertex(self, vid: Hashable, tags: List[str]) -> Optional[int]:
+        # index of the vertex if it's seen for the first time, None otherwise
+        i = self._node(vid)
+        if self.tags[i]:
+            return None
+        self.tags[i] = ",".join(tags)
+        return i
+
+    def _edge(
+        self, src: Hashable, dst: Hashable, edge_type: str, rank: int
+    ) -> Optional[int]:
+        # index of the edge if it's seen for the first time, None otherwise
+        index = self.index
+        s = index.get(src)
+        if s is None:
+            s = self._node(src)
+        d = index.get(dst)
+        if d is None:
+            d = self._node(dst)
+        key = (s, d, edge_type, rank)
+        edge_keys = self.edge_keys
+        if key in edge_keys:
+            return None
+        j = edge_keys[key] = len(self.src)
+        self.src.append(s)
+        self.dst.append(d)
+        self.edge_types.append(edge_type)
+        self.ranks.append(rank)
+        return j
+
+    def add_vertex(self, vid: Hashable, tags: List[str], props: Dict[str, Any]):
+        i = self._vertex(vid, tags)
+        if i is None:
+            return
+        for name, value in props.items():
+            self.node_props.setdefault(name, {})[i] = value
+
+    def add_edge(
+        self,
+        src: Hashable,
+        dst: Hashable,
+        edge_type: str,
+        rank: int,
+        props: Dict[str, Any],
+    ):
+        j = self._edge(src, dst, edge_type, rank)
+        if j is None:
+            return
+        edge_props = self.edge_props
+        for name, value in props.items():
+            column = edge_props.get(name)
+            if column is None:
+                column = edge_props[name] = {}
+            column[j] = value
+
+    def _add_raw_props(
+        self, columns: Dict[str, Dict[int, Any]], i: int, props: Optional[Dict]
+    ):
+        # raw property values go into the columns as they are read
+        if not props:
+            return
+        names = self.names
+        for raw_name, value in props.items():
+            name = names.get(raw_name)
+            if name is None:
+                name = self._name(raw_name)
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = {}
+            column[i] = _primitive(value)
+
+    def _add_raw_vertex(self, vertex: Any):
+        raw_tags = vertex.tags or []
+        i = self._vertex(
+            _primitive(vertex.vid), [self._name(tag.name) for tag in raw_tags]
+        )
+        if i is None:
+            return
+        for tag in raw_tags:
+            self._add_raw_props(self.node_props, i, tag.props)
+
+    def _add_raw_step(self, src: Any, dst: Any, name: bytes, rank: int, props: Any):
+        j = self._edge(src, dst, self._name(name), rank)
+        if j is not None:
+            self._add_raw_props(self.edge_props, j, props)
+
+    def _add_raw_edge(self, edge: Any):
+        src, dst = _primitive(edge.src), _primitive(edge.dst)
+        if edge.type < 0:
+            # reversed, as returned by MATCH (a)<-[e]-(b)
+            src, dst = dst, src
+        self._add_raw_step(src, dst, edge.name, edge.ranking, edge.props)
+
+    def add_value(self, value: Value):
+        """
+        Add a raw value of a result row, vertices, edges and paths(also inside
+        lists and sets), other values are skipped
+        """
+        # the field of the thrift union, as getType() returns it
+        value_type = value.field
+        if value_type == Value.VVAL:
+            self._add_raw_vertex(value.value)
+        elif value_type == Value.EVAL:
+            self._add_raw_edge(value.value)
+        elif value_type == Value.PVAL:
+            path = value.value
+            self._add_raw_vertex(path.src)
+            last = _primitive(path.src.vid)
+            for step in path.steps:
+                self._add_raw_vertex(step.dst)
+                vid = _primitive(step.dst.vid)
+                src, dst = (last, vid) if step.type > 0 else (vid, last)
+                self._add_raw_step(src, dst, step.name, step.ranking, step.props)
+                last = vid
+        elif value_type in (Value.LVAL, Value.UVAL):
+            for item in value.value.values:
+                self.add_value(item)
+
+    def add_result(self, result: "ResultSet") -> "GraphCollector":
+        add_value = self.add_value
+        for row in result.rows():
+            for value in row.values:
+                add_value(value)
+        return self
+
+    def add(self, item: Any):
+        """
+        Add a Node, Relationship, PathWrapper, a list of them, or their struct
+        dicts of the arrow result style, as the cells of a DataFrame result
+        """
+        if isinstance(item, Node):
+            props: Dict[str, Any] = {}
+            for tag in item.tags():
+                props.update(
+                    {k: v.cast_primitive() for k, v in item.properties(tag).items()}
+                )
+            self.add_vertex(item.get_id().cast_primitive(), item.tags(), props)
+        elif isinstance(item, Relationship):
+            self.add_edge(
+                item.start_vertex_id().cast_primitive(),
+                item.end_vertex_id().cast_primitive(),
+                item.edge_name(),
+                item.ranking(),
+                {k: v.cast_primitive() for k, v in item.properties().items()},
+            )
+        elif isinstance(item, PathWrapper):
+            for it in item.nodes() + item.relationships():
+                self.add(it)
+        elif isinstance(item, dict):
+            if {"vid", "tags", "properties"} <= item.keys():
+                self.add_vertex(
+                    item["vid"],
+                    list(item["tags"] or []),
+                    dict(item["properties"] or {}),
+                )
+            elif {"src", "dst", "type", "rank"} <= item.keys():
+                self.add_edge(
+                    item["src"],
+                    item["dst"],
+                    item["type"],
+                    item["rank"],
+                    dict(item["properties"] or {}),
+                )
+            elif {"nodes", "relationships"} <= item.keys():
+                for it in list(item["nodes"] or []) + list(item["relationships"] or []):
+                    self.add(it)
+        elif isinstance(item, (list, tuple)):
+            for it in item:
+                self.add(it)
+
+    def add_dataframe(self, df: pd.DataFrame) -> "GraphCollector":
+        for row in df.itertuples(index=False):
+            self.add(row)
+        return self
+
+    def to_graph(self) -> "AnalyticsGraph":
+        n, m = len(self.vids), len(self.src)
+        if all(isinstance(vid, int) and not isinstance(vid, bool) for vid in self.vids):
+            vids = np.array(self.vids, dtype=np.int64)
+        else:
+            vids = np.empty(n, dtype=object)
+            vids[:] = self.vids
+        return AnalyticsGraph(
+            vids=vids,
+            tags=pd.Categorical(self.tags),
+            node_props={
+                name: _column(_dense(values, n))
+                for name, values in self.node_props.items()
+            },
+            src=np.array(self.src, dtype=np.int64),
+            dst=np.array(self.dst, dtype=np.int64),
+            edge_types=pd.Categorical(self.edge_types),
+            ranks=np.array(self.ranks, dtype=np.int64),
+            edge_props={
+                name: _column(_dense(values, m))
+                for name, values in self.edge_props.items()
+            },
+        )
+
+
+class AnalyticsGraph:
+    """
+    Vertices and edges of query results for analytics in the notebook: the
+    vids are mapped to the integers 0..n-1, edges are arrays of those, the
+    adjacency is a scipy CSR matrix, and properties are typed columns. Every
+    array is aligned, i.e. node_props["age"][i] is the age of vids[i].
+    """
+
+    def __init__(
+        self,
+        vids: np.ndarray,
+        tags: pd.Categorical,
+        node_props: Dict[str, Any],
+        src: np.ndarray,
+        dst: np.ndarray,
+        edge_types: pd.Categorical,
+        ranks: np.ndarray,
+        edge_props: Dict[str, Any],
+    ):
+        self.vids = vids
+        self.tags = tags
+        self.node_props = node_props
+        self.src = src
+        self.dst = dst
+        self.edge_types = edge_types
+        self.ranks = ranks
+        self.edge_props = edge_props
+        self._index: Optional[Dict[Hashable, int]] = None
+        self._adjacency: Dict[Optional[str], sp.csr_matrix] = {}
+
+    @classmethod
+    def from_result(cls, result: "ResultSet") -> "AnalyticsGraph":
+        return GraphCollector().add_result(result).to_graph()
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "AnalyticsGraph":
+        return GraphCollector().add_dataframe(df).to_graph()
+
+    @property
+    def number_of_nodes(self) -> int:
+        return len(self.vids)
+
+    @property
+    def number_of_edges(self) -> int:
+        return len(self.src)
+
+    def __repr__(self):
+        return (
+            f"AnalyticsGraph({self.number_of_nodes} nodes, "
+            f"{self.number_of_edges} edges)"
+        )
+
+    def index_of(self, vid: Hashable) -> int:
+        if self._index is None:
+            self._index = {v: i for i, v in enumerate(self.vids.tolist())}
+        return self._index[vid]
+
+    def adjacency(self, weight: Optional[str] = None) -> sp.csr_matrix:
+        """
+        n x n CSR matrix of the directed edges, parallel edges summed up, by
+        their count, or by the numeric edge property weight(missing ones
+        count as 0)
+        """
+        if weight not in self._adjacency:
+            if weight is None:
+                data = np.ones(self.number_of_edges)
+            else:
+                data = np.asarray(
+                    pd.to_numeric(pd.Series(self.edge_props[weight]), errors="coerce")
+                    .fillna(0)
+                    .to_numpy(dtype=float)
+                )
+            n = self.number_of_nodes
+            self._adjacency[weight] = sp.csr_matrix(
+                (data, (self.src, self.dst)), shape=(n, n)
+            )
+        return self._adjacency[weight]
+
+    def nodes(self) -> pd.DataFrame:
+        """
+        DataFrame of the vertices, one row per node index
+        """
+        return pd.DataFrame({"vid": self.vids, "tags": self.tags, **self.node_props})
+
+    def edges(self) -> pd.DataFrame:
+        """
+        DataFrame of the edges, with the node indexes and the vids of the ends
+        """
+        return pd.DataFrame(
+            {
+                "src": self.src,
+                "dst": self.dst,
+                "src_vid": self.vids[self.src],
+                "dst_vid": self.vids[self.dst],
+                "edge_type": self.edge_types,
+                "rank": self.ranks,
+                **self.edge_props,
+            }
+        )
+
+    def pagerank(self, alpha: float = 0.85) -> pd.Series:
+        from ngql.centrality import pagerank
+
+        return pd.Series(pagerank(self.adjacency(), alpha=alpha), index=self.vids)
+
+    def degree(self) -> pd.Series:
+        from ngql.centrality import degree
+
+        return pd.Series(degree(self.adjacency()), index=self.vids)
+
+    def connected_components(self) -> pd.Series:
+        """
+        Weakly connected component of each node
+        """
+        from scipy.sparse.csgraph import connected_components
+
+        _, labels = connected_components(
+            self.adjacency(), directed=True, connection="weak"
+        )
+        return pd.Series(labels, index=self.vids)
+
+    def to_networkx(self, g_nx: Optional[Any] = None):
+        """
+        A networkx MultiDiGraph keyed by vid, with the typed properties, the
+        tags and the edge types as attributes, missing properties left out
+        """
+        import networkx as nx
+
+        g_nx = nx.MultiDiGraph() if g_nx is None else g_nx
+        vids = self.vids.tolist()
+        node_columns = {
+            k: np.asarray(v, dtype=object) for k, v in self.node_props.items()
+        }
+        tags = np.asarray(self.tags, dtype=object)
+        g_nx.add_nodes_from(
+            (vids[i], _attributes(node_columns, i, tags=tags[i]))
+            for i in range(self.number_of_nodes)
+        )
+        edge_columns = {
+            k: np.asarray(v, dtype=object) for k, v in self.edge_props.items()
+        }
+        edge_types = np.asarray(self.edge_types, dtype=object)
+        src, dst, ranks = self.src.tolist(), self.dst.tolist(), self.ranks.tolist()
+        g_nx.add_edges_from(
+            (
+                vids[src[j]],
+                vids[dst[j]],
+                _attributes(edge_columns, j, edge_type=edge_types[j], rank=ranks[j]),
+            )
+            for j in range(self.number_of_edges)
+        )
+        return g_nx
+
+
+def _attributes(columns: Dict[str, np.ndarray], i: int, **extra) -> Dict[str, Any]:
+    attributes = {
+        k: v[i] for k, v in columns.items() if v[i] is not None and v[i] is not pd.NA
+    }
+    attributes.update(extra)
+    return attributes
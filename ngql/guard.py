@@ -0,0 +1,153 @@
+import math
+import re
+from collections import OrderedDict
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Tuple
+
+from ngql.paging import split_statements
+from ngql.plan import plan_records
+from ngql.stats import fingerprint
+
+if TYPE_CHECKING:
+    from nebula3.data.ResultSet import ResultSet
+
+
+GUARD_OFF = "off"
+GUARD_WARN = "warn"
+GUARD_BLOCK = "block"
+
+_READ_HEAD = re.compile(
+    r"^\s*(OPTIONAL\s+MATCH|MATCH|UNWIND|WITH|GO|LOOKUP|FETCH|FIND|GET\s+SUBGRAPH)\b",
+    re.I,
+)
+# GO 6 STEPS, GO 1 TO 6 STEPS, FIND PATH ... UPTO 6 STEPS, GET SUBGRAPH 6 STEPS
+_STEPS = re.compile(r"\b(\d+)\s+STEPS\b", re.I)
+# variable length patterns of MATCH: -[e*]-, -[e*3]-, -[e*1..3]-, -[e*1..]-, -[*..3]-
+_VAR_LENGTH = re.compile(r"-\s*\[[^\]]*?\*\s*(\d*)\s*(\.\.\s*(\d*))?\s*\]")
+_USE = re.compile(r"^\s*USE\s+(`[^`]+`|\w+)\s*$", re.I)
+_STRING_LITERAL = re.compile(r"\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*'")
+_MAP_LITERAL = re.compile(r"\{[^{}]*\}")
+
+FULL_SCAN_OPERATORS = {
+    "ScanVertices",
+    "ScanEdges",
+    "TagIndexFullScan",
+    "EdgeIndexFullScan",
+}
+LIMIT_OPERATORS = {"Limit", "TopN", "Sample"}
+
+
+def is_read_query(query: str) -> bool:
+    return _READ_HEAD.match(query) is not None
+
+
+def read_statements(
+    query: str, space: Optional[str] = None
+) -> List[Tuple[Optional[str], str]]:
+    """
+    The read statements of a (multi-statement) query, with the space each of
+    them runs in, as switched by the USE statements before it
+    """
+    statements = []
+    for statement in split_statements(query):
+        use = _USE.match(statement)
+        if use is not None:
+            space = use.group(1).strip("`")
+        elif is_read_query(statement):
+            statements.append((space, statement))
+    return statements
+
+
+def _masked(query: str) -> str:
+    # blank string literals and property maps, a * or STEPS in them isn't a hop
+    query = _STRING_LITERAL.sub('""', query)
+    masked = _MAP_LITERAL.sub("", query)
+    while masked != query:
+        query, masked = masked, _MAP_LITERAL.sub("", masked)
+    return masked
+
+
+def max_hops(query: str) -> float:
+    """
+    Largest number of hops the query expands, inf for unbounded patterns
+    """
+    query = _masked(query)
+    hops = [float(m.group(1)) for m in _STEPS.finditer(query)]
+    for m in _VAR_LENGTH.finditer(query):
+        lower, has_range, upper = m.group(1), m.group(2), m.group(3)
+        if has_range:
+            hops.append(float(upper) if upper else math.inf)
+        else:
+            hops.append(float(lower) if lower else math.inf)
+    return max(hops, default=0.0)
+
+
+class PlanFacts(NamedTuple):
+    full_scans: Tuple[str, ...]
+    has_limit: bool
+
+
+def plan_facts(result: "ResultSet") -> PlanFacts:
+    """
+    What the guard needs from an EXPLAIN result, small enough to be cached
+    """
+    operators = [record["operator"] for record in plan_records(result)]
+    return PlanFacts(
+        full_scans=tuple(sorted({o for o in operators if o in FULL_SCAN_OPERATORS})),
+        has_limit=any(o in LIMIT_OPERATORS for o in operators),
+    )
+
+
+def assess(query: str, facts: PlanFacts, hops_allowed: int) -> List[str]:
+    """
+    Reasons why the query is expensive, empty if it looks fine
+    """
+    risks = []
+    if facts.full_scans and not facts.has_limit:
+        risks.append(
+            f"full scan ({', '.join(facts.full_scans)}) without LIMIT, "
+            "every vertex or edge of the space is read"
+        )
+    hops = max_hops(query)
+    if hops > hops_allowed:
+        risks.append(
+            f"{'unbounded' if math.isinf(hops) else f'{int(hops)}-hop'} "
+            f"expansion, more than {hops_allowed} hops"
+            + ("" if facts.has_limit else " without LIMIT")
+        )
+    return risks
+
+
+class PlanCache:
+    """
+    LRU cache of the plan facts per space and query fingerprint, thus
+    rerunning a cell with other literals doesn't pay the EXPLAIN round trip.
+    Hops are always taken from the query text, as the fingerprint masks them.
+    """
+
+    def __init__(self, size: int = 256):
+        self.size = size
+        self.facts: "OrderedDict[Tuple[Optional[str], str], PlanFacts]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(space: Optional[str], query: str) -> Tuple[Optional[str], str]:
+        return space, fingerprint(query)
+
+    def get(self, space: Optional[str], query: str) -> Optional[PlanFacts]:
+        key = self.key(space, query)
+        if key not in self.facts:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.facts.move_to_end(key)
+        return self.facts[key]
+
+    def set(self, space: Optional[str], query: str, facts: PlanFacts):
+        self.facts[self.key(space, query)] = facts
+        self.facts.move_to_end(self.key(space, query))
+        while len(self.facts) > self.size:
+            self.facts.popitem(last=False)
+
+    def clear(self):
+        self.facts.clear()
@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, List
+
+from ngql.draw import GraphBuilder
+from ngql.utils import vid_literal
+
+if TYPE_CHECKING:
+    from nebula3.data.ResultSet import ResultSet
+
+# vertices fetched per query, and queries run at once
+HYDRATE_CHUNK_SIZE = 500
+HYDRATE_CONCURRENCY = 4
+
+
+def fetch_query(vids: List[str], int_vid: bool = False) -> str:
+    ids = ", ".join(vid_literal(vid, int_vid) for vid in vids)
+    return f"FETCH PROP ON * {ids} YIELD vertex AS v"
+
+
+def hydrate(
+    builder: GraphBuilder,
+    execute: Callable[[str], "ResultSet"],
+    int_vid: bool = False,
+    chunk_size: int = HYDRATE_CHUNK_SIZE,
+    concurrency: int = HYDRATE_CONCURRENCY,
+) -> int:
+    """
+    Fetch the tags and properties of the placeholder nodes, the ones only
+    known as the end of a relationship, with one FETCH PROP ON * per chunk of
+    them, the chunks running concurrently. Return the number of nodes filled
+    in, vertices that don't exist stay placeholders.
+    """
+    # in the order they showed up in, thus the chunks are deterministic
+    vids = [node_id for node_id in builder.nodes if node_id in builder.placeholders]
+    if not vids:
+        return 0
+    chunks = [vids[i : i + chunk_size] for i in range(0, len(vids), chunk_size)]
+
+    def fetch(chunk: List[str]) -> "ResultSet":
+        result = execute(fetch_query(chunk, int_vid))
+        if result is None or not result.is_succeeded():
+            raise RuntimeError(
+                "Failed to fetch the properties of the nodes"
+                + (f": {result.error_msg()}" if result is not None else "")
+            )
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks)))) as ex:
+        results = list(ex.map(fetch, chunks))
+    # the builder is filled in by this thread only
+    before = len(builder.placeholders)
+    for result in results:
+        for value in result.column_values("v"):
+            builder.add(value.as_node())
+    return before - len(builder.placeholders)
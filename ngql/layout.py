@@ -0,0 +1,446 @@
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+LAYOUT_SPRING = "spring"
+LAYOUT_KAMADA_KAWAI = "kamada_kawai"
+LAYOUT_SPECTRAL = "spectral"
+LAYOUT_SFDP = "sfdp"
+LAYOUTS = (LAYOUT_SPRING, LAYOUT_KAMADA_KAWAI, LAYOUT_SPECTRAL, LAYOUT_SFDP)
+
+# kamada_kawai holds dense n x n distances, larger graphs fall back to sfdp
+KAMADA_KAWAI_MAX_NODES = 1000
+# pairs of nodes per block of the repulsion, bounding its memory
+REPULSION_BLOCK = 1 << 22
+# beyond this many nodes, the repulsion of spring is approximated on a grid
+DENSE_REPULSION_MAX_NODES = 1000
+# the finest grid of the approximated repulsion has about this many nodes per
+# cell, and at most 2^GRID_MAX_DEPTH cells on a side
+GRID_CELL_NODES = 4
+GRID_MAX_DEPTH = 10
+# the coarsest graph of sfdp is laid out as is
+SFDP_COARSEST = 50
+# pixels between nodes in the canvas of vis.js
+NODE_SPACING = 120.0
+
+
+def adjacency(
+    node_ids: Sequence[Hashable], edges: Sequence[Tuple[Hashable, Hashable]]
+) -> sp.csr_matrix:
+    """
+    Symmetric, unweighted adjacency matrix of the nodes, self loops and
+    parallel edges are dropped
+    """
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+    pairs = np.array(
+        [
+            (index[src], index[dst])
+            for src, dst in edges
+            if src in index and dst in index and src != dst
+        ],
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    n = len(node_ids)
+    a = sp.coo_matrix(
+        (np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(n, n)
+    ).tocsr()
+    a = a + a.T
+    a.data[:] = 1.0
+    return a
+
+
+def _squared_distances(rows: np.ndarray, pos: np.ndarray) -> np.ndarray:
+    # |x_i|^2 + |x_j|^2 - 2 x_i.x_j, as matrix products instead of n^2 deltas
+    sq = np.einsum("ij,ij->i", pos, pos)
+    return np.maximum(
+        np.einsum("ij,ij->i", rows, rows)[:, None] + sq[None, :] - 2 * rows @ pos.T,
+        1e-9,
+    )
+
+
+def _repulsion(pos: np.ndarray, k: float) -> np.ndarray:
+    # k^2 / d along each of the n^2 pairs, in blocks of rows:
+    # sum_j f_ij (x_i - x_j) = x_i sum_j f_ij - (f @ x)_i
+    n = len(pos)
+    disp = np.zeros_like(pos)
+    block = max(1, REPULSION_BLOCK // max(n, 1))
+    for start in range(0, n, block):
+        rows = pos[start : start + block]
+        f = k * k / _squared_distances(rows, pos)
+        f[np.arange(len(rows)), np.arange(start, start + len(rows))] = 0.0
+        disp[start : start + block] = rows * f.sum(axis=1)[:, None] - f @ pos
+    return disp
+
+
+def _pair_repulsion(
+    pos: np.ndarray, i: np.ndarray, j: np.ndarray, k: float, disp: np.ndarray
+):
+    # k^2 / d between the nodes i and j, pushing both
+    delta = pos[i] - pos[j]
+    f = k * k / np.maximum(np.einsum("ij,ij->i", delta, delta), 1e-9)
+    for d in range(2):
+        force = delta[:, d] * f
+        disp[:, d] += np.bincount(i, weights=force, minlength=len(pos))
+        disp[:, d] -= np.bincount(j, weights=force, minlength=len(pos))
+
+
+def _grid_repulsion(pos: np.ndarray, k: float) -> np.ndarray:
+    """
+    Repulsion approximated on a hierarchy of grids, like Barnes-Hut on a
+    quadtree but with whole levels computed at once. At each level, the cells
+    not next to a cell, whose parents are next to its parent, push it as one
+    body at their center of mass, and its nodes move along with it. Nodes in
+    the same or adjacent finest cells push each other exactly. O(n log n).
+    """
+    n = len(pos)
+    disp = np.zeros_like(pos)
+    low = pos.min(axis=0)
+    size = max(float((pos.max(axis=0) - low).max()), 1e-9) * (1 + 1e-9)
+    depth = int(
+        np.clip(np.ceil(np.log2(np.sqrt(n / GRID_CELL_NODES))), 2, GRID_MAX_DEPTH)
+    )
+    # cell of each node at the finest level, the coarser ones are halves
+    cells = ((pos - low) / size * (1 << depth)).astype(np.int64)
+    # nodes crowd in the middle of a layout, refine until a node has about
+    # GRID_CELL_NODES others in its cell, as a quadtree would
+    while depth < GRID_MAX_DEPTH:
+        counts = np.bincount(cells[:, 0] << depth | cells[:, 1])
+        if np.dot(counts, counts) <= 2 * GRID_CELL_NODES * n:
+            break
+        depth += 1
+        cells = ((pos - low) / size * (1 << depth)).astype(np.int64)
+    for level in range(2, depth + 1):
+        side = 1 << level
+        cx, cy = (cells >> (depth - level)).T
+        flat = cx * side + cy
+        mass = np.bincount(flat, minlength=side * side).astype(float)
+        center = (
+            np.stack(
+                [
+                    np.bincount(flat, weights=pos[:, d], minlength=side * side)
+                    for d in range(2)
+                ],
+                axis=1,
+            )
+            / np.maximum(mass, 1)[:, None]
+        )
+        occupied = np.flatnonzero(mass)
+        ox, oy = occupied // side, occupied % side
+        px, py = ox >> 1 << 1, oy >> 1 << 1
+        cell_disp = np.zeros((side * side, 2))
+        # children of the cells next to the parent, not next to the cell
+        for dx in range(-2, 4):
+            tx = px + dx
+            for dy in range(-2, 4):
+                ty = py + dy
+                far = ((np.abs(tx - ox) > 1) | (np.abs(ty - oy) > 1)) & (
+                    (tx >= 0) & (tx < side) & (ty >= 0) & (ty < side)
+                )
+                source, target = occupied[far], tx[far] * side + ty[far]
+                delta = center[source] - center[target]
+                f = (
+                    mass[target]
+                    * k
+                    * k
+                    / np.maximum(np.einsum("ij,ij->i", delta, delta), 1e-9)
+                )
+                cell_disp[source] += delta * f[:, None]
+        disp += cell_disp[flat]
+
+    # exactly between the nodes of the same and the adjacent finest cells,
+    # each pair of cells once
+    side = 1 << depth
+    cx, cy = cells.T
+    flat = cx * side + cy
+    order = np.argsort(flat, kind="stable")
+    counts = np.bincount(flat, minlength=side * side)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    nodes = np.arange(n)
+    for dx, dy in ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1)):
+        tx, ty = cx + dx, cy + dy
+        inside = (tx >= 0) & (tx < side) & (ty >= 0) & (ty < side)
+        i = nodes[inside]
+        target = tx[inside] * side + ty[inside]
+        m = counts[target]
+        # in blocks of nodes, bounding the pairs held at once
+        ends = np.cumsum(m)
+        total = int(ends[-1]) if len(ends) else 0
+        bounds = np.searchsorted(
+            ends, np.arange(REPULSION_BLOCK, total, REPULSION_BLOCK)
+        )
+        for chunk in np.split(np.arange(len(i)), bounds):
+            mc = m[chunk]
+            pair_i = np.repeat(i[chunk], mc)
+            offsets = np.arange(mc.sum()) - np.repeat(np.cumsum(mc) - mc, mc)
+            pair_j = order[np.repeat(starts[target[chunk]], mc) + offsets]
+            # within a cell, each pair once
+            keep = pair_i < pair_j if dx == 0 and dy == 0 else slice(None)
+            _pair_repulsion(pos, pair_i[keep], pair_j[keep], k, disp)
+    return disp
+
+
+def _attraction(pos: np.ndarray, a: sp.coo_matrix, k: float) -> np.ndarray:
+    # d^2 / k along the edges, towards the neighbor
+    delta = pos[a.row] - pos[a.col]
+    dist = np.sqrt(np.einsum("ij,ij->i", delta, delta))
+    force = delta * (a.data * dist / k)[:, None]
+    n = len(pos)
+    return -np.stack(
+        [np.bincount(a.row, weights=force[:, d], minlength=n) for d in range(2)],
+        axis=1,
+    )
+
+
+def spring(
+    a: sp.spmatrix,
+    pos: Optional[np.ndarray] = None,
+    iterations: int = 50,
+    temperature: Optional[float] = None,
+    seed: Optional[int] = 42,
+    approximate: Optional[bool] = None,
+) -> np.ndarray:
+    """
+    Fruchterman-Reingold force-directed layout in the unit square, forces of
+    all nodes are computed at once per iteration. The repulsion is exact
+    between all pairs, or approximated on grids with approximate, which is
+    the default beyond DENSE_REPULSION_MAX_NODES nodes.
+    """
+    n = a.shape[0]
+    if pos is None:
+        pos = np.random.default_rng(seed).random((n, 2))
+    if n < 2:
+        return pos
+    a = sp.coo_matrix(a)
+    k = np.sqrt(1.0 / n)
+    t = 0.1 if temperature is None else temperature
+    cooling = t / (iterations + 1)
+    if approximate is None:
+        approximate = n > DENSE_REPULSION_MAX_NODES
+    repulsion = _grid_repulsion if approximate else _repulsion
+    for _ in range(iterations):
+        disp = repulsion(pos, k) + _attraction(pos, a, k)
+        length = np.maximum(np.sqrt(np.einsum("ij,ij->i", disp, disp)), 1e-9)
+        pos = pos + disp * (np.minimum(length, t) / length)[:, None]
+        t -= cooling
+    return pos
+
+
+def spectral(a: sp.spmatrix, seed: Optional[int] = 42) -> np.ndarray:
+    """
+    The eigenvectors of the two smallest non-zero eigenvalues of the graph
+    Laplacian as coordinates
+    """
+    n = a.shape[0]
+    if n <= 2:
+        return spring(a, seed=seed)
+    laplacian = sp.diags(np.asarray(a.sum(axis=1)).ravel()) - a
+    if n < 500:
+        _, vectors = np.linalg.eigh(laplacian.toarray())
+    else:
+        from scipy.sparse.linalg import eigsh
+
+        v0 = np.random.default_rng(seed).random(n)
+        _, vectors = eigsh(
+            laplacian.astype(float),
+            k=3,
+            which="SM",
+            ncv=max(7, int(np.sqrt(n))),
+            tol=1e-4,
+            v0=v0,
+        )
+    return vectors[:, 1:3]
+
+
+def kamada_kawai(
+    a: sp.spmatrix, iterations: int = 200, seed: Optional[int] = 42
+) -> np.ndarray:
+    """
+    Minimize the Kamada-Kawai energy, stress of the distances in the layout
+    against the shortest paths, by stress majorization
+    """
+    from scipy.sparse.csgraph import shortest_path
+
+    n = a.shape[0]
+    if n < 3:
+        return spring(a, seed=seed)
+    # of a connected graph, thus all distances are finite
+    d = shortest_path(a, method="D", unweighted=True, directed=False)
+    w = np.zeros_like(d)
+    off = d > 0
+    w[off] = d[off] ** -2
+    w_sum = w.sum(axis=1)
+
+    rng = np.random.default_rng(seed)
+    pos = spectral(a, seed=seed)
+    pos = pos / max(np.abs(pos).max(), 1e-9) * np.sqrt(n)
+    # apart from each other, the update is undefined for nodes at one place
+    pos = pos + rng.normal(scale=0.1, size=pos.shape)
+    for _ in range(iterations):
+        dist = np.sqrt(_squared_distances(pos, pos))
+        # x_i = sum_j w_ij (x_j + d_ij (x_i - x_j) / |x_i - x_j|) / sum_j w_ij
+        f = w * d / dist
+        new = (w @ pos + pos * f.sum(axis=1)[:, None] - f @ pos) / w_sum[:, None]
+        moved = np.abs(new - pos).max()
+        pos = new
+        if moved < 1e-3:
+            break
+    return pos
+
+
+def _coarsen(a: sp.csr_matrix, rng: np.random.Generator) -> np.ndarray:
+    """
+    Match each node to an unmatched neighbor, return the coarse node of each
+    node
+    """
+    n = a.shape[0]
+    coarse = np.full(n, -1, dtype=np.int64)
+    m = 0
+    indptr, indices = a.indptr, a.indices
+    for i in rng.permutation(n):
+        if coarse[i] >= 0:
+            continue
+        coarse[i] = m
+        for j in indices[indptr[i] : indptr[i + 1]]:
+            if coarse[j] < 0:
+                coarse[j] = m
+                break
+        m += 1
+    return coarse
+
+
+def sfdp(a: sp.spmatrix, seed: Optional[int] = 42) -> np.ndarray:
+    """
+    Multilevel force-directed layout like sfdp: the graph is coarsened by
+    matching neighbors until it's small, the coarsest one is laid out, then
+    each finer level starts from the positions of its coarse nodes, needing
+    only a few iterations of refinement
+    """
+    rng = np.random.default_rng(seed)
+    levels: List[Tuple[sp.csr_matrix, np.ndarray]] = []
+    a = sp.csr_matrix(a)
+    while a.shape[0] > SFDP_COARSEST:
+        coarse = _coarsen(a, rng)
+        m = int(coarse.max()) + 1
+        # stop when matching doesn't shrink the graph much, i.e. a star
+        if m > 0.9 * a.shape[0]:
+            break
+        p = sp.csr_matrix(
+            (np.ones(a.shape[0]), (np.arange(a.shape[0]), coarse)),
+            shape=(a.shape[0], m),
+        )
+        levels.append((a, coarse))
+        a = sp.csr_matrix(p.T @ a @ p)
+        a.setdiag(0)
+        a.eliminate_zeros()
+        a.data[:] = 1.0
+
+    # the coarsest graph is small enough for the exact repulsion, finer ones
+    # beyond DENSE_REPULSION_MAX_NODES nodes have it approximated
+    pos = spring(a, iterations=100, seed=seed, approximate=False)
+    for fine, coarse in reversed(levels):
+        k = np.sqrt(1.0 / fine.shape[0])
+        pos = pos[coarse] + rng.normal(scale=k / 10, size=(fine.shape[0], 2))
+        pos = spring(fine, pos=pos, iterations=20, temperature=k, seed=seed)
+    return pos
+
+
+def _component_layout(a: sp.csr_matrix, method: str, seed: Optional[int]):
+    """
+    Layout of a connected graph, scaled to a median edge length of 1
+    """
+    n = a.shape[0]
+    if n == 1:
+        return np.zeros((1, 2))
+    if n == 2:
+        return np.array([[0.0, 0.0], [1.0, 0.0]])
+    if method == LAYOUT_KAMADA_KAWAI and n > KAMADA_KAWAI_MAX_NODES:
+        method = LAYOUT_SFDP
+    if method == LAYOUT_SPRING:
+        pos = spring(a, seed=seed)
+    elif method == LAYOUT_KAMADA_KAWAI:
+        pos = kamada_kawai(a, seed=seed)
+    elif method == LAYOUT_SPECTRAL:
+        pos = spectral(a, seed=seed)
+    else:
+        pos = sfdp(a, seed=seed)
+    coo = a.tocoo()
+    length = np.median(np.linalg.norm(pos[coo.row] - pos[coo.col], axis=1))
+    return (pos - pos.min(axis=0)) / (length if length > 0 else 1.0)
+
+
+def _pack(sizes: List[np.ndarray], gap: float = 1.0) -> List[np.ndarray]:
+    """
+    Offsets of boxes placed in rows, left to right, in the given order, the
+    rows about as wide as the square of their total area
+    """
+    area = sum((w + gap) * (h + gap) for w, h in sizes)
+    width = max(np.sqrt(area), max(w for w, _ in sizes))
+    offsets, x, y, row_height = [], 0.0, 0.0, 0.0
+    for w, h in sizes:
+        if x > 0 and x + w > width:
+            x, y, row_height = 0.0, y + row_height + gap, 0.0
+        offsets.append(np.array([x, y]))
+        x += w + gap
+        row_height = max(row_height, h)
+    return offsets
+
+
+def layout(
+    node_ids: Sequence[Hashable],
+    edges: Sequence[Tuple[Hashable, Hashable]],
+    method: str = LAYOUT_SPRING,
+    seed: Optional[int] = 42,
+) -> Dict[Hashable, Tuple[float, float]]:
+    """
+    Coordinates of the nodes in pixels, centered at the origin. Connected
+    components are laid out one by one, then packed side by side, the largest
+    first, thus isolated nodes don't drift away or squeeze the rest.
+    """
+    from scipy.sparse.csgraph import connected_components
+
+    if method not in LAYOUTS:
+        raise ValueError(
+            f"Unknown layout {method}, should be one of {', '.join(LAYOUTS)}"
+        )
+    n = len(node_ids)
+    if n == 0:
+        return {}
+    a = adjacency(node_ids, edges)
+    count, labels = connected_components(a, directed=False)
+    members = np.argsort(labels, kind="stable")
+    bounds = np.searchsorted(labels[members], np.arange(count + 1))
+    components = sorted(
+        (members[bounds[i] : bounds[i + 1]] for i in range(count)),
+        key=len,
+        reverse=True,
+    )
+    layouts = [
+        _component_layout(a[nodes][:, nodes], method, seed) for nodes in components
+    ]
+    offsets = _pack([pos.max(axis=0) for pos in layouts])
+
+    pos = np.zeros((n, 2))
+    for nodes, component_pos, offset in zip(components, layouts, offsets):
+        pos[nodes] = component_pos + offset
+    pos = (pos - pos.max(axis=0) / 2) * NODE_SPACING
+    return {node_id: (float(x), float(y)) for node_id, (x, y) in zip(node_ids, pos)}
+
+
+def apply_layout(g, method: str, seed: Optional[int] = 42):
+    """
+    Pin the nodes of a pyvis Network to precomputed positions and turn off
+    the physics, thus the browser doesn't simulate the layout on every open
+    """
+    positions = layout(
+        [node["id"] for node in g.nodes],
+        [(edge["from"], edge["to"]) for edge in g.edges],
+        method,
+        seed,
+    )
+    for node in g.nodes:
+        node["x"], node["y"] = positions[node["id"]]
+    g.toggle_physics(False)
+    # dynamic smooth edges need the physics simulation
+    g.set_edge_smooth("continuous")
+    return g
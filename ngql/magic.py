@@ -1,95 +1,151 @@
 import logging
+import os
+import re
+import time
 
-from typing import Any, Dict, Optional, List
+from typing import TYPE_CHECKING, Any, Dict, Optional, List, Tuple
 
 from IPython.core.magic import (
     Magics,
     magics_class,
     line_cell_magic,
+    line_magic,
     needs_local_scope,
 )
 from IPython.core.magic_arguments import argument, magic_arguments, parse_argstring
 
-
-import networkx as nx
-
-
-from jinja2 import Template, Environment, meta
 from traitlets.config.configurable import Configurable
-from traitlets import Bool, Int, Unicode
+from traitlets import Bool, Float, Int, Unicode
 
-from nebula3.data.DataObject import Node, Relationship, PathWrapper
-from nebula3.gclient.net import ConnectionPool as NebulaConnectionPool
-from nebula3.Config import Config as NebulaConfig
-from nebula3.Config import SSL_config
-from nebula3.data.ResultSet import ResultSet
+# Heavy dependencies(networkx, jinja2, nebula3, pandas, pyvis, pydantic and
+# those of ng_load) are imported when the magic that needs them first runs,
+# to keep `%load_ext ngql` fast, see benchmarks/startup.py
+from ngql.guard import GUARD_BLOCK, GUARD_OFF, PlanCache
+from ngql.paging import PagedResult
+from ngql.plan import plan_dataframe, plan_query
+from ngql.schema import SchemaCatalog, ddl_targets
+from ngql.stats import QueryHistory
+from ngql.transport import TransportCache, host_statuses, listening
+from ngql.utils import FancyPrinter, get_color, truncate
 
-from ngql.ng_load import ng_load
-from ngql.types import LoadDataArgsModel
-from ngql.utils import FancyPrinter
+if TYPE_CHECKING:
+    from nebula3.data.ResultSet import ResultSet
 
 
 fancy_print = FancyPrinter()
 
 
-rel_query_sample_edge = Template(
-    """
-MATCH ()-[e:`{{ edge_type }}`]->()
-RETURN [src(e), dst(e)] AS sample_edge LIMIT 10000
-"""
-)
-
-
-rel_query_edge_type = Template(
-    """
-MATCH (m)-[:`{{ edge_type }}`]->(n)
-  WHERE id(m) == "{{ src_id }}" AND id(n) == "{{ dst_id }}"
-RETURN tags(m)[0] AS src_tag, tags(n)[0] AS dst_tag
-"""
-)
-
-
 CONNECTION_POOL_INIT_FAILURE = -2  # Failure occurred during connection_pool.init
 CONNECTION_POOL_NONE = -1  # self.connection_pool was never initiated
 CONNECTION_POOL_EXISTED = 0  # self.connection_pool existed & no new created
 CONNECTION_POOL_CREATED = 1  # self.connection_pool newly created/recreated
 
+# seconds between health checks on graphd when connected to several of them
+DEFAULT_HEALTH_CHECK_INTERVAL = 10
+
 STYLE_PANDAS = "pandas"
 STYLE_RAW = "raw"
-
-# COLORS = ["#E2DBBE", "#D5D6AA", "#9DBBAE", "#769FB6", "#188FA7"]
-# solarized dark
-COLORS = [
-    "#93A1A1",
-    "#B58900",
-    "#CB4B16",
-    "#DC322F",
-    "#D33682",
-    "#6C71C4",
-    "#268BD2",
-    "#2AA198",
-    "#859900",
-]
+STYLE_STREAM = "stream"
+STYLE_ARROW = "arrow"
 
 ESCAPE_ARROW_STRING = "__ar_row__"
 
+# Options of %ngql that are not part of the query itself, with their nargs
+NGQL_QUERY_OPTIONS = {
+    "--profile": 0,
+    "--status": 0,
+    "--stream": 0,
+    "--page-size": 1,
+    "--preview": 1,
+    "--output": 1,
+    "--timeout": 1,
+    "--force": 0,
+}
+DRAW_OPTIONS = {
+    "--max-nodes": 1,
+    "--max-edges": 1,
+    "--reduce": 1,
+    "--layout": 1,
+    "--centrality": 1,
+    "--hydrate": 0,
+}
+BENCH_QUERY_OPTIONS = {
+    "--iterations": 1,
+    "-n": 1,
+    "--concurrency": 1,
+    "-c": 1,
+    "--warmup": 1,
+    "-w": 1,
+    "--params": 1,
+}
+
+
+def schema_property(prop: Dict[str, Any]) -> tuple:
+    """
+    A property of the schema as (name, type), or with its comment if any
+    """
+    if prop["comment"] is None:
+        return prop["name"], prop["type"]
+    return prop["name"], prop["type"], prop["comment"]
+
 
-def truncate(string: str, length: int = 10) -> str:
-    if len(string) > length:
-        return string[:length] + ".."
-    else:
-        return string
+def split_options(line: str, options: Dict[str, int]) -> Tuple[str, str]:
+    """
+    Split a raw line into the extension options leading it and the rest, i.e.
+    the query, which is left untouched even if it looks like options. options
+    maps the flag to the number of values it takes, i.e. {"--profile": 0}
+    """
+    position = 0
+    while True:
+        token = re.match(r"\s*(\S+)", line[position:])
+        if token is None:
+            break
+        flag = token.group(1)
+        if flag in options:
+            nargs = options[flag]
+        elif "=" in flag and flag.split("=", 1)[0] in options:
+            nargs = 0
+        else:
+            break
+        values = re.match(r"(?:\s+\S+){%d}" % nargs, line[position + token.end() :])
+        if values is None:
+            # a flag missing its values is left for argparse to complain about
+            position = len(line)
+            break
+        position += token.end() + values.end()
+    return line[:position].strip(), line[position:].strip()
 
 
-def get_color(input_str):
-    hash_val = 0
-    for char in input_str:
-        hash_val = (hash_val * 31 + ord(char)) & 0xFFFFFFFF
-    return COLORS[hash_val % len(COLORS)]
+def strip_options(line: str, options: Dict[str, int]) -> str:
+    """
+    Remove the extension options leading a raw query line
+    """
+    return split_options(line, options)[1]
 
 
-def is_human_readable(field):
-    return any(c.isalpha() for c in field) and len(field) < 20
+def parse_addresses(address: str, port: Optional[int]) -> List[Tuple[str, int]]:
+    """
+    Parse comma-separated graphd addresses, each could come with its own port,
+    i.e. "h1:9669,h2:9669" or "h1,h2" with the port given separately
+    """
+    addresses = []
+    for item in address.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        host, sep, host_port = item.rpartition(":")
+        if sep and host_port.isdigit():
+            addresses.append((host, int(host_port)))
+        elif port is not None:
+            addresses.append((item, port))
+        else:
+            raise ValueError(
+                f"Missing port of address '{item}', either specify it as "
+                "host:port or with --port"
+            )
+    if not addresses:
+        raise ValueError(f"No valid address found in '{address}'")
+    return addresses
 
 
 @magics_class
@@ -105,9 +161,100 @@ class IPythonNGQL(Magics, Configurable):
         STYLE_PANDAS,
         config=True,
         allow_none=True,
-        help="Accepted values in ('pandas', 'raw'):"
+        help="Accepted values in ('pandas', 'raw', 'stream', 'arrow'):"
         " pandas refers to pandas DataFrame,"
-        " raw refers to raw thrift data type comes with nebula-python.",
+        " raw refers to raw thrift data type comes with nebula-python,"
+        " stream refers to an iterator of pandas DataFrame, one per page,"
+        " arrow refers to pandas DataFrame of Arrow-backed dtypes.",
+    )
+    ngql_page_size = Int(
+        10000,
+        config=True,
+        help="Number of rows per page when results are streamed",
+    )
+    min_connection_pool_size = Int(
+        None,
+        config=True,
+        allow_none=True,
+        help="Connections opened when connecting, spread over the graphd hosts,"
+        " one per host by default",
+    )
+    health_check_interval = Int(
+        0,
+        config=True,
+        help="Interval in seconds of the background health check on graphd hosts,"
+        " unhealthy ones are taken out of rotation, 0 for every"
+        f" {DEFAULT_HEALTH_CHECK_INTERVAL}s with several hosts only, -1 to disable",
+    )
+    ngql_history_size = Int(
+        1000,
+        config=True,
+        help="Number of latest queries kept in the latency history of %ng_stats",
+    )
+    ngql_timeout = Float(
+        None,
+        config=True,
+        allow_none=True,
+        help="Seconds before a query is killed on graphd, None to wait forever",
+    )
+    ngql_guard = Unicode(
+        GUARD_OFF,
+        config=True,
+        help="Accepted values in ('off', 'warn', 'block'):"
+        " EXPLAIN read queries first, warn about or block full scans without LIMIT"
+        " and expansions of too many hops, unless --force is given",
+    )
+    ngql_guard_max_hops = Int(
+        3,
+        config=True,
+        help="Most hops a query may expand before the guard steps in",
+    )
+    ngql_schema_ttl = Int(
+        300,
+        config=True,
+        help="Seconds the schema of a space is cached for by %ng_load, %ng_draw_schema"
+        " and %ng_schema, DDL run with %ngql refreshes it, 0 to disable, -1 forever",
+    )
+    ngql_schema_persist = Bool(
+        False,
+        config=True,
+        help="Persist the cached schema under the IPython profile dir, thus new"
+        " kernels start with it",
+    )
+    ngql_stats_max_age = Int(
+        86400,
+        config=True,
+        help="Seconds before the counts of the last STATS job of a space are stale,"
+        " and %ng_draw_schema --stats submits a new job, -1 never",
+    )
+    ngql_draw_layout = Unicode(
+        None,
+        config=True,
+        allow_none=True,
+        help="Accepted values in ('spring', 'kamada_kawai', 'spectral', 'sfdp'):"
+        " layout computed before rendering, with the physics turned off,"
+        " None to let the browser simulate it",
+    )
+    ngql_draw_centrality = Unicode(
+        "pagerank",
+        config=True,
+        help="Accepted values in ('pagerank', 'degree', 'betweenness', 'none'):"
+        " centrality the nodes of drawings are sized by",
+    )
+    ngql_draw_render = Unicode(
+        "inline",
+        config=True,
+        help="Accepted values in ('inline', 'compact', 'compressed'):"
+        " inline embeds vis.js into each drawing, compact refers to one copy of it"
+        " in the working directory with the graph as compact JSON, compressed"
+        " gzips the graph as well",
+    )
+    ngql_draw_keep = Int(
+        0,
+        config=True,
+        help="Drawings of the latest cells of this session kept in the working"
+        " directory, older ones written by this session are removed, thus their"
+        " outputs are blank when the notebook is reopened, 0 to keep them all",
     )
 
     def __init__(self, shell):
@@ -115,20 +262,98 @@ class IPythonNGQL(Magics, Configurable):
 
         self.shell.configurables.append(self)
         self.connection_pool = None
+        # graphd hosts connected to, the schema is cached per cluster
+        self.cluster = None
         self.space = None
         self.connection_info = None
         self.credential = None
+        self.timeout = None
+        self.plan_cache = PlanCache()
+        self.plan_cache_hit = False
+        # created on the first drawing, as it imports scipy
+        self.centrality_cache = None
+        # drawings written by this session, oldest first, for ngql_draw_keep
+        self.drawings: List[str] = []
+        self.history = QueryHistory(self.ngql_history_size)
+        profile_dir = getattr(self.shell, "profile_dir", None)
+        self.transport_cache = TransportCache(
+            os.path.join(profile_dir.location, "ngql_transport.json")
+            if profile_dir is not None
+            else None
+        )
+        self.schema_cache_path = (
+            os.path.join(profile_dir.location, "ngql_schema.json")
+            if profile_dir is not None
+            else None
+        )
+        self.schema_catalog = SchemaCatalog(ttl=self.ngql_schema_ttl)
 
     @needs_local_scope
     @line_cell_magic
     @magic_arguments()
     @argument("line", default="", nargs="*", type=str, help="ngql line")
-    @argument("-addr", "--address", type=str, help="IP address")
+    @argument(
+        "-addr",
+        "--address",
+        type=str,
+        help="IP address, or comma-separated host:port of multiple graphd",
+    )
     @argument("-P", "--port", type=int, help="Port number")
     @argument("-u", "--user", type=str, help="Username")
     @argument("-p", "--password", type=str, help="Password")
     @argument("-f", "--file", type=str, help="Run a NGQL file from a path")  # TBD
     @argument("-c", "--close", type=str, help="Close the connection")  # TBD
+    @argument(
+        "--profile",
+        action="store_true",
+        help="Run the query under PROFILE and return the execution plan",
+    )
+    @argument(
+        "--status", action="store_true", help="Show the status of the graphd hosts"
+    )
+    @argument(
+        "--tls",
+        dest="tls",
+        action="store_true",
+        default=None,
+        help="Connect over TLS, without trying plain text first",
+    )
+    @argument(
+        "--no-tls",
+        dest="tls",
+        action="store_false",
+        default=None,
+        help="Connect in plain text, without falling back to TLS",
+    )
+    @argument(
+        "--stream",
+        action="store_true",
+        help="Run the query page by page, return an iterator of DataFrame",
+    )
+    @argument("--page-size", type=int, default=None, help="Rows per page")
+    @argument(
+        "--preview",
+        type=int,
+        default=None,
+        help="Only fetch the first n rows and count the total rows",
+    )
+    @argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Write the result page by page into a .parquet, .arrow or .csv file",
+    )
+    @argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Seconds before the query is killed on graphd, overrides ngql_timeout",
+    )
+    @argument(
+        "--force",
+        action="store_true",
+        help="Run the query even if the guard considers it expensive",
+    )
     def ngql(self, line, cell=None, local_ns={}):
         """Magic that works both as %ngql and as %%ngql"""
         if line == "help":
@@ -147,22 +372,199 @@ class IPythonNGQL(Magics, Configurable):
         if connection_state < 0:
             fancy_print("[ERROR] Connection is not ready", color="pink")
             return f"Connection State: { connection_state }"
+        if args.status:
+            return self._hosts_status()
         if connection_state == CONNECTION_POOL_CREATED:
             fancy_print("[OK] Connection Pool Created", color="green")
             if not cell:
                 return self._stylized(self._show_spaces())
             else:
                 # When connection info in first line and with nGQL lines followed
-                return self._stylized(self._execute(cell))
+                return self._run_query(cell, args)
         if connection_state == CONNECTION_POOL_EXISTED:
             # Restore "->" in the query before executing it
             query = (
-                line.replace(ESCAPE_ARROW_STRING, "->") + "\n" + (cell if cell else "")
+                strip_options(line, NGQL_QUERY_OPTIONS).replace(
+                    ESCAPE_ARROW_STRING, "->"
+                )
+                + "\n"
+                + (cell if cell else "")
             )
-            return self._stylized(self._execute(query))
+            return self._run_query(query, args)
         else:  # We shouldn't reach here
             return f"Nothing triggerred, Connection State: { connection_state }"
 
+    def _run_query(self, query: str, args: Any):
+        # the timeout applies to every statement run for the query, streamed
+        # pages capture it in _paged
+        self.timeout = args.timeout
+        try:
+            return self._run_query_with_options(query, args)
+        finally:
+            self.timeout = None
+            targets = ddl_targets(query)
+            if targets:
+                # the space in use after the query, i.e. USE s; CREATE TAG t()
+                self.schema_catalog.invalidate(
+                    self.cluster, None if "SPACE" in targets else self.space
+                )
+
+    def _run_query_with_options(self, query: str, args: Any):
+        if not args.force and not self._guard(query):
+            return
+        if args.profile:
+            return self._profile(query)
+        if args.output:
+            return self._export(query, args.output, args.page_size)
+        if args.preview is not None:
+            return self._preview(query, args.preview)
+        if args.stream or self.ngql_result_style == STYLE_STREAM:
+            paged_result = self._paged(query, args.page_size)
+            try:
+                # fail now rather than when the stream is iterated
+                paged_result.check()
+                return paged_result
+            except ValueError as e:
+                if args.stream:
+                    raise
+                if paged_result.pageable:
+                    fancy_print(f"[WARN] Not streamed: {e}", color="pink")
+        return self._stylized(self._execute(query))
+
+    def _guard(self, query: str) -> bool:
+        """
+        EXPLAIN each read statement of the query and check its plan for
+        expensive patterns, the plans are cached per query fingerprint, return
+        whether the query may run
+        """
+        from ngql.guard import assess, plan_facts, read_statements
+
+        if self.ngql_guard == GUARD_OFF:
+            return True
+        statements = read_statements(query, self.space)
+        if not statements:
+            return True
+        risks = []
+        self.plan_cache_hit = True
+        session, session_space = None, None
+        try:
+            for space, statement in statements:
+                facts = self.plan_cache.get(space, statement)
+                if facts is None:
+                    self.plan_cache_hit = False
+                    try:
+                        if session is None:
+                            session = self._get_session()
+                        if space is not None and space != session_space:
+                            session.execute(f"USE `{space}`")
+                            session_space = space
+                        result = session.execute(plan_query(statement, "EXPLAIN"))
+                    except Exception:
+                        # the guard must not stand in the way when EXPLAIN fails
+                        continue
+                    if not result.is_succeeded():
+                        continue
+                    facts = plan_facts(result)
+                    self.plan_cache.set(space, statement, facts)
+                statement_risks = assess(statement, facts, self.ngql_guard_max_hops)
+                if len(statements) > 1:
+                    statement_risks = [
+                        f"{risk}, in: {truncate(statement, 60)}"
+                        for risk in statement_risks
+                    ]
+                risks.extend(statement_risks)
+        finally:
+            if session is not None:
+                session.release()
+
+        if not risks:
+            return True
+        reasons = "\n".join(f"  - {risk}" for risk in risks)
+        if self.ngql_guard == GUARD_BLOCK:
+            fancy_print(
+                f"[BLOCKED] The query looks expensive:\n{reasons}\n"
+                "Narrow it down, i.e. with a LIMIT, or run it anyway with --force",
+                color="red",
+            )
+            return False
+        fancy_print(f"[WARN] The query looks expensive:\n{reasons}", color="pink")
+        return True
+
+    def _paged(self, query: str, page_size: Optional[int] = None) -> PagedResult:
+        # pages of a stream are fetched lazily, after _run_query has returned
+        timeout = self.timeout
+
+        return PagedResult(
+            lambda statement: self._execute(statement, timeout),
+            lambda result: self._stylized(result, style=STYLE_PANDAS),
+            query,
+            page_size or self.ngql_page_size,
+        )
+
+    def _export(self, query: str, path: str, page_size: Optional[int] = None):
+        """
+        Write the result into a file in record batches as pages arrive
+        """
+        from ngql.export import ResultWriter
+
+        writer = ResultWriter(path)
+        paged_result = self._paged(query, page_size)
+        if paged_result.pageable:
+            writer.write_all(paged_result.pages())
+        else:
+            result = self._execute(query)
+            if not result.is_succeeded():
+                return self._stylized(result)
+            writer.write_all([result])
+        fancy_print(
+            f"[OK] Wrote {writer.rows} rows in {writer.batches} batches to {path}",
+            color="green",
+        )
+
+    def _preview(self, query: str, n: int):
+        """
+        Show the first n rows and the total count without fetching all rows
+        """
+        head, total = self._paged(query, n).preview(n)
+        fancy_print(
+            f"[PREVIEW] {len(head)} of {total if total is not None else 'unknown'} rows",
+            color="light_blue",
+        )
+        head.attrs["total"] = total
+        return head
+
+    def _profile(self, query: str):
+        """
+        Run the query under PROFILE, return the execution plan as a DataFrame
+        and print where the time was spent: graphd, network or conversion
+        """
+        start = time.perf_counter()
+        result = self._execute(plan_query(query, "PROFILE"))
+        round_trip_us = int((time.perf_counter() - start) * 1_000_000)
+        if not result.is_succeeded():
+            return self._stylized(result)
+
+        start = time.perf_counter()
+        self._stylized(result)
+        conversion_us = int((time.perf_counter() - start) * 1_000_000)
+
+        latency = {
+            "server_latency_us": result.latency(),
+            "client_latency_us": result.whole_latency(),
+            "round_trip_us": round_trip_us,
+            "conversion_us": conversion_us,
+        }
+        fancy_print(
+            f"[PROFILE] graphd: {result.latency() / 1000:.2f} ms, "
+            f"client(incl. network): {result.whole_latency() / 1000:.2f} ms, "
+            f"round trip: {round_trip_us / 1000:.2f} ms, "
+            f"conversion: {conversion_us / 1000:.2f} ms",
+            color="light_blue",
+        )
+        plan_df = plan_dataframe(result)
+        plan_df.attrs["latency"] = latency
+        return plan_df
+
     def _init_connection_pool(self, args: Optional[Any] = None):
         if args is None:
             return (
@@ -173,32 +575,75 @@ class IPythonNGQL(Magics, Configurable):
 
         connection_info = (args.address, args.port, args.user, args.password)
         if any(connection_info):
-            if not all(connection_info):
+            if not all((args.address, args.user, args.password)):
                 raise ValueError(
-                    "One or more arguments missing: address, port, user, "
-                    "password should None or all be provided."
+                    "One or more arguments missing: address, user, password "
+                    "should be None or all be provided, port is optional when "
+                    "each address comes as host:port."
                 )
+            from nebula3.gclient.net import ConnectionPool as NebulaConnectionPool
+            from nebula3.Config import Config as NebulaConfig
+            from nebula3.Config import SSL_config
+
             # all connection information ready
-            connection_pool = NebulaConnectionPool()
+            addresses = parse_addresses(args.address, args.port)
             config = NebulaConfig()
             if self.max_connection_pool_size:
                 config.max_connection_pool_size = self.max_connection_pool_size
+            # Connections opened by init, spread over the healthy hosts
+            config.min_connection_pool_size = max(
+                self.min_connection_pool_size or 0, len(addresses)
+            )
+            # Background health check takes unhealthy graphd out of rotation,
+            # there is nothing to rotate with a single one
+            interval = self.health_check_interval
+            if interval == 0:
+                interval = DEFAULT_HEALTH_CHECK_INTERVAL if len(addresses) > 1 else -1
+            config.interval_check = interval
 
             self.credential = args.user, args.password
-            try:
-                connect_init_result = connection_pool.init(
-                    [(args.address, args.port)], config
-                )
-            except RuntimeError:
-                # When GraphD is over TLS
-                fancy_print(
-                    "[WARN] Got RuntimeError, trying to connect assuming NebulaGraph is over TLS",
-                    color="pink",
-                )
-                ssl_config = SSL_config()
-                connect_init_result = connection_pool.init(
-                    [(args.address, args.port)], config, ssl_config
-                )
+            # Try the transport that worked last time first, unless specified
+            if args.tls is not None:
+                transports = [args.tls]
+            else:
+                cached_tls = self.transport_cache.get(addresses)
+                transports = [False, True] if not cached_tls else [True, False]
+            for attempt, use_tls in enumerate(transports):
+                connection_pool = NebulaConnectionPool()
+                try:
+                    connect_init_result = connection_pool.init(
+                        addresses, config, SSL_config() if use_tls else None
+                    )
+                    break
+                except RuntimeError as e:
+                    statuses = host_statuses(connection_pool) or {}
+                    connection_pool.close()
+                    if any(statuses.values()):
+                        # the transport is right, some of the hosts are down
+                        unhealthy = [
+                            f"{host}:{port}"
+                            for (host, port), ok in statuses.items()
+                            if not ok
+                        ]
+                        raise RuntimeError(
+                            f"Unhealthy graphd host(s): {', '.join(unhealthy)}, "
+                            "bring them up or leave them out of --address"
+                        ) from e
+                    if not any(listening(address) for address in addresses):
+                        raise RuntimeError(
+                            "No graphd host is reachable: "
+                            + ", ".join(f"{host}:{port}" for host, port in addresses)
+                        ) from e
+                    # hosts are up but the handshake failed, the other
+                    # transport may be the one they speak
+                    if attempt == len(transports) - 1:
+                        raise
+                    fancy_print(
+                        "[WARN] Handshake failed, trying to connect assuming NebulaGraph is "
+                        + ("over TLS" if transports[attempt + 1] else "not over TLS"),
+                        color="pink",
+                    )
+            if use_tls:
                 fancy_print(
                     f"[OK] Connection State: { connect_init_result }, TLS: True",
                     color="blue",
@@ -206,7 +651,14 @@ class IPythonNGQL(Magics, Configurable):
             if not connect_init_result:
                 return CONNECTION_POOL_INIT_FAILURE
             else:
+                if self.connection_pool is not None:
+                    # stop the health check of the replaced pool
+                    self.connection_pool.close()
                 self.connection_pool = connection_pool
+                self.cluster = ",".join(f"{host}:{port}" for host, port in addresses)
+                self.transport_cache.set(addresses, use_tls)
+                if len(addresses) > 1:
+                    fancy_print(self._hosts_status().to_string(), color="blue")
                 return CONNECTION_POOL_CREATED
         else:
             return (
@@ -215,8 +667,55 @@ class IPythonNGQL(Magics, Configurable):
                 else CONNECTION_POOL_NONE
             )
 
+    def _hosts_status(self):
+        """
+        Status of each graphd host in the connection pool
+        """
+        import pandas as pd
+
+        pool = self.connection_pool
+        if pool is None:
+            raise ValueError(
+                "Please connect to NebulaGraph first, i.e. \n"
+                "%ngql --address 127.0.0.1 --port 9669 --user root --password nebula"
+            )
+        columns = ["host", "port", "status", "connections", "in_use"]
+        statuses = host_statuses(pool)
+        if statuses is None:
+            # only the totals of the pool are public
+            return pd.DataFrame(
+                [
+                    {
+                        "host": self.cluster,
+                        "port": None,
+                        "status": "OK" if pool.get_ok_servers_num() else "BAD",
+                        "connections": pool.connects(),
+                        "in_use": pool.in_used_connects(),
+                    }
+                ],
+                columns=columns,
+            )
+        all_connections = getattr(pool, "_connections", None) or {}
+        rows = []
+        for address, ok in statuses.items():
+            connections = list(all_connections.get(address, []))
+            rows.append(
+                {
+                    "host": address[0],
+                    "port": address[1],
+                    "status": "OK" if ok else "BAD",
+                    "connections": len(connections),
+                    "in_use": sum(
+                        1 for c in connections if getattr(c, "is_used", False)
+                    ),
+                }
+            )
+        return pd.DataFrame(rows, columns=columns)
+
     def _render_cell_vars(self, cell, local_ns):
         if cell is not None:
+            from jinja2 import Template, Environment, meta
+
             env = Environment()
             cell_vars = meta.find_undeclared_variables(env.parse(cell))
             cell_params = {}
@@ -265,31 +764,57 @@ class IPythonNGQL(Magics, Configurable):
         if result.row_size() == 1:
             self.space = result.row_values(0)[0].cast_primitive()
 
-    def _execute(self, query):
+    def _execute(self, query, timeout=None):
+        from ngql.cancel import CancellableQuery
+
         session = self._get_session()
         query = query.replace("\\\n", "\n")
+        running = None
+        if timeout is None:
+            timeout = self.timeout if self.timeout is not None else self.ngql_timeout
         try:
             if self.space is not None:  # Always use space automatically
                 session.execute(f"USE { self.space }")
-            result = session.execute(query)
+            # Killed on graphd on timeout or interrupt instead of running on
+            running = CancellableQuery(session, query)
+            try:
+                result = running.wait(
+                    timeout if timeout and timeout > 0 else None, self._get_session
+                )
+            except (TimeoutError, KeyboardInterrupt):
+                self._record_query(query, None, int(running.elapsed * 1_000_000))
+                raise
+            self._record_query(query, result, int(running.elapsed * 1_000_000))
             assert (
                 result.is_succeeded()
             ), f"Query Failed:\n { result.error_msg() }\n Query:\n { query }"
             self._remember_space(result)
+        except TimeoutError:
+            raise
         except Exception as e:
             fancy_print(f"[ERROR]:\n { e }", color="red")
         finally:
-            session.release()
+            if running is not None:
+                running.release()
+            else:
+                session.release()
         return result
 
+    def _record_query(self, query, result, client_latency_us):
+        # the plan cache hit of the guard is for the query run right after it
+        cache_hit, self.plan_cache_hit = self.plan_cache_hit, False
+        self.history.resize(self.ngql_history_size)
+        self.history.record(query, self.space, result, client_latency_us, cache_hit)
+
     def _remember_space(self, result):
         last_space_used = result.space_name()
         if last_space_used != "":
             self.space = last_space_used
 
-    def _stylized(self, result: ResultSet, style=None):
+    def _stylized(self, result: "ResultSet", style=None):
         style = style or self.ngql_result_style
-        if style == STYLE_PANDAS:
+        if style in (STYLE_PANDAS, STYLE_STREAM):
+            # results that couldn't be streamed are returned as a whole
             try:
                 import pandas as pd
             except ImportError:
@@ -311,6 +836,11 @@ class IPythonNGQL(Magics, Configurable):
                 [{"selector": "table", "props": [("overflow-x", "scroll")]}]
             )
             return df
+        elif style == STYLE_ARROW:
+            # typed columns, repetitive strings are dictionary-encoded
+            from ngql.export import arrow_dataframe
+
+            return arrow_dataframe(result)
         elif style == STYLE_RAW:
             return result
         else:
@@ -323,9 +853,14 @@ class IPythonNGQL(Magics, Configurable):
         Supported Configurations:
         ------------------------
         
-        > How to config ngql_result_style in "raw", "pandas"
+        > How to config ngql_result_style in "raw", "pandas", "stream", "arrow"
         %config IPythonNGQL.ngql_result_style="raw"
         %config IPythonNGQL.ngql_result_style="pandas"
+        %config IPythonNGQL.ngql_result_style="stream"
+        %config IPythonNGQL.ngql_result_style="arrow"
+
+        > How to config the rows per page when results are streamed
+        %config IPythonNGQL.ngql_page_size=10000
 
         > How to config ngql_verbose in True, False
         %config IPythonNGQL.ngql_verbose=True
@@ -333,12 +868,27 @@ class IPythonNGQL(Magics, Configurable):
         > How to config max_connection_pool_size
         %config IPythonNGQL.max_connection_pool_size=10
 
+        > How to config the connections opened when connecting
+        %config IPythonNGQL.min_connection_pool_size=2
+
+        > How to config the interval of health check on graphd hosts in seconds
+        %config IPythonNGQL.health_check_interval=10
+
         Quick Start:
         -----------
 
         > Connect to Neubla Graph
         %ngql --address 127.0.0.1 --port 9669 --user user --password password
 
+        > Connect to multiple graphd, sessions are spread across the healthy ones
+        %ngql --address h1:9669,h2:9669,h3:9669 --user user --password password
+
+        > Connect over TLS or not explicitly, otherwise the transport worked last time is tried first
+        %ngql --address 127.0.0.1 --port 9669 --user user --password password --tls
+
+        > Status of the graphd hosts
+        %ngql --status
+
         > Use Space
         %ngql USE basketballplayer
 
@@ -350,6 +900,35 @@ class IPythonNGQL(Magics, Configurable):
         SHOW TAGS;
         SHOW HOSTS;
 
+        > Profile a query, get the execution plan with per-operator timings
+        %ngql --profile MATCH (v:player) RETURN v LIMIT 10;
+
+        > Load test a query with concurrency
+        %ng_bench --iterations 1000 --concurrency 8 --warmup 50 MATCH (v:player) RETURN v LIMIT 10
+
+        > Stream a large result page by page as DataFrame chunks
+        %ngql --stream --page-size 10000 MATCH (v:player) RETURN v ORDER BY id(v)
+        for df in _:
+            ...
+
+        > Write a large result page by page into a .parquet, .arrow or .csv file
+        %ngql --output players.parquet MATCH (v:player) RETURN v ORDER BY id(v)
+
+        > Preview the first n rows and the total count of a large result
+        %ngql --preview 20 MATCH (v:player) RETURN v
+
+        > Warn about or block expensive queries after an EXPLAIN, --force to run them anyway
+        %config IPythonNGQL.ngql_guard="block"
+        %ngql --force MATCH (n)-[e]->(m) RETURN *
+
+        > Kill a query on graphd if it runs longer than 30 seconds, or when the cell is interrupted
+        %ngql --timeout 30 GO 6 STEPS FROM "player100" OVER follow YIELD dst(edge)
+        %config IPythonNGQL.ngql_timeout=60
+
+        > Latency history of the queries run in this session
+        %ng_stats
+        %config IPythonNGQL.ngql_history_size=1000
+
         Reload ngql Magic
         %reload_ext ngql
 
@@ -367,10 +946,51 @@ class IPythonNGQL(Magics, Configurable):
 
         %ng_draw GET SUBGRAPH WITH PROP 2 STEPS FROM "player101" YIELD VERTICES AS nodes, EDGES AS relationships;
 
+        > Draw at most 200 nodes of a large result, the most important ones by PageRank(or degree),
+        > collapsing communities into super-nodes, or randomly, with at most 500 sampled edges
+        %ng_draw --max-nodes 200
+        %ng_draw --max-nodes 200 --reduce community --max-edges 500
+
+        > Fill in the nodes only known as edge ends, with their tags and properties fetched in batches
+        %ng_draw --hydrate GO FROM "player100" OVER follow YIELD edge AS e
+
+        > Compute the layout before rendering(spring, kamada_kawai, spectral or sfdp), with the physics
+        > turned off, thus large graphs open instantly
+        %ng_draw --layout sfdp
+        %ng_draw_schema --layout kamada_kawai
+        %config IPythonNGQL.ngql_draw_layout="sfdp"
+
+        > Size nodes by pagerank(default), degree, betweenness(approximated) or none
+        %ng_draw --centrality betweenness
+        %config IPythonNGQL.ngql_draw_centrality="degree"
+
+        > Share one vis.js in the working directory among drawings, with the graph as(gzipped) compact JSON
+        %config IPythonNGQL.ngql_draw_render="compressed"
+
+        > Keep only the drawings of the latest 20 cells, outputs of older cells are blank once reopened
+        %config IPythonNGQL.ngql_draw_keep=20
+
+        > Explore the graph from some nodes, double click a node to expand its neighbors or to collapse them
+        %ng_explore "player100" --edge-types follow,serve --limit 20
+
         > Query and draw the graph schema
 
         %ng_draw_schema
 
+        > Draw the graph schema sized by the counts of tags and edge types, of the last STATS job, or a new one if stale
+        %ng_draw_schema --stats
+        %config IPythonNGQL.ngql_stats_max_age=86400
+
+        > Materialize the last result, or a query, as a graph of a CSR adjacency and typed properties, or networkx
+        g = %ng_graph MATCH p=(:player)-[:follow]->() RETURN p
+        g.pagerank().nlargest(10)
+        %ng_graph --networkx
+
+        > Show the cached schema of the space(vid type, properties and sampled endpoint tags), or refresh it
+        %ng_schema
+        %ng_schema basketballplayer --refresh
+        %config IPythonNGQL.ngql_schema_ttl=300
+
         > Load data from CSV file into NebulaGraph as vertices or edges
         %ng_load --source actor.csv --tag player --vid 0 --props 1:name,2:age --space basketballplayer
 
@@ -390,20 +1010,142 @@ class IPythonNGQL(Magics, Configurable):
 
         %ng_load --source https://github.com/wey-gu/ipython-ngql/raw/main/examples/actor.csv --tag player --vid 0 --props 1:name,2:age --space demo_basketballplayer
 
+        > Load string ids into an INT64 vid space as hash("player999") etc., with the mapping kept for lookup
+        %ng_load --source actor.csv --tag player --vid 0 --props 1:name,2:age --space int_space --vid-map ids.parquet
+        %ng_load --source follow.csv --edge follow --src 0 --dst 1 --props 2:degree --space int_space --vid-map ids.parquet
+
+        > Export all vertices of a tag or edges of an edge type, scanning partitions from storaged concurrently
+        %ng_export --tag player
+        %ng_export --edge follow --output follow/ --concurrency 16
+
 
         """
         fancy_print(help_info, color="green")
         return
 
-    def _draw_graph(self, g: Any) -> Any:
+    def _check_centrality(self, centrality: Optional[str]) -> bool:
+        from ngql.centrality import CENTRALITIES
+
+        if centrality is not None and centrality not in CENTRALITIES:
+            fancy_print(
+                f"[ERROR] Unknown centrality {centrality}, "
+                f"should be one of {', '.join(CENTRALITIES)}",
+                color="red",
+            )
+            return False
+        return True
+
+    def _size_nodes(
+        self, g: Any, centrality: Optional[str] = None, max_size: float = 80.0
+    ) -> Any:
+        """
+        Size the nodes of a pyvis Network by their centrality, computed on a
+        sparse matrix of its edges, cached per graph
+        """
+        from ngql.centrality import CENTRALITY_NONE, CentralityCache, node_sizes
+
+        centrality = centrality or self.ngql_draw_centrality or CENTRALITY_NONE
+        if centrality == CENTRALITY_NONE:
+            return g
+        if self.centrality_cache is None:
+            self.centrality_cache = CentralityCache()
+        try:
+            scores = self.centrality_cache.get_or_compute(
+                [node["id"] for node in g.nodes],
+                [(edge["from"], edge["to"]) for edge in g.edges],
+                centrality,
+            )
+        except Exception as e:
+            fancy_print(
+                f"[WARN]: failed to calculate {centrality}, left graph node unsized."
+                f" Reason:\n { e }"
+            )
+            return g
+        for node, size in zip(g.nodes, node_sizes(scores, max_size=max_size)):
+            node["size"] = float(size)
+        return g
+
+    def _space_stats(self, space: str, schema: Any, refresh: bool = False) -> Any:
+        """
+        Counts of the last STATS job of the space, None if they can't be had
+        """
+        from ngql.schema import space_stats
+
         try:
-            from IPython.display import display, IFrame, HTML
+            stats = space_stats(
+                self._get_session,
+                space,
+                schema,
+                max_age=self.ngql_stats_max_age,
+                refresh=refresh,
+            )
+        except Exception as e:
+            fancy_print(
+                f"[WARN]: failed to get the statistics, drawn without counts\n { e }"
+            )
+            return None
+        fancy_print(
+            f"[INFO] {stats.vertex_count:,} vertices and {stats.edge_count:,} edges in "
+            + (
+                "a new STATS job"
+                if stats.submitted
+                else "the last STATS job"
+                + (
+                    f", {(time.time() - stats.finished_at) / 60:.0f} min ago"
+                    if stats.finished_at is not None
+                    else ""
+                )
+            ),
+            color="light_blue",
+        )
+        return stats
 
-            # import get_ipython
-            from IPython import get_ipython
-        except ImportError:
-            raise ImportError("Please install IPython to draw the graph")
+    @staticmethod
+    def _size_by_counts(g: Any):
+        """
+        Size the nodes and the edges of a schema drawing by their counts, in
+        log scale as they differ by orders of magnitude
+        """
+        import numpy as np
+
+        from ngql.centrality import node_sizes
+
+        counts = np.log1p([node.get("count", 0) for node in g.nodes])
+        for node, size in zip(g.nodes, node_sizes(counts, 10.0, 60.0)):
+            node["size"] = float(size)
+        counts = np.log1p([edge.get("count", 0) for edge in g.edges])
+        for edge, width in zip(g.edges, node_sizes(counts, 1.0, 8.0)):
+            edge["width"] = float(width)
 
+    def _check_layout(self, layout: Optional[str]) -> bool:
+        from ngql.layout import LAYOUTS
+
+        if layout is not None and layout not in LAYOUTS:
+            fancy_print(
+                f"[ERROR] Unknown layout {layout}, "
+                f"should be one of {', '.join(LAYOUTS)}",
+                color="red",
+            )
+            return False
+        return True
+
+    def _layout_graph(self, g: Any, layout: Optional[str] = None) -> Any:
+        """
+        Pin the nodes to a layout computed here, or leave it to the physics
+        simulation of the browser
+        """
+        layout = layout or self.ngql_draw_layout
+        if layout:
+            from ngql.layout import apply_layout
+
+            start = time.perf_counter()
+            apply_layout(g, layout)
+            if self.ngql_verbose:
+                fancy_print(
+                    f"[DEBUG] {layout} layout of {len(g.nodes)} nodes "
+                    f"in {time.perf_counter() - start:.2f}s"
+                )
+            return g
         g.repulsion(
             node_distance=90,
             central_gravity=0.2,
@@ -411,44 +1153,199 @@ class IPythonNGQL(Magics, Configurable):
             spring_strength=0.05,
             damping=0.09,
         )
-        # g.show_buttons(filter_='physics')
-        # return g.show("nebulagraph.html", notebook=True)
-        cell_num = get_ipython().execution_count
-        graph_render_filename = f"nebulagraph_cell_{cell_num}.html"
-        g_html_string = g.generate_html(graph_render_filename)
-        with open(graph_render_filename, "w", encoding="utf-8") as f:
-            f.write(g_html_string)
-        # detect if we are in colab or not
-        try:
-            if "google.colab" in str(get_ipython()):
-                display(HTML(g_html_string))
-            else:
-                display(IFrame(src=graph_render_filename, width="100%", height="500px"))
-        except Exception as e:
-            fancy_print(f"[WARN]: failed to display the graph\n { e }")
-            try:
-                display(IFrame(src=graph_render_filename, width="100%", height="500px"))
-            except Exception as e:
-                fancy_print(f"[WARN]: failed to display the graph\n { e }")
-
         return g
 
-    @needs_local_scope
-    @line_cell_magic
-    @magic_arguments()
-    @argument("line", default="", nargs="*", type=str, help="ngql")
-    def ng_draw(self, line, cell=None, local_ns={}):
+    def _space_schema(self, space: str, **kwargs) -> Any:
         """
-        Draw the graph with the output of the last execution query
+        Schema of the space from the catalog, fetched only if it's not cached,
+        see SchemaCatalog.get for the arguments
+        """
+        self.schema_catalog.configure(
+            self.schema_cache_path if self.ngql_schema_persist else None,
+            self.ngql_schema_ttl,
+        )
+        return self.schema_catalog.get(self._get_session, self.cluster, space, **kwargs)
+
+    def _int_vid(self) -> bool:
+        """
+        Whether the vertex ids of the current space are integers
         """
         try:
-            import pandas as pd
-            from pyvis.network import Network
+            return self._space_schema(self.space).is_int_vid
+        except Exception as e:
+            fancy_print(f"[WARN]: failed to get the vid type of the space\n { e }")
+            return False
 
-        except ImportError:
-            raise ImportError("Please install pyvis to draw the graph")
-        # when `%ng_draw foo`, varible_name is "foo", else it's "_"
-        arguments_line = line.strip()
+    def _hydrate(self, builder: Any):
+        """
+        Fill in the placeholder nodes of the builder with their tags and
+        properties, fetched in batches
+        """
+        from ngql.hydrate import hydrate
+
+        if not builder.placeholders:
+            return
+        if self.connection_pool is None or self.space is None:
+            fancy_print(
+                "[WARN]: --hydrate needs a connection and a space in use, "
+                "drawing the nodes as placeholders"
+            )
+            return
+        placeholders = len(builder.placeholders)
+        start = time.perf_counter()
+        try:
+            hydrated = hydrate(builder, self._execute, int_vid=self._int_vid())
+        except Exception as e:
+            fancy_print(f"[WARN]: failed to fetch the properties of the nodes\n { e }")
+            return
+        if self.ngql_verbose:
+            fancy_print(
+                f"[DEBUG] Hydrated {hydrated} of {placeholders} placeholder nodes "
+                f"in {time.perf_counter() - start:.2f}s"
+            )
+
+    def _draw_graph(self, g: Any, layout: Optional[str] = None) -> Any:
+        try:
+            from IPython import get_ipython
+        except ImportError:
+            raise ImportError("Please install IPython to draw the graph")
+
+        self._layout_graph(g, layout)
+        cell_num = get_ipython().execution_count
+        graph_render_filename = f"nebulagraph_cell_{cell_num}.html"
+        self._render_graph(g, graph_render_filename)
+
+        return g
+
+    def _render_graph(self, g: Any, filename: str):
+        """
+        Write the drawing into a file in the render mode of ngql_draw_render,
+        display it, and clean up the drawings of older cells
+        """
+        from IPython.display import display, IFrame, HTML
+        from IPython import get_ipython
+
+        from ngql.render import (
+            RENDER_COMPACT,
+            RENDER_COMPRESSED,
+            RENDER_INLINE,
+            cleanup,
+            compact_html,
+            write_assets,
+        )
+
+        # detect if we are in colab or not
+        in_colab = "google.colab" in str(get_ipython())
+        mode = self.ngql_draw_render or RENDER_INLINE
+        if mode == RENDER_INLINE:
+            g_html_string = g.generate_html(filename)
+        elif mode in (RENDER_COMPACT, RENDER_COMPRESSED):
+            # the drawing is inlined into the notebook on colab, vis.js comes
+            # from the CDN there, instead of the working directory
+            g_html_string = compact_html(
+                g,
+                compressed=mode == RENDER_COMPRESSED,
+                assets=None if in_colab else write_assets(),
+            )
+        else:
+            raise ValueError(f"Unknown ngql_draw_render: { mode }")
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(g_html_string)
+        # a rerun of a cell rewrites its drawing, which is the latest again
+        path = os.path.abspath(filename)
+        if path in self.drawings:
+            self.drawings.remove(path)
+        self.drawings.append(path)
+        removed = cleanup(self.ngql_draw_keep, self.drawings)
+        if removed and self.ngql_verbose:
+            fancy_print(f"[DEBUG] Removed {len(removed)} drawings of older cells")
+        try:
+            if in_colab:
+                display(HTML(g_html_string))
+            else:
+                display(IFrame(src=filename, width="100%", height="500px"))
+        except Exception as e:
+            fancy_print(f"[WARN]: failed to display the graph\n { e }")
+            try:
+                display(IFrame(src=filename, width="100%", height="500px"))
+            except Exception as e:
+                fancy_print(f"[WARN]: failed to display the graph\n { e }")
+
+    @needs_local_scope
+    @line_cell_magic
+    @magic_arguments()
+    @argument("line", default="", nargs="*", type=str, help="ngql")
+    @argument(
+        "--max-nodes",
+        type=int,
+        default=None,
+        help="Draw at most n nodes, reducing the graph with --reduce",
+    )
+    @argument(
+        "--max-edges",
+        type=int,
+        default=None,
+        help="Draw at most n relationships, reservoir sampled",
+    )
+    @argument(
+        "--reduce",
+        type=str,
+        default="pagerank",
+        help="Reduction when over --max-nodes: pagerank, degree, community or random",
+    )
+    @argument(
+        "--layout",
+        type=str,
+        default=None,
+        help="Layout computed before rendering: spring, kamada_kawai, spectral or sfdp",
+    )
+    @argument(
+        "--centrality",
+        type=str,
+        default=None,
+        help="Size nodes by pagerank, degree, betweenness(approximated) or none",
+    )
+    @argument(
+        "--hydrate",
+        action="store_true",
+        help="Fetch the tags and properties of nodes only known as edge ends",
+    )
+    def ng_draw(self, line, cell=None, local_ns={}):
+        """
+        Draw the graph with the output of the last execution query
+        """
+        try:
+            import pandas as pd
+            from pyvis.network import Network
+            from nebula3.data.ResultSet import ResultSet
+
+            from ngql.draw import GraphBuilder
+            from ngql.reduce import STRATEGIES, reduce_graph
+        except ImportError:
+            raise ImportError("Please install pyvis to draw the graph")
+        # only the options leading the line are parsed, the query is kept as is
+        options, line = split_options(line, DRAW_OPTIONS)
+        args = parse_argstring(self.ng_draw, options)
+        if args.reduce not in STRATEGIES:
+            fancy_print(
+                f"[ERROR] Unknown --reduce {args.reduce}, "
+                f"should be one of {', '.join(STRATEGIES)}",
+                color="red",
+            )
+            return
+        for option in ("max_nodes", "max_edges"):
+            if getattr(args, option) is not None and getattr(args, option) < 1:
+                fancy_print(
+                    f"[ERROR] --{option.replace('_', '-')} should be at least 1",
+                    color="red",
+                )
+                return
+        if not self._check_layout(args.layout) or not self._check_centrality(
+            args.centrality
+        ):
+            return
+        # when `%ng_draw foo`, varible_name is "foo", else it's "_"
+        arguments_line = line.strip()
 
         if not arguments_line and not cell:
             # No arguments and no cell content, draw the graph with the last execution result
@@ -457,14 +1354,18 @@ class IPythonNGQL(Magics, Configurable):
             # Check if the last execution result is available in the local namespace
             if variable_name not in local_ns:
                 return "No result found, please execute a query first."
-            result_df = local_ns[variable_name]
+            result = local_ns[variable_name]
 
-            if not isinstance(result_df, pd.DataFrame):
-                if isinstance(result_df, ResultSet):
-                    result_df = self._stylized(result_df, style=STYLE_PANDAS)
-                elif isinstance(result_df, Network):
+            builder = GraphBuilder()
+            if isinstance(result, pd.DataFrame):
+                for row in result.itertuples(index=False):
+                    builder.add_all(row)
+            else:
+                if isinstance(result, ResultSet):
+                    builder.add_result(result)
+                elif isinstance(result, Network):
                     # A rerun of %ng_draw with the last execution result
-                    g = self._draw_graph(result_df)
+                    g = self._draw_graph(result, args.layout)
                     return g
                 else:
                     fancy_print(
@@ -483,18 +1384,11 @@ class IPythonNGQL(Magics, Configurable):
 
             cell = self._render_cell_vars(cell, local_ns)
 
-            # Replace "->" with ESCAPE_ARROW_STRING to avoid argument parsing issues
-            modified_line = line.replace("->", ESCAPE_ARROW_STRING)
-
             connection_state = self._init_connection_pool()
             if connection_state == CONNECTION_POOL_EXISTED:
-                # Restore "->" in the query before executing it
-                query = (
-                    modified_line.replace(ESCAPE_ARROW_STRING, "->")
-                    + "\n"
-                    + (cell if cell else "")
-                )
-                result_df = self._stylized(self._execute(query), style=STYLE_PANDAS)
+                query = line + "\n" + (cell if cell else "")
+                # the graph is built from the rows, without a DataFrame in between
+                builder = GraphBuilder().add_result(self._execute(query))
 
         # Create a graph
         g = Network(
@@ -507,39 +1401,52 @@ class IPythonNGQL(Magics, Configurable):
             font_color="#93A1A1",
             neighborhood_highlight=True,
         )
-        g_nx = nx.MultiDiGraph()
-
-        edge_filter = set()
-        for _, row in result_df.iterrows():
-            for item in row:
-                self.render_pd_item(g, g_nx, item, edge_filter)
-
-        try:
-            # Calculate PageRank
-            pagerank_scores = nx.pagerank(g_nx)
-
-            # Update node sizes based on PageRank scores
-            for node_id, score in pagerank_scores.items():
-                normalized_size = (
-                    10 + score * 90
-                )  # Reduced multiplier for smaller size normalization
-                g.get_node(node_id)["size"] = min(normalized_size, 80)
-        except Exception as e:
-            fancy_print(
-                f"[WARN]: failed to calculate PageRank, left graph node unsized. Reason:\n { e }"
+        if args.hydrate:
+            self._hydrate(builder)
+        if args.max_nodes is not None or args.max_edges is not None:
+            reduction = reduce_graph(
+                builder, args.max_nodes, args.reduce, args.max_edges
             )
+            if reduction.builder is not builder:
+                fancy_print(f"[INFO] {reduction.summary()}", color="light_blue")
+            builder = reduction.builder
+        builder.to_pyvis(g)
+        self._size_nodes(g, args.centrality)
 
-        g = self._draw_graph(g)
+        g = self._draw_graph(g, args.layout)
 
         return g
 
     @line_cell_magic
     @magic_arguments()
     @argument("line", default="", nargs="?", type=str, help="space name")
+    @argument(
+        "--layout",
+        type=str,
+        default=None,
+        help="Layout computed before rendering: spring, kamada_kawai, spectral or sfdp",
+    )
+    @argument(
+        "--centrality",
+        type=str,
+        default=None,
+        help="Size nodes by pagerank, degree, betweenness(approximated) or none",
+    )
+    @argument(
+        "--refresh",
+        action="store_true",
+        help="Introspect the space again instead of using the cached schema,"
+        " with --stats, submit a new STATS job as well",
+    )
+    @argument(
+        "--stats",
+        action="store_true",
+        help="Size tags and edge types by their counts of the last STATS job,"
+        " submitting one only if they are stale",
+    )
     def ng_draw_schema(self, line, cell=None, local_ns={}):
         try:
             from pyvis.network import Network
-            from IPython.display import display, IFrame, HTML
 
             # import get_ipython
             from IPython import get_ipython
@@ -548,85 +1455,33 @@ class IPythonNGQL(Magics, Configurable):
             raise ImportError("Please install pyvis to draw the graph schema")
 
         args = parse_argstring(self.ng_draw_schema, line)
+        if not self._check_layout(args.layout) or not self._check_centrality(
+            args.centrality
+        ):
+            return
         space = args.line if args.line else self.space
         if space is None:
             return "Please specify the space name or run `USE <space_name>` first."
         space = space.strip()
 
-        tags_schema, edge_types_schema, relationship_samples = [], [], []
-        for tag in self._execute("SHOW TAGS").column_values("Name"):
-            tag_name = tag.cast_primitive()
-            tag_schema = {"tag": tag_name, "properties": []}
-            r = self._execute(f"DESCRIBE TAG `{tag_name}`")
-            props, types, comments = (
-                r.column_values("Field"),
-                r.column_values("Type"),
-                r.column_values("Comment"),
-            )
-            for i in range(r.row_size()):
-                # back compatible with old version of nebula-python
-                property_defination = (
-                    (props[i].cast_primitive(), types[i].cast_primitive())
-                    if comments[i].is_empty()
-                    else (
-                        props[i].cast_primitive(),
-                        types[i].cast_primitive(),
-                        comments[i].cast_primitive(),
-                    )
-                )
-                tag_schema["properties"].append(property_defination)
-            tags_schema.append(tag_schema)
-        for edge_type in self._execute("SHOW EDGES").column_values("Name"):
-            edge_type_name = edge_type.cast_primitive()
-            edge_schema = {"edge": edge_type_name, "properties": []}
-            r = self._execute(f"DESCRIBE EDGE `{edge_type_name}`")
-            props, types, comments = (
-                r.column_values("Field"),
-                r.column_values("Type"),
-                r.column_values("Comment"),
-            )
-            for i in range(r.row_size()):
-                # back compatible with old version of nebula-python
-                property_defination = (
-                    (props[i].cast_primitive(), types[i].cast_primitive())
-                    if comments[i].is_empty()
-                    else (
-                        props[i].cast_primitive(),
-                        types[i].cast_primitive(),
-                        comments[i].cast_primitive(),
-                    )
-                )
-                edge_schema["properties"].append(property_defination)
-            edge_types_schema.append(edge_schema)
-
-            # build sample edge
-            sample_edge = self._execute(
-                rel_query_sample_edge.render(edge_type=edge_type_name)
-            ).column_values("sample_edge")
-            if len(sample_edge) == 0:
-                continue
-            src_id, dst_id = sample_edge[0].cast_primitive()
-            r = self._execute(
-                rel_query_edge_type.render(
-                    edge_type=edge_type_name, src_id=src_id, dst_id=dst_id
-                )
-            )
-            if (
-                len(r.column_values("src_tag")) == 0
-                or len(r.column_values("dst_tag")) == 0
-            ):
-                continue
-            src_tag, dst_tag = (
-                r.column_values("src_tag")[0].cast_primitive(),
-                r.column_values("dst_tag")[0].cast_primitive(),
-            )
-            relationship_samples.append(
-                {
-                    "src_tag": src_tag,
-                    "dst_tag": dst_tag,
-                    "edge_type": edge_type_name,
-                }
-            )
+        try:
+            schema = self._space_schema(space, complete=True, refresh=args.refresh)
+        except Exception as e:
+            fancy_print(f"[ERROR]:\n { e }", color="red")
+            return
+        tags_schema = [
+            {"tag": tag, "properties": [schema_property(p) for p in props]}
+            for tag, props in schema.tags.items()
+        ]
+        edge_types_schema = [
+            {"edge": edge_type, "properties": [schema_property(p) for p in props]}
+            for edge_type, props in schema.edges.items()
+        ]
+        relationship_samples = [
+            {"src_tag": src_tag, "dst_tag": dst_tag, "edge_type": edge_type}
+            for edge_type, (src_tag, dst_tag) in schema.endpoints.items()
+        ]
+        stats = self._space_stats(space, schema, args.refresh) if args.stats else None
 
         # In case there are edges not be sampled(no data yet), add them as different node with id edge_src and edge_dst:
         for edge_schema in edge_types_schema:
@@ -678,16 +1533,24 @@ class IPythonNGQL(Magics, Configurable):
             font_color="#93A1A1",
             neighborhood_highlight=True,
         )
-        g_nx = nx.MultiDiGraph()
         for tag_schema in tags_schema:
             tag_name = tag_schema["tag"]
+            if stats is not None:
+                count = stats.tags.get(tag_name, 0)
+                g.add_node(
+                    tag_name,
+                    label=f"{tag_name}\n{count:,}",
+                    title=f"{tag_schema}\ncount: {count:,}",
+                    color=get_color(tag_name),
+                    count=count,
+                )
+                continue
             g.add_node(
                 tag_name,
                 label=tag_name,
                 title=str(tag_schema),
                 color=get_color(tag_name),
             )
-            g_nx.add_node(tag_name, **tag_schema)
 
         for edge_schema in relationship_samples:
             src_tag, dst_tag, edge_type = (
@@ -700,176 +1563,138 @@ class IPythonNGQL(Magics, Configurable):
                 + "\n  ".join([f"{k}: {v}" for k, v in edge_schema.items()])
                 + "\n}"
             )
+            if stats is not None:
+                count = stats.edges.get(edge_type, 0)
+                g.add_edge(
+                    src_tag,
+                    dst_tag,
+                    label=f"{edge_type}\n{count:,}",
+                    title=f"{title}\ncount: {count:,}",
+                    count=count,
+                )
+                continue
             g.add_edge(src_tag, dst_tag, label=edge_type, title=title)
-            g_nx.add_edge(src_tag, dst_tag, **edge_schema)
 
-        try:
-            # Calculate PageRank
-            pagerank_scores = nx.pagerank(g_nx)
-
-            # Update node sizes based on PageRank scores
-            for node_id, score in pagerank_scores.items():
-                g.get_node(node_id)["size"] = (
-                    10 + score * 130
-                )  # Normalized size for visibility
-        except Exception as e:
-            fancy_print(
-                f"[WARN]: failed to calculate PageRank, left graph node unsized. Reason:\n { e }"
-            )
+        if stats is not None:
+            self._size_by_counts(g)
+        else:
+            self._size_nodes(g, args.centrality, max_size=60.0)
 
-        g.repulsion(
-            node_distance=90,
-            central_gravity=0.2,
-            spring_length=200,
-            spring_strength=0.05,
-            damping=0.09,
-        )
-        # g.show_buttons(filter_='physics')
-        # return g.show("nebulagraph_draw.html", notebook=True)
+        self._layout_graph(g, args.layout)
         cell_num = get_ipython().execution_count
         schema_html_filename = f"nebulagraph_schema_cell_{cell_num}_{space}.html"
-        g_html_string = g.generate_html(schema_html_filename)
-        with open(schema_html_filename, "w", encoding="utf-8") as f:
-            f.write(g_html_string)
-        # detect if we are in colab or not
-        try:
-            if "google.colab" in str(get_ipython()):
-                display(HTML(g_html_string))
-            else:
-                display(IFrame(src=schema_html_filename, width="100%", height="500px"))
-        except Exception as e:
-            fancy_print(f"[WARN]: failed to display the graph\n { e }")
-            try:
-                display(IFrame(src=schema_html_filename, width="100%", height="500px"))
-            except Exception as e:
-                fancy_print(f"[WARN]: failed to display the graph\n { e }")
+        self._render_graph(g, schema_html_filename)
 
         return g
 
-    def render_pd_item(self, g, g_nx, item, edges_filter: set):
-        # g is pyvis graph
-        # g_nx is networkx graph
-
-        if isinstance(item, Node):
-            node_id = str(item.get_id().cast())
-            tags = item.tags()  # list of strings
-            tags_str = tags[0] if len(tags) == 1 else ",".join(tags)
-            props_raw = dict()
-            for tag in tags:
-                props_raw.update(item.properties(tag))
-            props = {
-                k: str(v.cast()) if hasattr(v, "cast") else str(v)
-                for k, v in props_raw.items()
-            }
-            # populating empty and null properties
-            props = {
-                k: v for k, v in props.items() if v not in ["__NULL__", "__EMPTY__"]
-            }
-
-            if "name" in props:
-                label = props["name"]
+    @needs_local_scope
+    @line_cell_magic
+    @magic_arguments()
+    @argument("line", default="", nargs="*", type=str, help="ngql")
+    @argument(
+        "--networkx",
+        action="store_true",
+        help="Return a networkx MultiDiGraph instead",
+    )
+    def ng_graph(self, line, cell=None, local_ns={}):
+        """
+        Materialize the vertices and edges of the last result, or of a query,
+        as a graph for analytics: vids mapped to integers, a scipy CSR
+        adjacency and typed property arrays, without drawing it
+
+        Examples:
+        %ng_graph
+        g = %ng_graph MATCH p=(:player)-[:follow]->() RETURN p
+        g.pagerank().nlargest(10)
+        %ng_graph --networkx GET SUBGRAPH 2 STEPS FROM "player100" YIELD VERTICES AS n, EDGES AS e
+        """
+        import pandas as pd
+        from nebula3.data.ResultSet import ResultSet
+
+        from ngql.graph import GraphCollector
+
+        options, line = split_options(line, {"--networkx": 0})
+        args = parse_argstring(self.ng_graph, options)
+        start = time.perf_counter()
+        if not line and not cell:
+            if "_" not in local_ns:
+                return "No result found, please execute a query first."
+            result = local_ns["_"]
+            if isinstance(result, pd.DataFrame):
+                collector = GraphCollector().add_dataframe(result)
+            elif isinstance(result, ResultSet):
+                collector = GraphCollector().add_result(result)
             else:
-                if is_human_readable(node_id):
-                    label = f"tag: {tags_str},\nid: {node_id}"
-                else:
-                    label = f"tag: {tags_str},\nid: {node_id[:3]}..{node_id[-3:]}"
-                for k in props:
-                    if "name" in str(k).lower():
-                        label = props[k]
-                        break
-
-            if "id" not in props:
-                props["id"] = node_id
-            title = "\n".join([f"{k}: {v}" for k, v in props.items()])
-
-            g.add_node(node_id, label=label, title=title, color=get_color(node_id))
-
-            # networkx
-            if len(tags) > 1:
-                props["__tags__"] = ",".join(tags)
-            g_nx.add_node(node_id, **props)
-        elif isinstance(item, Relationship):
-            src_id = str(item.start_vertex_id().cast())
-            dst_id = str(item.end_vertex_id().cast())
-            edge_name = item.edge_name()
-            props_raw = item.properties()
-            rank = item.ranking()
-            props = {
-                k: str(v.cast()) if hasattr(v, "cast") else str(v)
-                for k, v in props_raw.items()
-            }
-            if rank != 0:
-                props.update({"rank": rank})
-            # populating empty and null properties
-            props = {
-                k: v for k, v in props.items() if v not in ["__NULL__", "__EMPTY__"]
-            }
-            # ensure start and end vertex exist in graph
-            if src_id not in g.node_ids:
-                label = (
-                    f"tag: {src_id[:3]}..{src_id[-3:]}"
-                    if not is_human_readable(src_id)
-                    else src_id
-                )
-                g.add_node(
-                    src_id,
-                    label=label,
-                    title=src_id,
-                    color=get_color(src_id),
-                )
-            if dst_id not in g.node_ids:
-                label = (
-                    f"tag: {dst_id[:3]}..{dst_id[-3:]}"
-                    if not is_human_readable(dst_id)
-                    else dst_id
-                )
-                g.add_node(
-                    dst_id,
-                    label=label,
-                    title=dst_id,
-                    color=get_color(dst_id),
-                )
-            props_str_list: List[str] = []
-            for k in props:
-                if len(props_str_list) >= 1:
-                    break
-                props_str_list.append(f"{truncate(k, 7)}: {truncate(str(props[k]), 8)}")
-            props_str = "\n".join(props_str_list)
-
-            label = f"{props_str}\n{edge_name}" if props else edge_name
-            if props:
-                title = (
-                    "{\n  "
-                    + "\n  ".join([f"{k}: {v}" for k, v in props.items()])
-                    + "\n}"
+                fancy_print(
+                    "[ERROR]: No valid %ngql query result available. \n"
+                    "Please execute a valid query before using %ng_graph. \n"
+                    "Or pass a query as an argument to %ng_graph or %%ng_graph(multiline).",
+                    color="red",
                 )
-            else:
-                title = edge_name
-            edge_key = f"{src_id}->{dst_id}@{rank}:{edge_name}"
-            if edge_key not in edges_filter:
-                # We don't have to ensure same policies for identical edges when adding to graph
-                # for PyVis and NetworkX, thus we maintain a set to filter out identical edges
-                g.add_edge(
-                    src_id,
-                    dst_id,
-                    label=label,
-                    title=title,
-                    weight=props.get("rank", 0),
+                return
+        else:
+            if self.connection_pool is None:
+                fancy_print(
+                    "[WARN]: Please connect to NebulaGraph first using %ngql magic before using ng_graph"
+                    "\nExample: %ngql --address 127.0.0.1 --port 9669 --user root --password nebula"
                 )
-                # networkx
-                props["edge_type"] = edge_name
-                g_nx.add_edge(src_id, dst_id, **props)
-                edges_filter.add(edge_key)
+                return
+            cell = self._render_cell_vars(cell, local_ns)
+            result = self._execute(line + "\n" + (cell if cell else ""))
+            if result is None or not result.is_succeeded():
+                return
+            # the graph is built from the raw rows, without a DataFrame in between
+            collector = GraphCollector().add_result(result)
+        graph = collector.to_graph()
+        if self.ngql_verbose:
+            fancy_print(f"[DEBUG] {graph} in {time.perf_counter() - start:.2f}s")
+        return graph.to_networkx() if args.networkx else graph
 
-        elif isinstance(item, PathWrapper):
-            for node in item.nodes():
-                self.render_pd_item(g, g_nx, node, edges_filter)
-            for edge in item.relationships():
-                self.render_pd_item(g, g_nx, edge, edges_filter)
+    @line_magic
+    @magic_arguments()
+    @argument("space", default=None, nargs="?", type=str, help="space name")
+    @argument(
+        "--refresh",
+        action="store_true",
+        help="Introspect the space again instead of using the cached schema",
+    )
+    @argument(
+        "--clear", action="store_true", help="Forget the cached schema of all spaces"
+    )
+    def ng_schema(self, line):
+        """
+        Show the schema of a space as cached for %ng_load and %ng_draw_schema,
+        fetching it if it's not cached
 
-        elif isinstance(item, list):
-            for it in item:
-                self.render_pd_item(g, g_nx, it, edges_filter)
+        Examples:
+        %ng_schema
+        %ng_schema basketballplayer --refresh
+        %ng_schema --clear
+        """
+        args = parse_argstring(self.ng_schema, line)
+        if args.clear:
+            self.schema_catalog.clear()
+            fancy_print("[OK] Schema cache cleared", color="green")
+            return
+        if self.connection_pool is None:
+            fancy_print(
+                "[WARN]: Please connect to NebulaGraph first using %ngql magic before using ng_schema"
+                "\nExample: %ngql --address 127.0.0.1 --port 9669 --user root --password nebula"
+            )
+            return
+        space = args.space.strip() if args.space else self.space
+        if space is None:
+            return "Please specify the space name or run `USE <space_name>` first."
+        schema = self._space_schema(space, complete=True, refresh=args.refresh)
+        fancy_print(
+            f"[INFO] Space {space}, vid type {schema.vid_type}, "
+            f"{len(schema.tags)} tags and {len(schema.edges)} edge types, "
+            f"fetched {self.schema_catalog.age(schema):.0f}s ago "
+            f"(cache hits: {self.schema_catalog.hits}, "
+            f"misses: {self.schema_catalog.misses})",
+            color="light_blue",
+        )
+        return schema.to_dataframe()
 
     @line_cell_magic
     @magic_arguments()
@@ -902,6 +1727,18 @@ class IPythonNGQL(Magics, Configurable):
     @argument(
         "-b", "--batch", type=int, help="Batch size for data loading", default=256
     )
+    @argument(
+        "--vid-hash",
+        action="store_true",
+        help="Load string ids into an INT64 vid space as their hash()",
+    )
+    @argument(
+        "--vid-map",
+        type=str,
+        default=None,
+        help="Parquet file to write the mapping of ids to hashed vids into, "
+        "implies --vid-hash",
+    )
     def ng_load(self, line, cell=None, local_ns={}):
         """
         Load data from CSV file into NebulaGraph as vertices or edges
@@ -925,7 +1762,251 @@ class IPythonNGQL(Magics, Configurable):
             )
             return
 
+        from ngql.ng_load import ng_load
+        from ngql.types import LoadDataArgsModel
+
         args = parse_argstring(self.ng_load, line)
+        schema = None
+        if args.space and (args.tag or args.edge):
+            schema = self._space_schema(
+                args.space,
+                kind="TAG" if args.tag else "EDGE",
+                name=args.tag if args.tag else args.edge,
+            )
         ng_load(
-            self._execute, LoadDataArgsModel.model_validate(args, from_attributes=True)
+            self._execute,
+            LoadDataArgsModel.model_validate(args, from_attributes=True),
+            schema=schema,
+        )
+
+    @line_magic
+    @magic_arguments()
+    @argument("-t", "--tag", type=str, help="Tag to export all vertices of")
+    @argument("-e", "--edge", type=str, help="Edge type to export all edges of")
+    @argument("-n", "--space", type=str, help="Space name, the current one if omitted")
+    @argument(
+        "--meta",
+        type=str,
+        default=None,
+        help="Comma-separated metad addresses, i.e. metad0:9559,metad1:9559, "
+        "from SHOW HOSTS META if omitted",
+    )
+    @argument(
+        "-o",
+        "--output",
+        type=str,
+        default=None,
+        help="Directory of the Parquet dataset, one file per partition, "
+        "a DataFrame is returned if omitted",
+    )
+    @argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Number of partitions scanned concurrently, up to 32 by default",
+    )
+    @argument(
+        "-b",
+        "--batch",
+        type=int,
+        default=1000,
+        help="Rows per scan request of each partition",
+    )
+    def ng_export(self, line):
+        """
+        Export all vertices of a tag or edges of an edge type by scanning the
+        partitions from storaged concurrently, bypassing graphd
+
+        Examples:
+        %ng_export --tag player
+        %ng_export --edge follow --output follow/ --concurrency 16
+        """
+        if self.connection_pool is None:
+            fancy_print(
+                "[WARN]: Please connect to NebulaGraph first using %ngql magic before using ng_export"
+                "\nExample: %ngql --address 127.0.0.1 --port 9669 --user root --password nebula"
+            )
+            return
+
+        from ngql.ng_export import ng_export
+        from ngql.scan import StorageScanClient
+        from ngql.types import ExportArgsModel
+
+        args = parse_argstring(self.ng_export, line)
+        args.space = args.space or self.space
+        if args.space is None:
+            return "Please specify the space name or run `USE <space_name>` first."
+        if args.meta:
+            meta_addrs = parse_addresses(args.meta, 9559)
+        else:
+            hosts = self._execute("SHOW HOSTS META")
+            meta_addrs = [
+                (host.cast_primitive(), port.cast_primitive())
+                for host, port in zip(
+                    hosts.column_values("Host"), hosts.column_values("Port")
+                )
+            ]
+        client = StorageScanClient(meta_addrs, *self.credential)
+        try:
+            return ng_export(
+                client, ExportArgsModel.model_validate(args, from_attributes=True)
+            )
+        finally:
+            client.close()
+
+    @line_magic
+    @magic_arguments()
+    @argument("vids", nargs="*", type=str, help="ids of the nodes to start from")
+    @argument(
+        "-e",
+        "--edge-types",
+        type=str,
+        default=None,
+        help="Comma-separated edge types to expand along, all of them by default",
+    )
+    @argument(
+        "-l",
+        "--limit",
+        type=int,
+        default=100,
+        help="Neighbors fetched per expanded node, at most",
+    )
+    def ng_explore(self, line):
+        """
+        Explore the graph from some nodes in a widget, double click a node to
+        expand its neighbors, or to collapse them
+
+        Examples:
+        %ng_explore "player100"
+        %ng_explore player100 player101 --edge-types follow --limit 20
+        """
+        if self.connection_pool is None:
+            fancy_print(
+                "[WARN]: Please connect to NebulaGraph first using %ngql magic before using ng_explore"
+                "\nExample: %ngql --address 127.0.0.1 --port 9669 --user root --password nebula"
+            )
+            return
+        try:
+            import ipywidgets  # noqa: F401
+        except ImportError:
+            raise ImportError("Please install ipywidgets to explore the graph")
+        from ngql.explore import Explorer, ExploreWidget
+
+        args = parse_argstring(self.ng_explore, line)
+        if self.space is None:
+            return "Please run `USE <space_name>` first."
+        if not args.vids:
+            return "Please specify the ids of the nodes to start from."
+        explorer = Explorer(
+            self._execute,
+            int_vid=self._int_vid(),
+            edge_types=[
+                t.strip() for t in (args.edge_types or "").split(",") if t.strip()
+            ],
+            limit=args.limit,
+        )
+        widget = ExploreWidget(explorer)
+        delta, _ = explorer.start([vid.strip("\"'") for vid in args.vids])
+        widget.send(delta)
+        widget.status.value = (
+            f"{len(delta['add_nodes'])} nodes, {len(delta['add_edges'])} edges, "
+            "double click a node to expand or collapse it"
+        )
+        return widget
+
+    @line_magic
+    @magic_arguments()
+    @argument(
+        "--raw",
+        action="store_true",
+        help="Return every recorded query instead of the per fingerprint summary",
+    )
+    @argument("--reset", action="store_true", help="Clear the latency history")
+    def ng_stats(self, line):
+        """
+        Summarize the latency history of the queries run in this session
+
+        Examples:
+        %ng_stats
+        %ng_stats --raw
+        %ng_stats --reset
+        """
+        args = parse_argstring(self.ng_stats, line)
+        if args.reset:
+            self.history.clear()
+            fancy_print("[OK] Latency history cleared", color="green")
+            return
+        if args.raw:
+            return self.history.to_dataframe()
+        return self.history.summary()
+
+    @needs_local_scope
+    @line_cell_magic
+    @magic_arguments()
+    @argument("line", default="", nargs="*", type=str, help="ngql")
+    @argument(
+        "-n", "--iterations", type=int, default=100, help="Number of queries to run"
+    )
+    @argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of sessions running queries concurrently",
+    )
+    @argument(
+        "-w",
+        "--warmup",
+        type=int,
+        default=0,
+        help="Number of queries to run before measuring",
+    )
+    @argument(
+        "--params",
+        type=str,
+        default=None,
+        help="Name of a list of dicts in the notebook, each iteration takes the"
+        " next one to render the query variables",
+    )
+    def ng_bench(self, line, cell=None, local_ns={}):
+        """
+        Load test a query with concurrency, report QPS, error rate and latency percentiles
+
+        Examples:
+        %ng_bench --iterations 1000 --concurrency 8 --warmup 50 MATCH (v:player) RETURN v LIMIT 10
+
+        params = [{"vid": "player100"}, {"vid": "player101"}]
+        %%ng_bench -n 1000 -c 8 --params params
+        GO FROM "{{ vid }}" OVER follow YIELD dst(edge)
+        """
+        if self.connection_pool is None:
+            fancy_print(
+                "[WARN]: Please connect to NebulaGraph first using %ngql magic before using ng_bench"
+                "\nExample: %ngql --address 127.0.0.1 --port 9669 --user root --password nebula"
+            )
+            return
+
+        from ngql.ng_bench import ng_bench
+        from ngql.types import BenchArgsModel
+
+        options, query = split_options(line, BENCH_QUERY_OPTIONS)
+        args = parse_argstring(self.ng_bench, options)
+        query = query + "\n" + (cell if cell else "")
+        query = query.strip().replace("\\\n", "\n")
+        if args.params:
+            if args.params not in local_ns:
+                raise NameError(args.params)
+            queries = [
+                self._render_cell_vars(query, {**local_ns, **params})
+                for params in local_ns[args.params]
+            ]
+        else:
+            queries = [self._render_cell_vars(query, local_ns)]
+
+        return ng_bench(
+            self._get_session,
+            self.space,
+            queries,
+            BenchArgsModel.model_validate(args, from_attributes=True),
         )
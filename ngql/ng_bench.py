@@ -0,0 +1,141 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from nebula3.gclient.net import Session
+
+from ngql.types import BenchArgsModel
+from ngql.utils import FancyPrinter
+
+
+fancy_print = FancyPrinter()
+
+# (client latency in us, server latency in us, succeeded)
+Sample = Tuple[int, int, bool]
+
+
+def _run_phase(sessions: List[Session], queries: List[str], count: int) -> List[Sample]:
+    """
+    Run `count` queries across the sessions, one worker thread per session,
+    the queries are taken in a round-robin manner from the rendered list
+    """
+    lock = threading.Lock()
+    cursor = iter(range(count))
+
+    def worker(session: Session) -> List[Sample]:
+        samples: List[Sample] = []
+        while True:
+            with lock:
+                i = next(cursor, None)
+            if i is None:
+                return samples
+            query = queries[i % len(queries)]
+            start = time.perf_counter()
+            try:
+                result = session.execute(query)
+                succeeded = result.is_succeeded()
+                server_latency_us = result.latency() if succeeded else 0
+            except Exception:
+                succeeded, server_latency_us = False, 0
+            samples.append(
+                (
+                    int((time.perf_counter() - start) * 1_000_000),
+                    server_latency_us,
+                    succeeded,
+                )
+            )
+
+    with ThreadPoolExecutor(max_workers=len(sessions)) as executor:
+        return [s for samples in executor.map(worker, sessions) for s in samples]
+
+
+def ng_bench(
+    get_session: Callable[[], Session],
+    space: Optional[str],
+    queries: List[str],
+    args: BenchArgsModel,
+):
+    """
+    Load test queries with concurrency and report QPS, error rate and
+    latency percentiles as a DataFrame
+
+    Examples:
+    %ng_bench --iterations 1000 --concurrency 8 --warmup 50 MATCH (v:player) RETURN v LIMIT 10
+    %ng_bench -n 1000 -c 8 --params vids GO FROM "{{ vid }}" OVER follow YIELD dst(edge)
+    """
+    import numpy as np
+    import pandas as pd
+
+    if args.iterations <= 0 or args.concurrency <= 0 or args.warmup < 0:
+        raise ValueError(
+            "--iterations and --concurrency should be positive, --warmup non-negative"
+        )
+    if not queries:
+        raise ValueError("No query to benchmark")
+
+    sessions: List[Session] = []
+    try:
+        for _ in range(args.concurrency):
+            try:
+                session = get_session()
+            except Exception as e:
+                raise ValueError(
+                    f"Failed to get {args.concurrency} sessions from the pool, "
+                    "consider increasing IPythonNGQL.max_connection_pool_size"
+                ) from e
+            if space is not None:
+                session.execute(f"USE `{space}`")
+            sessions.append(session)
+
+        if args.warmup:
+            fancy_print(f"[INFO] Warming up with {args.warmup} queries", "light_blue")
+            _run_phase(sessions, queries, args.warmup)
+
+        fancy_print(
+            f"[INFO] Running {args.iterations} queries with concurrency {args.concurrency}",
+            "light_blue",
+        )
+        start = time.perf_counter()
+        samples = _run_phase(sessions, queries, args.iterations)
+        duration = time.perf_counter() - start
+    finally:
+        for session in sessions:
+            session.release()
+
+    client_latency = np.array([s[0] for s in samples], dtype=np.int64) / 1000
+    server_latency = np.array([s[1] for s in samples if s[2]], dtype=np.int64) / 1000
+    errors = sum(1 for s in samples if not s[2])
+
+    def percentiles(latency, prefix: str):
+        if len(latency) == 0:
+            return {f"{prefix}{k}_ms": np.nan for k in ("p50", "p90", "p99", "max")}
+        p50, p90, p99 = np.percentile(latency, [50, 90, 99])
+        return {
+            f"{prefix}p50_ms": p50,
+            f"{prefix}p90_ms": p90,
+            f"{prefix}p99_ms": p99,
+            f"{prefix}max_ms": latency.max(),
+        }
+
+    report = {
+        "query": (
+            queries[0]
+            if len(queries) == 1
+            else f"{queries[0]} (+{len(queries) - 1} variants)"
+        ),
+        "iterations": len(samples),
+        "concurrency": args.concurrency,
+        "duration_s": duration,
+        "qps": len(samples) / duration if duration > 0 else np.nan,
+        "errors": errors,
+        "error_rate": errors / len(samples) if samples else np.nan,
+        **percentiles(client_latency, ""),
+        **percentiles(server_latency, "server_"),
+    }
+    fancy_print(
+        f"[OK] {report['qps']:.1f} QPS, error rate {report['error_rate']:.2%}, "
+        f"p99 {report['p99_ms']:.2f} ms",
+        "green",
+    )
+    return pd.DataFrame([report])
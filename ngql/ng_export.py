@@ -0,0 +1,213 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ngql.export import to_python
+from ngql.scan import scan_part
+from ngql.types import ExportArgsModel
+from ngql.utils import FancyPrinter
+
+
+fancy_print = FancyPrinter()
+
+
+def property_type(property_type_id: int) -> pa.DataType:
+    """
+    Arrow type of a NebulaGraph property type, time, duration and geography
+    are kept as string
+    """
+    from nebula3.common.ttypes import PropertyType
+
+    if property_type_id == PropertyType.BOOL:
+        return pa.bool_()
+    if property_type_id in (
+        PropertyType.INT8,
+        PropertyType.INT16,
+        PropertyType.INT32,
+        PropertyType.INT64,
+        PropertyType.TIMESTAMP,
+    ):
+        return pa.int64()
+    if property_type_id in (PropertyType.FLOAT, PropertyType.DOUBLE):
+        return pa.float64()
+    if property_type_id == PropertyType.DATE:
+        return pa.date32()
+    if property_type_id == PropertyType.DATETIME:
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def export_schema(
+    props: List[pa.Field], is_vertex: bool, vid_type: pa.DataType
+) -> pa.Schema:
+    if is_vertex:
+        fields = [pa.field("vid", vid_type)]
+    else:
+        fields = [
+            pa.field("src", vid_type),
+            pa.field("dst", vid_type),
+            pa.field("rank", pa.int64()),
+        ]
+    return pa.schema(fields + props)
+
+
+class PartExporter:
+    """
+    Convert the scanned batches of one partition into Arrow tables, written
+    into a Parquet file of the partition as they arrive, or kept in memory.
+    """
+
+    def __init__(
+        self,
+        props: List[pa.Field],
+        is_vertex: bool,
+        path: Optional[str] = None,
+    ):
+        self.props = props
+        self.is_vertex = is_vertex
+        self.path = path
+        self.schema: Optional[pa.Schema] = None
+        self.writer = None
+        self.tables: List[pa.Table] = []
+        self.rows = 0
+
+    def _schema(self, vid: Any) -> pa.Schema:
+        # the vid type is the same across the space, INT64 or FIXED_STRING
+        vid_type = pa.int64() if vid.is_int() else pa.string()
+        return export_schema(self.props, self.is_vertex, vid_type)
+
+    def _columns(self, batch) -> List[List[Any]]:
+        columns: List[List[Any]] = [[] for _ in self.schema]
+        offset = len(self.schema) - len(self.props)
+        for data in batch:
+            if self.is_vertex:
+                columns[0].append(data.get_id().cast())
+            else:
+                columns[0].append(data.get_src_id().cast())
+                columns[1].append(data.get_dst_id().cast())
+                columns[2].append(data.get_ranking())
+            for i, value in enumerate(data.get_prop_values()):
+                columns[offset + i].append(to_python(value, self.props[i].type))
+        return columns
+
+    def write(self, batch):
+        rows = list(batch)
+        if not rows:
+            return
+        if self.schema is None:
+            first = rows[0]
+            self.schema = self._schema(
+                first.get_id() if self.is_vertex else first.get_src_id()
+            )
+            if self.path is not None:
+                self.writer = pq.ParquetWriter(self.path, self.schema)
+        table = pa.Table.from_arrays(
+            [
+                pa.array(column, type=field.type)
+                for column, field in zip(self._columns(rows), self.schema)
+            ],
+            schema=self.schema,
+        )
+        if self.writer is not None:
+            self.writer.write_table(table)
+        else:
+            self.tables.append(table)
+        self.rows += len(rows)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def ng_export(client: Any, args: ExportArgsModel):
+    """
+    Export all vertices of a tag or edges of an edge type, scanning the
+    partitions from storaged concurrently, into a Parquet dataset(one file per
+    partition) or a DataFrame
+
+    The client is a StorageScanClient, or a LocalScanClient without a cluster.
+
+    Examples:
+    %ng_export --tag player
+    %ng_export --edge follow --output follow/ --concurrency 16
+    """
+    if bool(args.tag) == bool(args.edge):
+        raise ValueError("Please specify one of --tag or --edge")
+    if args.concurrency is not None and args.concurrency <= 0:
+        raise ValueError("--concurrency should be positive")
+    if args.batch <= 0:
+        raise ValueError("--batch should be positive")
+
+    is_vertex = bool(args.tag)
+    name = args.tag or args.edge
+    if is_vertex:
+        schema = client.get_tag_schema(args.space, name)
+    else:
+        schema = client.get_edge_schema(args.space, name)
+    props = [
+        pa.field(column.name.decode("utf-8"), property_type(column.type.type))
+        for column in schema.columns
+    ]
+    prop_names = [field.name for field in props]
+    parts = sorted(client.get_part_leaders(args.space))
+    if args.output is not None:
+        os.makedirs(args.output, exist_ok=True)
+
+    exporters: Dict[int, PartExporter] = {}
+    errors: Dict[int, Exception] = {}
+    lock = threading.Lock()
+
+    def export_part(part: int):
+        path = None
+        if args.output is not None:
+            path = os.path.join(args.output, f"part-{part:05d}.parquet")
+        exporter = PartExporter(props, is_vertex, path)
+        try:
+            for batch in scan_part(
+                client, args.space, part, name, is_vertex, prop_names, args.batch
+            ):
+                exporter.write(batch)
+        except Exception as e:
+            with lock:
+                errors[part] = e
+        finally:
+            exporter.close()
+        with lock:
+            exporters[part] = exporter
+
+    start = time.perf_counter()
+    concurrency = args.concurrency or min(32, max(1, len(parts)))
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(export_part, parts))
+    duration = time.perf_counter() - start
+
+    if errors:
+        part, error = next(iter(sorted(errors.items())))
+        raise RuntimeError(
+            f"Failed to scan {len(errors)} of {len(parts)} partitions, "
+            f"i.e. partition {part}: {error}"
+        )
+
+    rows = sum(exporter.rows for exporter in exporters.values())
+    fancy_print(
+        f"[OK] Exported {rows} {'vertices' if is_vertex else 'edges'} of `{name}` "
+        f"from {len(parts)} partitions in {duration:.2f}s "
+        f"({rows / duration if duration else 0:.0f} rows/s)"
+        + (f" to {args.output}" if args.output is not None else ""),
+        color="green",
+    )
+    if args.output is not None:
+        return
+
+    tables = [
+        table for part in parts for table in exporters[part].tables if table.num_rows
+    ]
+    if not tables:
+        return export_schema(props, is_vertex, pa.string()).empty_table().to_pandas()
+    return pa.concat_tables(tables).to_pandas()
@@ -1,7 +1,7 @@
 import requests
 import pandas as pd
 from io import BytesIO, StringIO
-from typing import Callable
+from typing import TYPE_CHECKING, Callable, Optional
 
 from nebula3.data.ResultSet import ResultSet
 from nebula3.gclient.net import ConnectionPool
@@ -10,6 +10,9 @@ from nebula3.Config import Config as NebulaConfig
 from ngql.types import LoadDataArgsModel
 from ngql.utils import FancyPrinter
 
+if TYPE_CHECKING:
+    from ngql.schema import SpaceSchema
+
 
 try:
     import IPython
@@ -24,7 +27,11 @@ except ImportError:
 fancy_print = FancyPrinter()
 
 
-def ng_load(execute_fn: Callable[[str], ResultSet], args: LoadDataArgsModel):
+def ng_load(
+    execute_fn: Callable[[str], ResultSet],
+    args: LoadDataArgsModel,
+    schema: Optional["SpaceSchema"] = None,
+):
     """
     Load data from CSV file into NebulaGraph as vertices or edges
 
@@ -39,24 +46,39 @@ def ng_load(execute_fn: Callable[[str], ResultSet], args: LoadDataArgsModel):
 
     #follow_with_rank.csv
     "player999","player1000",50,1
+
+    The vid type and the properties are taken from schema when given, i.e.
+    cached by the schema catalog, instead of being described again.
+
+    With vid_hash, string ids are loaded into an INT64 vid space as their
+    hash(), optionally with the mapping written to the Parquet file vid_map.
     """
 
     # Check if space is specified
     space = args.space
     execute_fn(f"USE `{space}`")
     # Inspect space to get Vid Type
-    r = execute_fn(f"DESC SPACE `{space}`")
-    try:
-        if not len(r.column_values("Vid Type")) == 1:
-            raise ValueError("Space may not exist")
-        vid_type = str(r.column_values("Vid Type")[0])
-    except Exception as e:
-        raise ValueError(f"Failed to get Vid Type from space '{space}', error: {e}")
+    if schema is not None:
+        vid_type = schema.vid_type
+    else:
+        r = execute_fn(f"DESC SPACE `{space}`")
+        try:
+            if not len(r.column_values("Vid Type")) == 1:
+                raise ValueError("Space may not exist")
+            vid_type = str(r.column_values("Vid Type")[0])
+        except Exception as e:
+            raise ValueError(f"Failed to get Vid Type from space '{space}', error: {e}")
 
     vid_length = 0
     if vid_type.find("FIXED_STRING") != -1:
         vid_length = int(vid_type.split("(")[1].split(")")[0])
     is_vid_int = vid_length == 0
+    # writing the mapping implies hashing
+    vid_hash = args.vid_hash or bool(args.vid_map)
+    if vid_hash and not is_vid_int:
+        raise ValueError(
+            f"--vid-hash maps ids to INT64 vids, but the Vid Type of space '{space}' is {vid_type}"
+        )
 
     # Validate required arguments
     if not args.tag and not args.edge:
@@ -120,18 +142,25 @@ def ng_load(execute_fn: Callable[[str], ResultSet], args: LoadDataArgsModel):
     prop_schema_map = {}
     DESC_TYPE = "TAG" if args.tag else "EDGE"
     DESC_TARGET = args.tag if args.tag else args.edge
-    r = execute_fn(f"DESCRIBE {DESC_TYPE} `{DESC_TARGET}`")
-    props, types, nullable = (
-        r.column_values("Field"),
-        r.column_values("Type"),
-        r.column_values("Null"),
-    )
-    for i in range(r.row_size()):
-        # back compatible with old version of nebula-python
-        prop_schema_map[props[i].cast()] = {
-            "type": types[i].cast(),
-            "nullable": nullable[i].cast() == "YES",
-        }
+    if schema is not None and DESC_TARGET in schema.elements(DESC_TYPE):
+        for prop in schema.elements(DESC_TYPE)[DESC_TARGET]:
+            prop_schema_map[prop["name"]] = {
+                "type": prop["type"],
+                "nullable": prop["nullable"],
+            }
+    else:
+        r = execute_fn(f"DESCRIBE {DESC_TYPE} `{DESC_TARGET}`")
+        props, types, nullable = (
+            r.column_values("Field"),
+            r.column_values("Type"),
+            r.column_values("Null"),
+        )
+        for i in range(r.row_size()):
+            # back compatible with old version of nebula-python
+            prop_schema_map[props[i].cast()] = {
+                "type": types[i].cast(),
+                "nullable": nullable[i].cast() == "YES",
+            }
 
     # Process properties mapping
     props_mapping = (
@@ -224,6 +253,32 @@ def ng_load(execute_fn: Callable[[str], ResultSet], args: LoadDataArgsModel):
             "[ERROR] Specify either --tag for vertex loading or --edge for edge loading, not both"
         )
 
+    # Map string ids to INT64 vids as hash() of NebulaGraph does, so that the
+    # vertex and edge files of a graph agree on them
+    if vid_hash:
+        from ngql.vid_hash import hash_vids, write_vid_map
+
+        data = vertex_data if args.tag else edge_data
+        vid_columns = ["___vid"] if args.tag else ["___src", "___dst"]
+        mappings = [hash_vids(data[col]) for col in vid_columns]
+        data = data.assign(
+            **{col: mapping["vid"] for col, mapping in zip(vid_columns, mappings)}
+        )
+        if args.tag:
+            vertex_data = data
+        else:
+            edge_data = data
+        fancy_print(
+            f"[INFO] Hashed the ids of column(s) {', '.join(vid_columns)} into INT64 vids",
+            "light_blue",
+        )
+        if args.vid_map:
+            ids = write_vid_map(pd.concat(mappings, ignore_index=True), args.vid_map)
+            fancy_print(
+                f"[INFO] Wrote the mapping of {ids} ids to vids into {args.vid_map}",
+                "light_blue",
+            )
+
     # Load data into NebulaGraph
     batch_size = args.batch
 
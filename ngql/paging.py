@@ -0,0 +1,223 @@
+import re
+from typing import TYPE_CHECKING, Any, Callable, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from nebula3.data.ResultSet import ResultSet
+
+_CYPHER_HEAD = re.compile(r"^\s*(OPTIONAL\s+MATCH|MATCH|UNWIND|WITH)\b", re.I)
+_NGQL_HEAD = re.compile(r"^\s*(GO|LOOKUP|FETCH|FIND)\b", re.I)
+_CYPHER_TAIL = re.compile(
+    r"\s+(?:SKIP\s+(?P<skip>\d+))?\s*(?:LIMIT\s+(?P<limit>\d+))?\s*$", re.I
+)
+_NGQL_TAIL = re.compile(
+    r"\s*\|\s*LIMIT\s+(?:(?P<skip>\d+)\s*,\s*)?(?P<limit>\d+)\s*$", re.I
+)
+_RETURN = re.compile(r"\bRETURN\b", re.I)
+_ORDER_BY = re.compile(r"\bORDER\s+BY\b", re.I)
+
+CYPHER = "cypher"
+NGQL = "ngql"
+
+
+def split_statements(query: str) -> List[str]:
+    """
+    Split a query into statements on `;` outside of quoted strings
+    """
+    statements, current, quote, escaped = [], [], None, False
+    for char in query:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif quote is not None:
+            if char == quote:
+                quote = None
+        elif char in ("'", '"', "`"):
+            quote = char
+        elif char == ";":
+            statements.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    statements.append("".join(current))
+    return [s.strip() for s in statements if s.strip()]
+
+
+class PagedStatement:
+    """
+    A statement that could be fetched page by page with SKIP/LIMIT for
+    openCypher, or a `| LIMIT offset, count` pipe for nGQL.
+
+    A trailing SKIP/LIMIT of the statement itself is honored as the offset and
+    the maximum number of rows of all pages.
+    """
+
+    def __init__(self, statement: str):
+        self.statement = statement.strip()
+        self.kind: Optional[str] = None
+        self.base = self.statement
+        self.offset = 0
+        self.max_rows: Optional[int] = None
+
+        if _CYPHER_HEAD.match(self.statement) and _RETURN.search(self.statement):
+            self.kind = CYPHER
+            tail = _CYPHER_TAIL.search(self.statement)
+        elif _NGQL_HEAD.match(self.statement):
+            self.kind = NGQL
+            tail = _NGQL_TAIL.search(self.statement)
+        else:
+            return
+        if tail is not None and (tail.group("skip") or tail.group("limit")):
+            self.base = self.statement[: tail.start()].rstrip()
+            self.offset = int(tail.group("skip") or 0)
+            if tail.group("limit"):
+                self.max_rows = int(tail.group("limit"))
+
+    @property
+    def pageable(self) -> bool:
+        return self.kind is not None
+
+    @property
+    def ordered(self) -> bool:
+        return _ORDER_BY.search(self.base) is not None
+
+    def limit(self, skip: int, limit: int) -> int:
+        """
+        Number of rows to fetch for the page, capped by the statement's own LIMIT
+        """
+        if self.max_rows is None:
+            return limit
+        return max(0, min(limit, self.max_rows - skip))
+
+    def page(self, skip: int, limit: int) -> str:
+        if self.kind == CYPHER:
+            return f"{self.base} SKIP {self.offset + skip} LIMIT {limit}"
+        return f"{self.base} | LIMIT {self.offset + skip}, {limit}"
+
+    def count(self) -> str:
+        """
+        Statement counting the rows of the whole result
+        """
+        if self.kind == CYPHER:
+            # turn the last RETURN into WITH, then count the rows it projects
+            last_return = list(_RETURN.finditer(self.base))[-1]
+            return (
+                f"{self.base[: last_return.start()]}WITH"
+                f"{self.base[last_return.end():]} RETURN count(*) AS total"
+            )
+        return f"{self.base} | YIELD count(*) AS total"
+
+    def cap(self, total: int) -> int:
+        total = max(0, total - self.offset)
+        return total if self.max_rows is None else min(total, self.max_rows)
+
+
+class PagedResult:
+    """
+    Lazily run a query page by page, iterating it yields one DataFrame per page
+    so that only one page is held in memory at a time.
+
+    Examples:
+    for df in paged_result:
+        ...
+    for result in paged_result.pages():  # raw ResultSet of each page
+        ...
+    """
+
+    def __init__(
+        self,
+        execute_fn: Callable[[str], "ResultSet"],
+        stylize_fn: Callable[["ResultSet"], Any],
+        query: str,
+        page_size: int,
+    ):
+        if page_size <= 0:
+            raise ValueError(f"Page size should be positive, got {page_size}")
+        self.execute_fn = execute_fn
+        self.stylize_fn = stylize_fn
+        self.page_size = page_size
+        statements = split_statements(query)
+        self.setup = statements[:-1]
+        self.statement = PagedStatement(statements[-1] if statements else "")
+
+    @property
+    def pageable(self) -> bool:
+        return self.statement.pageable
+
+    def _run(self, query: str) -> "ResultSet":
+        result = self.execute_fn(query)
+        if result is None or not result.is_succeeded():
+            error = result.error_msg() if result is not None else "no result"
+            raise RuntimeError(f"Query Failed:\n {error}\n Query:\n {query}")
+        return result
+
+    def _run_setup(self):
+        # i.e. USE space, the space is remembered for the following pages
+        for statement in self.setup:
+            self._run(statement)
+
+    def check(self):
+        """
+        Raise ValueError if the query can't be paginated consistently. SKIP
+        and LIMIT without ORDER BY aren't deterministic in NebulaGraph, pages
+        could repeat or drop rows, unless the query fits in one page.
+        """
+        if not self.pageable:
+            raise ValueError(
+                "Only MATCH ... RETURN or GO/LOOKUP/FETCH/FIND queries could be paginated"
+            )
+        statement = self.statement
+        if statement.ordered or (
+            statement.max_rows is not None and statement.max_rows <= self.page_size
+        ):
+            return
+        example = "ORDER BY id(v)" if statement.kind == CYPHER else "| ORDER BY $-.dst"
+        raise ValueError(
+            "An ORDER BY on unique values is required to paginate the query, "
+            f"i.e. {example}, without it pages could repeat or drop rows"
+        )
+
+    def pages(self) -> Iterator["ResultSet"]:
+        self.check()
+        self._run_setup()
+        skip = 0
+        while True:
+            limit = self.statement.limit(skip, self.page_size)
+            if limit == 0:
+                return
+            result = self._run(self.statement.page(skip, limit))
+            yield result
+            rows = result.row_size()
+            skip += rows
+            if rows < limit:
+                return
+
+    def __iter__(self):
+        for result in self.pages():
+            yield self.stylize_fn(result)
+
+    def preview(self, n: int) -> Tuple[Any, Optional[int]]:
+        """
+        The first n rows and the total count of the rows, without fetching all
+        of them, total is None if it couldn't be counted
+        """
+        if not self.pageable:
+            raise ValueError(
+                "Only MATCH ... RETURN or GO/LOOKUP/FETCH/FIND queries could be previewed"
+            )
+        self._run_setup()
+        head = self.stylize_fn(
+            self._run(self.statement.page(0, self.statement.limit(0, n)))
+        )
+        try:
+            total_result = self._run(self.statement.count())
+            total = self.statement.cap(total_result.row_values(0)[0].as_int())
+        except Exception:
+            total = None
+        return head, total
+
+    def __repr__(self):
+        return (
+            f"PagedResult(page_size={self.page_size}, "
+            f"statement={self.statement.statement!r})"
+        )
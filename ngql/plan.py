@@ -0,0 +1,81 @@
+from typing import TYPE_CHECKING, Any, Dict, List
+
+if TYPE_CHECKING:
+    from nebula3.data.ResultSet import ResultSet
+
+
+def _decode(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    return str(value)
+
+
+def plan_query(query: str, verb: str = "PROFILE") -> str:
+    """
+    Wrap a (multi-statement) query with PROFILE or EXPLAIN
+
+    Queries that already start with PROFILE/EXPLAIN are returned as is.
+    """
+    stripped = query.strip().rstrip(";").strip()
+    if stripped.upper().startswith(("PROFILE", "EXPLAIN")):
+        return stripped
+    return f"{verb} {{\n{stripped}\n}}"
+
+
+def plan_records(result: "ResultSet") -> List[Dict[str, Any]]:
+    """
+    Flatten the plan description of a PROFILE/EXPLAIN result into one record
+    per operator. Operators executed more than once(i.e. inside a Loop) have
+    their profiling stats summed up.
+    """
+    plan_desc = result.plan_desc()
+    if plan_desc is None or not plan_desc.plan_node_descs:
+        return []
+
+    records = []
+    for node in plan_desc.plan_node_descs:
+        profiles = node.profiles or []
+        records.append(
+            {
+                "id": node.id,
+                "operator": _decode(node.name),
+                "dependencies": list(node.dependencies or []),
+                "rows": sum(p.rows for p in profiles) if profiles else None,
+                "exec_time_us": (
+                    sum(p.exec_duration_in_us for p in profiles) if profiles else None
+                ),
+                "total_time_us": (
+                    sum(p.total_duration_in_us for p in profiles) if profiles else None
+                ),
+                "output_var": _decode(node.output_var),
+                "operator_info": {
+                    _decode(pair.key): _decode(pair.value)
+                    for pair in (node.description or [])
+                },
+            }
+        )
+    return records
+
+
+def plan_dataframe(result: "ResultSet"):
+    """
+    Plan description of a PROFILE/EXPLAIN result as a pandas DataFrame
+    """
+    try:
+        import pandas as pd
+    except ImportError:
+        raise ImportError("Please install pandas to inspect the execution plan")
+
+    columns = [
+        "id",
+        "operator",
+        "dependencies",
+        "rows",
+        "exec_time_us",
+        "total_time_us",
+        "output_var",
+        "operator_info",
+    ]
+    return pd.DataFrame(plan_records(result), columns=columns)
@@ -0,0 +1,265 @@
+import random
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from ngql.draw import GraphBuilder
+from ngql.utils import get_color
+
+REDUCE_PAGERANK = "pagerank"
+REDUCE_DEGREE = "degree"
+REDUCE_COMMUNITY = "community"
+REDUCE_RANDOM = "random"
+STRATEGIES = (REDUCE_PAGERANK, REDUCE_DEGREE, REDUCE_COMMUNITY, REDUCE_RANDOM)
+
+# members listed in the title of a super-node
+COMMUNITY_MEMBERS_SHOWN = 10
+
+
+class Reduction(NamedTuple):
+    builder: GraphBuilder
+    nodes_before: int
+    edges_before: int
+    dropped_nodes: Dict[str, int]  # tag -> count
+    dropped_edges: Dict[str, int]  # edge type -> count
+    steps: List[str]  # what was done, i.e. "top 100 by pagerank"
+
+    def summary(self) -> str:
+        nodes_after = len(self.builder.nodes)
+        edges_after = len(self.builder.edges)
+        line = (
+            f"Drawing {nodes_after} of {self.nodes_before} nodes and "
+            f"{edges_after} of {self.edges_before} edges ({', '.join(self.steps)})"
+        )
+        dropped = []
+        if self.dropped_nodes:
+            dropped.append(
+                f"{sum(self.dropped_nodes.values())} nodes "
+                f"({_counts(self.dropped_nodes)})"
+            )
+        if self.dropped_edges:
+            dropped.append(
+                f"{sum(self.dropped_edges.values())} edges "
+                f"({_counts(self.dropped_edges)})"
+            )
+        if dropped:
+            line += ", dropped " + " and ".join(dropped)
+        return line
+
+
+def _counts(counter: Dict[str, int]) -> str:
+    return ", ".join(
+        f"{k}: {v}" for k, v in sorted(counter.items(), key=lambda kv: -kv[1])
+    )
+
+
+def _tag_counts(builder: GraphBuilder, node_ids: Iterable[str]) -> Dict[str, int]:
+    return dict(
+        Counter(
+            ",".join(builder.tags.get(node_id) or []) or "(unknown)"
+            for node_id in node_ids
+        )
+    )
+
+
+def _edge_counts(edges: Iterable[tuple]) -> Dict[str, int]:
+    return dict(Counter(props["edge_type"] for _, _, _, props in edges))
+
+
+def node_scores(builder: GraphBuilder, strategy: str) -> Dict[str, float]:
+    """
+    Importance of the nodes, by PageRank or by degree
+    """
+    from ngql.centrality import centrality
+
+    node_ids = list(builder.nodes)
+    scores = centrality(
+        node_ids,
+        [(src_id, dst_id) for src_id, dst_id, _, _ in builder.edges.values()],
+        strategy,
+    )
+    return dict(zip(node_ids, scores.tolist()))
+
+
+def top_k(builder: GraphBuilder, max_nodes: int, strategy: str) -> List[str]:
+    scores = node_scores(builder, strategy)
+    # ties are broken by the order the nodes showed up in
+    order = {node_id: i for i, node_id in enumerate(builder.nodes)}
+    return sorted(builder.nodes, key=lambda n: (-scores.get(n, 0.0), order[n]))[
+        :max_nodes
+    ]
+
+
+def communities(builder: GraphBuilder, seed: Optional[int]) -> List[set]:
+    import networkx as nx
+
+    g = nx.Graph()
+    g.add_nodes_from(builder.nodes)
+    g.add_edges_from(
+        (src_id, dst_id) for src_id, dst_id, _, _ in builder.edges.values()
+    )
+    louvain = getattr(nx.community, "louvain_communities", None)
+    if louvain is not None:
+        found = louvain(g, seed=seed)
+    else:
+        found = nx.community.label_propagation_communities(g)
+    return sorted((set(c) for c in found), key=len, reverse=True)
+
+
+def collapse(
+    builder: GraphBuilder, max_nodes: int, seed: Optional[int]
+) -> Tuple[GraphBuilder, Dict[str, int]]:
+    """
+    Collapse the communities into super-nodes, the smallest ones are merged
+    into one node when there are more than max_nodes of them. Relationships
+    inside a community are dropped, the ones across are aggregated by type.
+    Return the reduced builder and the dropped relationships per type.
+    """
+    groups = communities(builder, seed)
+    if len(groups) > max_nodes:
+        rest = set().union(*groups[max_nodes - 1 :])
+        groups = groups[: max_nodes - 1] + [rest]
+
+    reduced = GraphBuilder()
+    member_of: Dict[str, str] = {}
+    for i, members in enumerate(groups):
+        # keep singletons as they are
+        if len(members) == 1:
+            node_id = next(iter(members))
+            reduced.nodes[node_id] = builder.nodes[node_id]
+            reduced.tags[node_id] = builder.tags.get(node_id, [])
+            if node_id in builder.placeholders:
+                reduced.placeholders.add(node_id)
+            member_of[node_id] = node_id
+            continue
+        super_id = f"community:{i}"
+        ordered = [node_id for node_id in builder.nodes if node_id in members]
+        tags = _tag_counts(builder, ordered)
+        shown = ordered[:COMMUNITY_MEMBERS_SHOWN]
+        title = "\n".join(
+            [f"{len(members)} nodes, {_counts(tags)}"]
+            + [builder.nodes[node_id][0]["label"] for node_id in shown]
+            + (["..."] if len(ordered) > len(shown) else [])
+        )
+        reduced.nodes[super_id] = (
+            {
+                "label": f"{super_id}\n{len(members)} nodes",
+                "title": title,
+                "color": get_color(super_id),
+            },
+            {"id": super_id, "members": len(members)},
+        )
+        reduced.tags[super_id] = ["community"]
+        for node_id in members:
+            member_of[node_id] = super_id
+
+    aggregated: Counter = Counter()
+    dropped: Counter = Counter()
+    for key, edge in builder.edges.items():
+        src_id, dst_id, _, props = edge
+        src, dst = member_of[src_id], member_of[dst_id]
+        if src == src_id and dst == dst_id:
+            # between singletons, kept as is
+            reduced.edges[key] = edge
+        elif src == dst:
+            dropped[props["edge_type"]] += 1
+        else:
+            aggregated[(src, dst, props["edge_type"])] += 1
+    for (src, dst, edge_type), count in aggregated.items():
+        label = edge_type if count == 1 else f"{edge_type} x{count}"
+        reduced.edges[f"{src}->{dst}@0:{edge_type}"] = (
+            src,
+            dst,
+            {"label": label, "title": label, "weight": count},
+            {"edge_type": edge_type, "count": count},
+        )
+    return reduced, dict(dropped)
+
+
+def sample_edges(
+    builder: GraphBuilder, max_edges: int, rng: random.Random
+) -> GraphBuilder:
+    """
+    Reservoir sampling(Algorithm R) of max_edges relationships in one pass
+    """
+    reservoir: List[str] = []
+    for i, key in enumerate(builder.edges):
+        if i < max_edges:
+            reservoir.append(key)
+        else:
+            j = rng.randint(0, i)
+            if j < max_edges:
+                reservoir[j] = key
+    kept = set(reservoir)
+    reduced = GraphBuilder()
+    reduced.nodes = builder.nodes
+    reduced.placeholders = builder.placeholders
+    reduced.tags = builder.tags
+    reduced.edges = {k: v for k, v in builder.edges.items() if k in kept}
+    return reduced
+
+
+def reduce_graph(
+    builder: GraphBuilder,
+    max_nodes: Optional[int] = None,
+    strategy: str = REDUCE_PAGERANK,
+    max_edges: Optional[int] = None,
+    seed: Optional[int] = 42,
+) -> Reduction:
+    """
+    Reduce the graph to at most max_nodes nodes and max_edges relationships,
+    keeping the most important nodes, collapsing communities or sampling
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(
+            f"Unknown reduction strategy {strategy}, "
+            f"should be one of {', '.join(STRATEGIES)}"
+        )
+    rng = random.Random(seed)
+    nodes_before, edges_before = len(builder.nodes), len(builder.edges)
+    reduced = builder
+    dropped_nodes: Dict[str, int] = {}
+    dropped_edges: Counter = Counter()
+    steps: List[str] = []
+    if max_nodes is not None and len(builder.nodes) > max_nodes:
+        if strategy == REDUCE_COMMUNITY:
+            reduced, inside = collapse(builder, max_nodes, seed)
+            collapsed = [n for n in builder.nodes if n not in reduced.nodes]
+            dropped_nodes = {
+                f"{k} collapsed": v for k, v in _tag_counts(builder, collapsed).items()
+            }
+            dropped_edges.update(inside)
+            steps.append(f"{len(reduced.nodes)} communities")
+        else:
+            if strategy == REDUCE_RANDOM:
+                kept = rng.sample(list(builder.nodes), max_nodes)
+            else:
+                kept = top_k(builder, max_nodes, strategy)
+            steps.append(
+                f"{max_nodes} random nodes"
+                if strategy == REDUCE_RANDOM
+                else f"top {max_nodes} by {strategy}"
+            )
+            reduced = builder.subgraph(kept)
+            dropped_nodes = _tag_counts(
+                builder, (n for n in builder.nodes if n not in reduced.nodes)
+            )
+            dropped_edges.update(
+                _edge_counts(
+                    v for k, v in builder.edges.items() if k not in reduced.edges
+                )
+            )
+    if max_edges is not None and len(reduced.edges) > max_edges:
+        sampled = sample_edges(reduced, max_edges, rng)
+        dropped_edges.update(
+            _edge_counts(v for k, v in reduced.edges.items() if k not in sampled.edges)
+        )
+        reduced = sampled
+        steps.append(f"{max_edges} sampled edges")
+    return Reduction(
+        reduced,
+        nodes_before,
+        edges_before,
+        dropped_nodes,
+        dict(dropped_edges),
+        steps,
+    )
@@ -0,0 +1,186 @@
+import base64
+import gzip
+import json
+import os
+import shutil
+from typing import Any, Dict, List, Optional
+
+from jinja2 import Template
+
+RENDER_INLINE = "inline"
+RENDER_COMPACT = "compact"
+RENDER_COMPRESSED = "compressed"
+RENDER_MODES = (RENDER_INLINE, RENDER_COMPACT, RENDER_COMPRESSED)
+
+# written once per working directory, shared by the drawings of all cells
+ASSETS_DIR = "nebulagraph_assets"
+VIS_VERSION = "9.1.2"
+# pyvis ships these, relative to its templates/lib
+ASSETS = {
+    "vis-network.min.js": f"vis-{VIS_VERSION}/vis-network.min.js",
+    "vis-network.css": f"vis-{VIS_VERSION}/vis-network.css",
+    "utils.js": "bindings/utils.js",
+}
+# where there is no working directory to serve them from, i.e. colab
+VIS_CDN = f"https://cdnjs.cloudflare.com/ajax/libs/vis-network/{VIS_VERSION}"
+
+COMPACT_TEMPLATE = """<html>
+<head>
+<meta charset="utf-8">
+{% if assets %}
+<link rel="stylesheet" href="{{ assets }}/vis-network.css">
+<script src="{{ assets }}/vis-network.min.js"></script>
+<script src="{{ assets }}/utils.js"></script>
+{% else %}
+<link rel="stylesheet" href="{{ cdn }}/dist/dist/vis-network.min.css">
+<script src="{{ cdn }}/dist/vis-network.min.js"></script>
+<script>{{ utils_js }}</script>
+{% endif %}
+<style>
+#mynetwork {width: {{ width }}; height: {{ height }}; background-color: {{ bgcolor }};
+  border: 1px solid lightgray; position: relative; float: left;}
+</style>
+</head>
+<body>
+<div id="mynetwork"></div>
+<script>
+var nodes, edges, allNodes, allEdges, nodeColors, network, highlightActive = false;
+// columns of the values that differ, the others are shared by all items
+function inflate(table) {
+  var items = [];
+  for (var i = 0; i < table.count; i++) {
+    var item = Object.assign({}, table.shared);
+    for (var key in table.columns) {
+      var value = table.columns[key][i];
+      if (value !== null) item[key] = value;
+    }
+    items.push(item);
+  }
+  return items;
+}
+function drawGraph(data) {
+  nodes = new vis.DataSet(inflate(data.nodes));
+  edges = new vis.DataSet(inflate(data.edges));
+  nodeColors = {};
+  allNodes = nodes.get({returnType: "Object"});
+  for (var nodeId in allNodes) nodeColors[nodeId] = allNodes[nodeId].color;
+  allEdges = edges.get({returnType: "Object"});
+  network = new vis.Network(
+    document.getElementById("mynetwork"), {nodes: nodes, edges: edges}, data.options
+  );
+  {% if neighborhood_highlight %}network.on("click", neighbourhoodHighlight);{% endif %}
+}
+{% if compressed %}
+fetch("data:application/gzip;base64,{{ payload }}")
+  .then(function (r) {
+    return new Response(r.body.pipeThrough(new DecompressionStream("gzip"))).text();
+  })
+  .then(function (text) { drawGraph(JSON.parse(text)); });
+{% else %}
+drawGraph({{ payload }});
+{% endif %}
+</script>
+</body>
+</html>
+"""
+
+
+def compact_table(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Column-oriented items, values equal in all items are kept once, i.e. the
+    shape and font of the nodes, missing values are null
+    """
+    keys: Dict[str, None] = {}
+    for item in items:
+        keys.update(dict.fromkeys(item))
+    shared, columns = {}, {}
+    for key in keys:
+        values = [item.get(key) for item in items]
+        if all(key in item for item in items) and all(v == values[0] for v in values):
+            shared[key] = values[0]
+        else:
+            columns[key] = values
+    return {"count": len(items), "shared": shared, "columns": columns}
+
+
+def _json(obj: Any) -> str:
+    # no whitespace, and safe inside a script tag
+    return json.dumps(obj, separators=(",", ":")).replace("</", "<\\/")
+
+
+def compact_html(g, compressed: bool = False, assets: Optional[str] = None) -> str:
+    """
+    HTML of a pyvis Network referring to vis.js in the assets directory
+    instead of embedding it, with the nodes and edges as compact JSON, or
+    gzipped and base64 encoded, inflated in the browser. Without assets,
+    vis.js is loaded from the CDN.
+    """
+    nodes, edges, _, height, width, options = g.get_network_data()
+    payload = _json(
+        {
+            "nodes": compact_table(nodes),
+            "edges": compact_table(edges),
+            "options": json.loads(options) if isinstance(options, str) else options,
+        }
+    )
+    if compressed:
+        payload = base64.b64encode(
+            gzip.compress(payload.encode("utf-8"), mtime=0)
+        ).decode("ascii")
+    utils_js = ""
+    if not assets:
+        with open(_pyvis_lib(ASSETS["utils.js"]), encoding="utf-8") as f:
+            utils_js = f.read()
+    return Template(COMPACT_TEMPLATE).render(
+        assets=assets,
+        cdn=VIS_CDN,
+        utils_js=utils_js,
+        width=width,
+        height=height,
+        bgcolor=g.bgcolor,
+        neighborhood_highlight=g.neighborhood_highlight,
+        compressed=compressed,
+        payload=payload,
+    )
+
+
+def _pyvis_lib(path: str) -> str:
+    import pyvis
+
+    return os.path.join(os.path.dirname(pyvis.__file__), "templates", "lib", path)
+
+
+def write_assets(directory: str = ".") -> str:
+    """
+    Copy the vis.js assets into the directory unless they are there already,
+    return the directory relative to the drawings
+    """
+    target = os.path.join(directory, ASSETS_DIR)
+    os.makedirs(target, exist_ok=True)
+    for name, source in ASSETS.items():
+        source = _pyvis_lib(source)
+        dest = os.path.join(target, name)
+        if not os.path.exists(dest) or os.path.getsize(dest) != os.path.getsize(source):
+            shutil.copyfile(source, dest)
+    return ASSETS_DIR
+
+
+def cleanup(keep: int, written: List[str]) -> List[str]:
+    """
+    Remove the drawings written by this session but the latest keep ones,
+    written lists them oldest first and is pruned in place, return the
+    removed files, keep <= 0 keeps them all. Drawings of other notebooks in
+    the same directory are never touched.
+    """
+    if keep <= 0 or len(written) <= keep:
+        return []
+    stale = written[: len(written) - keep]
+    del written[: len(written) - keep]
+    removed = []
+    for path in stale:
+        try:
+            os.remove(path)
+            removed.append(path)
+        except OSError:
+            pass
+    return removed
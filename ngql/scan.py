@@ -0,0 +1,245 @@
+import datetime
+import threading
+import zlib
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from nebula3.meta.ttypes import Schema
+
+
+class StorageScanClient:
+    """
+    Scan vertices and edges from storaged partition by partition, bypassing
+    graphd. Schemas and partition leaders come from metad.
+
+    The thrift connections of GraphStorageClient are not thread-safe, thus each
+    worker thread gets a storage client of its own.
+    """
+
+    def __init__(
+        self,
+        meta_addrs: List[Tuple[str, int]],
+        user: str,
+        password: str,
+        timeout: int = 60000,
+    ):
+        from nebula3.mclient import MetaCache
+
+        self.meta_cache = MetaCache(meta_addrs, timeout)
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._clients: List[Any] = []
+
+    def _storage_client(self):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            from nebula3.sclient.GraphStorageClient import GraphStorageClient
+
+            client = GraphStorageClient(self.meta_cache, time_out=self.timeout)
+            client.set_user_passwd(self.user, self.password)
+            self._local.client = client
+            with self._lock:
+                self._clients.append(client)
+        return client
+
+    def get_part_leaders(self, space_name: str) -> Dict[int, Any]:
+        return self.meta_cache.get_part_leaders(space_name)
+
+    def get_tag_schema(self, space_name: str, tag_name: str) -> "Schema":
+        return self.meta_cache.get_tag_schema(space_name, tag_name)
+
+    def get_edge_schema(self, space_name: str, edge_name: str) -> "Schema":
+        return self.meta_cache.get_edge_schema(space_name, edge_name)
+
+    def scan_vertex_with_part(self, space_name, part, tag_name, prop_names, limit):
+        return self._storage_client().scan_vertex_with_part(
+            space_name, part, tag_name, prop_names=prop_names, limit=limit
+        )
+
+    def scan_edge_with_part(self, space_name, part, edge_name, prop_names, limit):
+        return self._storage_client().scan_edge_with_part(
+            space_name, part, edge_name, prop_names=prop_names, limit=limit
+        )
+
+    def close(self):
+        with self._lock:
+            for client in self._clients:
+                try:
+                    client.close()
+                except Exception:
+                    pass
+            self._clients = []
+        self.meta_cache.close()
+
+
+def _value(value: Any):
+    from nebula3.common import ttypes
+
+    if value is None:
+        return ttypes.Value(nVal=ttypes.NullType.__NULL__)
+    if isinstance(value, bool):
+        return ttypes.Value(bVal=value)
+    if isinstance(value, int):
+        return ttypes.Value(iVal=value)
+    if isinstance(value, float):
+        return ttypes.Value(fVal=value)
+    if isinstance(value, datetime.datetime):
+        return ttypes.Value(
+            dtVal=ttypes.DateTime(
+                value.year,
+                value.month,
+                value.day,
+                value.hour,
+                value.minute,
+                value.second,
+                value.microsecond,
+            )
+        )
+    if isinstance(value, datetime.date):
+        return ttypes.Value(dVal=ttypes.Date(value.year, value.month, value.day))
+    return ttypes.Value(sVal=str(value).encode("utf-8"))
+
+
+class _LocalScanResult:
+    def __init__(self, batches: List[Any], is_vertex: bool):
+        self._batches = iter(batches)
+        self._next = next(self._batches, None)
+        self._is_vertex = is_vertex
+
+    def has_next(self) -> bool:
+        return self._next is not None
+
+    def next(self):
+        from nebula3.sclient.ScanResult import EdgeResult, VertexResult
+
+        data_set, self._next = self._next, next(self._batches, None)
+        if self._is_vertex:
+            return VertexResult([data_set])
+        return EdgeResult([data_set])
+
+
+class LocalScanClient:
+    """
+    In-memory stand-in of StorageScanClient, to run %ng_export without a
+    cluster. Rows are spread over the partitions by the hash of the vid(or the
+    src of edges) and scanned back in the same wire format storaged returns.
+
+    Examples:
+    client = LocalScanClient(parts=10)
+    client.create_tag("person", {"name": PropertyType.STRING, "age": PropertyType.INT64})
+    client.add_vertex("person", "p1", {"name": "Bob", "age": 42})
+    client.create_edge("follow", {"degree": PropertyType.INT64})
+    client.add_edge("follow", "p1", "p2", 0, {"degree": 90})
+    """
+
+    def __init__(self, parts: int = 10):
+        self.parts = parts
+        self.schemas: Dict[Tuple[bool, str], Dict[str, int]] = {}
+        self.rows: Dict[Tuple[bool, str], Dict[int, List[List[Any]]]] = {}
+
+    def _part(self, vid: Any) -> int:
+        return zlib.crc32(str(vid).encode("utf-8")) % self.parts + 1
+
+    def _create(self, is_vertex: bool, name: str, props: Dict[str, int]):
+        self.schemas[(is_vertex, name)] = dict(props)
+        self.rows[(is_vertex, name)] = {part: [] for part in range(1, self.parts + 1)}
+
+    def create_tag(self, tag_name: str, props: Dict[str, int]):
+        self._create(True, tag_name, props)
+
+    def create_edge(self, edge_name: str, props: Dict[str, int]):
+        self._create(False, edge_name, props)
+
+    def add_vertex(self, tag_name: str, vid: Any, props: Dict[str, Any]):
+        names = self.schemas[(True, tag_name)]
+        self.rows[(True, tag_name)][self._part(vid)].append(
+            [vid, vid] + [props.get(name) for name in names]
+        )
+
+    def add_edge(
+        self, edge_name: str, src: Any, dst: Any, rank: int, props: Dict[str, Any]
+    ):
+        names = self.schemas[(False, edge_name)]
+        self.rows[(False, edge_name)][self._part(src)].append(
+            [src, 1, rank, dst] + [props.get(name) for name in names]
+        )
+
+    def get_part_leaders(self, space_name: str) -> Dict[int, Optional[Any]]:
+        return {part: None for part in range(1, self.parts + 1)}
+
+    def _schema(self, is_vertex: bool, name: str) -> "Schema":
+        from nebula3.meta.ttypes import ColumnDef, ColumnTypeDef, Schema
+
+        return Schema(
+            columns=[
+                ColumnDef(name=prop.encode("utf-8"), type=ColumnTypeDef(type=type_))
+                for prop, type_ in self.schemas[(is_vertex, name)].items()
+            ]
+        )
+
+    def get_tag_schema(self, space_name: str, tag_name: str) -> "Schema":
+        return self._schema(True, tag_name)
+
+    def get_edge_schema(self, space_name: str, edge_name: str) -> "Schema":
+        return self._schema(False, edge_name)
+
+    def _scan(self, is_vertex: bool, part: int, name: str, limit: int):
+        from nebula3.common import ttypes
+
+        if is_vertex:
+            columns = [b"_vid", b"_vid"]
+        else:
+            columns = [b"_src", b"_type", b"_rank", b"_dst"]
+        columns += [prop.encode("utf-8") for prop in self.schemas[(is_vertex, name)]]
+        column_names = [
+            columns[0] if is_vertex and i == 0 else name.encode("utf-8") + b"." + c
+            for i, c in enumerate(columns)
+        ]
+        rows = self.rows[(is_vertex, name)][part]
+        batches = [
+            ttypes.DataSet(
+                column_names=column_names,
+                rows=[
+                    ttypes.Row(values=[_value(v) for v in row])
+                    for row in rows[i : i + limit]
+                ],
+            )
+            for i in range(0, len(rows), limit)
+        ]
+        return _LocalScanResult(batches, is_vertex)
+
+    def scan_vertex_with_part(self, space_name, part, tag_name, prop_names, limit):
+        return self._scan(True, part, tag_name, limit)
+
+    def scan_edge_with_part(self, space_name, part, edge_name, prop_names, limit):
+        return self._scan(False, part, edge_name, limit)
+
+    def close(self):
+        pass
+
+
+def scan_part(
+    client: Any,
+    space_name: str,
+    part: int,
+    name: str,
+    is_vertex: bool,
+    prop_names: List[str],
+    limit: int,
+) -> Iterator[Any]:
+    """
+    Yield the VertexResult/EdgeResult batches of one partition
+    """
+    if is_vertex:
+        scan = client.scan_vertex_with_part
+    else:
+        scan = client.scan_edge_with_part
+    result = scan(space_name, part, name, prop_names, limit)
+    while result.has_next():
+        batch = result.next()
+        # nebula-python returns None for an empty batch
+        if batch is not None:
+            yield batch
@@ -0,0 +1,594 @@
+import datetime
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from ngql.utils import FancyPrinter
+
+if TYPE_CHECKING:
+    from nebula3.data.ResultSet import ResultSet
+    from nebula3.gclient.net import Session
+
+fancy_print = FancyPrinter()
+
+# sessions running the introspection queries at once
+SCHEMA_CONCURRENCY = 8
+# seconds the schema of a space is cached for
+SCHEMA_TTL = 300
+
+KIND_TAG = "TAG"
+KIND_EDGE = "EDGE"
+
+# statements changing the schema, the cached one is outdated after them
+_DDL = re.compile(r"(?:^|;)\s*(CREATE|ALTER|DROP)\s+(TAG|EDGE|SPACE)\b", re.I)
+
+# seconds before the statistics of a space are stale, and seconds waited for
+# a STATS job to finish
+STATS_MAX_AGE = 86400
+STATS_JOB_TIMEOUT = 300
+STATS_POLL_INTERVAL = 0.5
+JOB_PENDING = ("QUEUE", "RUNNING")
+
+# tags of the ends of one edge of the type, without resolving its ids again
+ENDPOINT_TAGS_QUERY = (
+    "MATCH (m)-[:`{edge_type}`]->(n) "
+    "RETURN tags(m)[0] AS src_tag, tags(n)[0] AS dst_tag LIMIT 1"
+)
+
+
+class SessionGroup:
+    """
+    Sessions of one space, opened on first use with a single `USE` each, that
+    run lists of queries concurrently, thus a round of them takes as long as
+    the slowest one rather than their sum
+    """
+
+    def __init__(
+        self,
+        get_session: Callable[[], "Session"],
+        space: str,
+        concurrency: int = SCHEMA_CONCURRENCY,
+    ):
+        self.get_session = get_session
+        self.space = space
+        self.sessions: List[Optional["Session"]] = [None] * max(1, concurrency)
+
+    def session(self, slot: int) -> "Session":
+        if self.sessions[slot] is None:
+            session = self.get_session()
+            result = session.execute(f"USE `{self.space}`")
+            if not result.is_succeeded():
+                session.release()
+                raise RuntimeError(
+                    f"Failed to use space {self.space}: {result.error_msg()}"
+                )
+            self.sessions[slot] = session
+        return self.sessions[slot]
+
+    def run(self, queries: List[str]) -> List["ResultSet"]:
+        """
+        Results of the queries in their order, one worker per session taking
+        the next query until none is left
+        """
+        if not queries:
+            return []
+        lock = threading.Lock()
+        cursor = iter(range(len(queries)))
+        results: List[Any] = [None] * len(queries)
+
+        def worker(slot: int):
+            session = self.session(slot)
+            while True:
+                with lock:
+                    i = next(cursor, None)
+                if i is None:
+                    return
+                results[i] = session.execute(queries[i])
+
+        workers = min(len(self.sessions), len(queries))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # re-raise the errors of the workers
+            list(executor.map(worker, range(workers)))
+        return results
+
+    def release(self):
+        for session in self.sessions:
+            if session is not None:
+                session.release()
+        self.sessions = [None] * len(self.sessions)
+
+
+def _succeeded(result: "ResultSet", query: str) -> bool:
+    if result.is_succeeded():
+        return True
+    fancy_print(f"[WARN] {query} failed: {result.error_msg()}", color="pink")
+    return False
+
+
+def _names(result: "ResultSet", query: str) -> List[str]:
+    if not _succeeded(result, query):
+        return []
+    return [name.cast_primitive() for name in result.column_values("Name")]
+
+
+def _properties(result: "ResultSet", query: str) -> List[Dict[str, Any]]:
+    if not _succeeded(result, query):
+        return []
+    props, types, nullable, comments = (
+        result.column_values("Field"),
+        result.column_values("Type"),
+        result.column_values("Null"),
+        result.column_values("Comment"),
+    )
+    return [
+        {
+            "name": props[i].cast_primitive(),
+            "type": types[i].cast_primitive(),
+            "nullable": nullable[i].cast_primitive() == "YES",
+            "comment": None if comments[i].is_empty() else comments[i].cast_primitive(),
+        }
+        for i in range(result.row_size())
+    ]
+
+
+def _vid_type(result: "ResultSet", space: str) -> str:
+    try:
+        if not result.is_succeeded() or len(result.column_values("Vid Type")) != 1:
+            raise ValueError("Space may not exist")
+        return result.column_values("Vid Type")[0].cast_primitive()
+    except Exception as e:
+        raise ValueError(f"Failed to get Vid Type from space '{space}', error: {e}")
+
+
+def _endpoint_tags(result: "ResultSet", query: str) -> Optional[Tuple[Any, Any]]:
+    if not _succeeded(result, query) or result.row_size() == 0:
+        return None
+    src_tag, dst_tag = result.row_values(0)
+    return src_tag.cast_primitive(), dst_tag.cast_primitive()
+
+
+class SpaceSchema(NamedTuple):
+    vid_type: str
+    # tag or edge type -> its properties, as name, type, nullable and comment
+    tags: Dict[str, List[Dict[str, Any]]]
+    edges: Dict[str, List[Dict[str, Any]]]
+    # edge type -> tags of the ends of a sample edge, edge types without any
+    # edge are left out
+    endpoints: Dict[str, Tuple[Any, Any]]
+    # whether all of the tags, edge types and endpoints were introspected,
+    # or only some of them
+    complete: bool
+    fetched_at: float
+
+    @property
+    def is_int_vid(self) -> bool:
+        return "INT" in self.vid_type.upper()
+
+    def elements(self, kind: str) -> Dict[str, List[Dict[str, Any]]]:
+        return self.tags if kind.upper() == KIND_TAG else self.edges
+
+    def to_dataframe(self):
+        """
+        One row per property of the tags and edge types, with the tags of the
+        ends of the sampled edge of edge types
+        """
+        import pandas as pd
+
+        columns = [
+            "kind",
+            "name",
+            "property",
+            "type",
+            "nullable",
+            "comment",
+            "src_tag",
+            "dst_tag",
+        ]
+        rows = []
+        for kind, elements in ((KIND_TAG, self.tags), (KIND_EDGE, self.edges)):
+            for name, props in elements.items():
+                src_tag, dst_tag = self.endpoints.get(name, (None, None))
+                for prop in props or [dict.fromkeys(("name", "type", "nullable"))]:
+                    rows.append(
+                        (
+                            kind,
+                            name,
+                            prop["name"],
+                            prop["type"],
+                            prop["nullable"],
+                            prop.get("comment"),
+                            src_tag if kind == KIND_EDGE else None,
+                            dst_tag if kind == KIND_EDGE else None,
+                        )
+                    )
+        return pd.DataFrame(rows, columns=columns)
+
+    def to_json(self) -> Dict[str, Any]:
+        data = self._asdict()
+        data["endpoints"] = {k: list(v) for k, v in self.endpoints.items()}
+        return data
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "SpaceSchema":
+        data = dict(data)
+        data["endpoints"] = {k: tuple(v) for k, v in data["endpoints"].items()}
+        return cls(**data)
+
+
+def introspect(
+    get_session: Callable[[], "Session"],
+    space: str,
+    concurrency: int = SCHEMA_CONCURRENCY,
+) -> SpaceSchema:
+    """
+    Vid type, tags and edge types of the space with their properties, and the
+    tags of the ends of a sample edge per edge type, in two rounds of
+    concurrent queries: the names, then the DESCRIBE and the endpoint queries
+    of all of them
+    """
+    fetched_at = time.time()
+    group = SessionGroup(get_session, space, concurrency)
+    try:
+        space_result, tags_result, edges_result = group.run(
+            [f"DESC SPACE `{space}`", "SHOW TAGS", "SHOW EDGES"]
+        )
+        vid_type = _vid_type(space_result, space)
+        tags = _names(tags_result, "SHOW TAGS")
+        edge_types = _names(edges_result, "SHOW EDGES")
+        tag_queries = [f"DESCRIBE TAG `{tag}`" for tag in tags]
+        edge_queries = [f"DESCRIBE EDGE `{edge_type}`" for edge_type in edge_types]
+        endpoint_queries = [
+            ENDPOINT_TAGS_QUERY.format(edge_type=edge_type) for edge_type in edge_types
+        ]
+        results = group.run(tag_queries + edge_queries + endpoint_queries)
+    finally:
+        group.release()
+
+    tag_results = results[: len(tags)]
+    edge_results = results[len(tags) : len(tags) + len(edge_types)]
+    endpoint_results = results[len(tags) + len(edge_types) :]
+    endpoints = {}
+    for edge_type, r, q in zip(edge_types, endpoint_results, endpoint_queries):
+        sample = _endpoint_tags(r, q)
+        if sample is not None:
+            endpoints[edge_type] = sample
+    return SpaceSchema(
+        vid_type=vid_type,
+        tags={
+            tag: _properties(r, q) for tag, r, q in zip(tags, tag_results, tag_queries)
+        },
+        edges={
+            edge_type: _properties(r, q)
+            for edge_type, r, q in zip(edge_types, edge_results, edge_queries)
+        },
+        endpoints=endpoints,
+        complete=True,
+        fetched_at=fetched_at,
+    )
+
+
+def describe(
+    get_session: Callable[[], "Session"],
+    space: str,
+    kind: Optional[str] = None,
+    name: Optional[str] = None,
+) -> SpaceSchema:
+    """
+    Vid type of the space and the properties of one tag or edge type, in one
+    round of concurrent queries
+    """
+    fetched_at = time.time()
+    queries = [f"DESC SPACE `{space}`"]
+    if kind is not None:
+        queries.append(f"DESCRIBE {kind} `{name}`")
+    group = SessionGroup(get_session, space, len(queries))
+    try:
+        results = group.run(queries)
+    finally:
+        group.release()
+    schema = SpaceSchema(
+        vid_type=_vid_type(results[0], space),
+        tags={},
+        edges={},
+        endpoints={},
+        complete=False,
+        fetched_at=fetched_at,
+    )
+    if kind is not None:
+        if not results[1].is_succeeded():
+            raise ValueError(
+                f"Failed to describe {kind} '{name}' of space '{space}', "
+                f"error: {results[1].error_msg()}"
+            )
+        schema.elements(kind)[name] = _properties(results[1], queries[1])
+    return schema
+
+
+def ddl_targets(query: str) -> Set[str]:
+    """
+    What the statements of the query change the schema of, TAG, EDGE or SPACE
+    """
+    return {match.group(2).upper() for match in _DDL.finditer(query)}
+
+
+class SchemaCatalog:
+    """
+    Schema of the spaces per cluster, fetched on first use and kept until its
+    ttl is over or DDL is run through %ngql, persisted as JSON(i.e. under the
+    IPython profile dir) if a path is given, thus loading data and drawing the
+    schema again take no metadata round trip
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: float = SCHEMA_TTL):
+        self.path: Optional[str] = None
+        self.ttl = ttl
+        self.schemas: Dict[str, SpaceSchema] = {}
+        self.hits = 0
+        self.misses = 0
+        self.configure(path, ttl)
+
+    def configure(self, path: Optional[str], ttl: float):
+        """
+        Apply the settings, loading the schemas persisted under a new path
+        """
+        self.ttl = ttl
+        if path == self.path:
+            return
+        self.path = path
+        if path is None or not os.path.exists(path):
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                persisted = {
+                    k: SpaceSchema.from_json(v) for k, v in dict(json.load(f)).items()
+                }
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            return
+        for key, schema in persisted.items():
+            self.schemas.setdefault(key, schema)
+
+    @staticmethod
+    def key(cluster: Optional[str], space: str) -> str:
+        return f"{cluster or ''}/{space}"
+
+    def age(self, schema: SpaceSchema) -> float:
+        return time.time() - schema.fetched_at
+
+    def peek(self, cluster: Optional[str], space: str) -> Optional[SpaceSchema]:
+        """
+        The cached schema of the space unless it expired, without fetching it
+        """
+        schema = self.schemas.get(self.key(cluster, space))
+        if schema is None or (self.ttl >= 0 and self.age(schema) > self.ttl):
+            return None
+        return schema
+
+    def get(
+        self,
+        get_session: Callable[[], "Session"],
+        cluster: Optional[str],
+        space: str,
+        kind: Optional[str] = None,
+        name: Optional[str] = None,
+        complete: bool = False,
+        refresh: bool = False,
+    ) -> SpaceSchema:
+        """
+        Schema of the space, with all of it when complete, or at least the
+        vid type and the given tag or edge type, fetched only if not cached
+        """
+        cached = None if refresh else self.peek(cluster, space)
+        if cached is not None and (
+            cached.complete
+            or (not complete and (kind is None or name in cached.elements(kind)))
+        ):
+            self.hits += 1
+            return cached
+        self.misses += 1
+        if complete:
+            schema = introspect(get_session, space)
+        else:
+            schema = describe(get_session, space, kind, name)
+            if cached is not None:
+                # the cached elements are older, thus so is the merged schema
+                schema = cached._replace(
+                    vid_type=schema.vid_type,
+                    tags={**cached.tags, **schema.tags},
+                    edges={**cached.edges, **schema.edges},
+                )
+        self.schemas[self.key(cluster, space)] = schema
+        self._persist()
+        return schema
+
+    def invalidate(self, cluster: Optional[str], space: Optional[str] = None):
+        """
+        Forget the schema of the space, or of every space of the cluster
+        """
+        prefix = self.key(cluster, "")
+        keys = [
+            key
+            for key in self.schemas
+            if (key == self.key(cluster, space) if space else key.startswith(prefix))
+        ]
+        for key in keys:
+            del self.schemas[key]
+        if keys:
+            self._persist()
+
+    def clear(self):
+        self.schemas.clear()
+        self._persist()
+
+    def _persist(self):
+        if self.path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {k: v.to_json() for k, v in self.schemas.items()}, f, indent=2
+                )
+        except OSError:
+            # the cache is an optimization only, a read-only profile is fine
+            pass
+
+
+class SpaceStats(NamedTuple):
+    # tag or edge type -> count, as of the last STATS job
+    tags: Dict[str, int]
+    edges: Dict[str, int]
+    vertex_count: int
+    edge_count: int
+    # when the STATS job stopped, in seconds since the epoch, None if unknown
+    finished_at: Optional[float]
+    # whether a STATS job was submitted for these
+    submitted: bool
+
+
+def _stats(result: "ResultSet") -> Optional[Tuple[Dict, Dict, int, int]]:
+    """
+    Counts of SHOW STATS, None if there are none, i.e. no STATS job ran yet
+    """
+    if not result.is_succeeded() or result.row_size() == 0:
+        return None
+    tags, edges, space = {}, {}, {}
+    for i in range(result.row_size()):
+        kind, name, count = (v.cast_primitive() for v in result.row_values(i)[:3])
+        {"Tag": tags, "Edge": edges, "Space": space}.get(kind, {})[name] = count
+    return tags, edges, space.get("vertices", 0), space.get("edges", 0)
+
+
+def _job_time(value: Any) -> Optional[float]:
+    # job times are kept in UTC
+    if not value.is_datetime():
+        return None
+    dt = value.as_datetime()
+    try:
+        return datetime.datetime(
+            dt.get_year(),
+            dt.get_month(),
+            dt.get_day(),
+            dt.get_hour(),
+            dt.get_minute(),
+            dt.get_sec(),
+            dt.get_microsec(),
+            tzinfo=datetime.timezone.utc,
+        ).timestamp()
+    except ValueError:
+        return None
+
+
+def _last_stats_job(result: "ResultSet") -> Optional[Tuple[int, str, Optional[float]]]:
+    """
+    Id, status and stop time of the latest STATS job of SHOW JOBS
+    """
+    if not result.is_succeeded():
+        return None
+    jobs = []
+    for i in range(result.row_size()):
+        # Job Id, Command, Status, Start Time, Stop Time
+        values = result.row_values(i)
+        if str(values[1].cast_primitive()).upper() != "STATS":
+            continue
+        jobs.append(
+            (
+                values[0].cast_primitive(),
+                str(values[2].cast_primitive()).upper(),
+                _job_time(values[4]),
+            )
+        )
+    return max(jobs, key=lambda job: job[0]) if jobs else None
+
+
+def _wait_for_job(
+    session: "Session", job_id: int, timeout: float = STATS_JOB_TIMEOUT
+) -> str:
+    """
+    Poll the job until it's no longer pending, return its status
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        result = session.execute(f"SHOW JOB {job_id}")
+        status = (
+            str(result.row_values(0)[2].cast_primitive()).upper()
+            if result.is_succeeded() and result.row_size()
+            else "UNKNOWN"
+        )
+        if status not in JOB_PENDING or time.monotonic() > deadline:
+            return status
+        time.sleep(STATS_POLL_INTERVAL)
+
+
+def _run_stats_job(
+    session: "Session", space: str, job: Optional[Tuple[int, str, Optional[float]]]
+) -> SpaceStats:
+    """
+    Submit a STATS job, or wait for the pending one, and read its results
+    """
+    if job is not None and job[1] in JOB_PENDING:
+        job_id = job[0]
+    else:
+        result = session.execute("SUBMIT JOB STATS")
+        if not result.is_succeeded():
+            raise RuntimeError(f"Failed to submit a STATS job: {result.error_msg()}")
+        job_id = result.row_values(0)[0].cast_primitive()
+    status = _wait_for_job(session, job_id)
+    if status != "FINISHED":
+        raise RuntimeError(f"STATS job {job_id} of space {space} is {status}")
+    stats = _stats(session.execute("SHOW STATS"))
+    if stats is None:
+        raise RuntimeError(f"No statistics of space {space}")
+    return SpaceStats(*stats, time.time(), True)
+
+
+def space_stats(
+    get_session: Callable[[], "Session"],
+    space: str,
+    schema: Optional[SpaceSchema] = None,
+    max_age: float = STATS_MAX_AGE,
+    refresh: bool = False,
+) -> SpaceStats:
+    """
+    Vertex and edge counts of the space from the last STATS job, a new one is
+    submitted, and waited for, only when there are no stats yet, they are
+    older than max_age seconds(-1 never), they miss tags or edge types of the
+    schema, or on refresh. A job already running is waited for instead.
+    """
+    group = SessionGroup(get_session, space, 2)
+    try:
+        stats_result, jobs_result = group.run(["SHOW STATS", "SHOW JOBS"])
+        stats, job = _stats(stats_result), _last_stats_job(jobs_result)
+        finished_at = job[2] if job is not None else None
+        # without the job, i.e. expired, the age of the stats is unknown
+        stale = refresh or stats is None
+        if not stale and max_age >= 0 and finished_at is not None:
+            stale = time.time() - finished_at > max_age
+        if not stale and schema is not None and schema.complete:
+            stale = not (set(schema.tags) <= set(stats[0])) or not (
+                set(schema.edges) <= set(stats[1])
+            )
+        if not stale:
+            return SpaceStats(*stats, finished_at, False)
+        try:
+            return _run_stats_job(group.session(0), space, job)
+        except RuntimeError as e:
+            if stats is None:
+                raise
+            fancy_print(f"[WARN] {e}, using the statistics as of the last job")
+            return SpaceStats(*stats, finished_at, False)
+    finally:
+        group.release()
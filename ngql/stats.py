@@ -0,0 +1,114 @@
+import re
+import time
+from collections import deque
+from typing import Deque, NamedTuple, Optional
+
+
+_STRING_LITERAL = re.compile(r"\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?(?![\w.])")
+_LIST_LITERAL = re.compile(r"\[\s*\?(?:\s*,\s*\?)*\s*\]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(query: str) -> str:
+    """
+    Normalize a query so that the same statement with different literals
+    shares one fingerprint, i.e.
+
+    MATCH (v) WHERE id(v) == "player100" RETURN v LIMIT 10
+    -> MATCH (v) WHERE id(v) == ? RETURN v LIMIT ?
+    """
+    normalized = _STRING_LITERAL.sub("?", query)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _LIST_LITERAL.sub("[?]", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized)
+    return normalized.strip().rstrip(";").strip()
+
+
+class QueryRecord(NamedTuple):
+    timestamp: float
+    fingerprint: str
+    space: Optional[str]
+    server_latency_us: int
+    client_latency_us: int
+    rows: int
+    query_bytes: int
+    cache_hit: bool
+    succeeded: bool
+
+
+class QueryHistory:
+    """
+    Bounded ring buffer of the latency of the queries run in the session
+    """
+
+    def __init__(self, size: int = 1000):
+        self.records: Deque[QueryRecord] = deque(maxlen=size)
+
+    def resize(self, size: int):
+        if size != self.records.maxlen:
+            self.records = deque(self.records, maxlen=size)
+
+    def record(
+        self,
+        query: str,
+        space: Optional[str],
+        result,
+        client_latency_us: int,
+        cache_hit: bool = False,
+    ):
+        succeeded = result is not None and result.is_succeeded()
+        self.records.append(
+            QueryRecord(
+                timestamp=time.time(),
+                fingerprint=fingerprint(query),
+                space=space,
+                server_latency_us=result.latency() if succeeded else 0,
+                client_latency_us=client_latency_us,
+                rows=result.row_size() if succeeded else 0,
+                query_bytes=len(query.encode("utf-8")),
+                cache_hit=cache_hit,
+                succeeded=succeeded,
+            )
+        )
+
+    def clear(self):
+        self.records.clear()
+
+    def __len__(self):
+        return len(self.records)
+
+    def to_dataframe(self):
+        import pandas as pd
+
+        return pd.DataFrame(list(self.records), columns=QueryRecord._fields)
+
+    def summary(self):
+        """
+        Per fingerprint counts and p50/p95/p99 of server and client latency
+        """
+        import pandas as pd
+
+        df = self.to_dataframe()
+        columns = ["fingerprint", "space", "count", "errors", "cache_hits"]
+        for latency in ("server_latency_us", "client_latency_us"):
+            columns += [f"{latency}_p{p}" for p in (50, 95, 99)]
+        columns += ["rows_mean", "query_bytes_total"]
+        if df.empty:
+            return pd.DataFrame(columns=columns)
+
+        grouped = df.groupby(["fingerprint", "space"], dropna=False, sort=False)
+        summary = grouped.agg(
+            count=("succeeded", "size"),
+            errors=("succeeded", lambda s: int((~s).sum())),
+            cache_hits=("cache_hit", "sum"),
+            rows_mean=("rows", "mean"),
+            query_bytes_total=("query_bytes", "sum"),
+        )
+        for latency in ("server_latency_us", "client_latency_us"):
+            for p in (50, 95, 99):
+                summary[f"{latency}_p{p}"] = grouped[latency].quantile(p / 100)
+        summary = summary.reset_index()[columns]
+        return summary.sort_values(
+            "client_latency_us_p95", ascending=False
+        ).reset_index(drop=True)
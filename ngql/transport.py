@@ -0,0 +1,80 @@
+import json
+import os
+import socket
+from typing import Any, Dict, List, Optional, Tuple
+
+
+TRANSPORT_TLS = "tls"
+TRANSPORT_PLAIN = "plain"
+
+
+class TransportCache:
+    """
+    Remember per graphd host whether the transport that worked last time was
+    TLS or plain text, persisted as JSON(i.e. under the IPython profile dir)
+    so that new kernels don't pay a failed handshake before falling back.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.transports: Dict[str, str] = {}
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.transports = dict(json.load(f))
+            except (OSError, ValueError):
+                self.transports = {}
+
+    @staticmethod
+    def _key(address: Tuple[str, int]) -> str:
+        return f"{address[0]}:{address[1]}"
+
+    def get(self, addresses: List[Tuple[str, int]]) -> Optional[bool]:
+        """
+        Whether TLS worked last time for the hosts, None if unknown or they disagree
+        """
+        transports = {self.transports.get(self._key(a)) for a in addresses}
+        if len(transports) != 1 or None in transports:
+            return None
+        return transports.pop() == TRANSPORT_TLS
+
+    def set(self, addresses: List[Tuple[str, int]], use_tls: bool):
+        transport = TRANSPORT_TLS if use_tls else TRANSPORT_PLAIN
+        changed = False
+        for address in addresses:
+            if self.transports.get(self._key(address)) != transport:
+                self.transports[self._key(address)] = transport
+                changed = True
+        if changed and self.path is not None:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "w", encoding="utf-8") as f:
+                    json.dump(self.transports, f, indent=2)
+            except OSError:
+                # the cache is an optimization only, a read-only profile is fine
+                pass
+
+
+def host_statuses(pool: Any) -> Optional[Dict[Tuple[str, int], bool]]:
+    """
+    Whether each graphd host of a nebula3 ConnectionPool is healthy, keyed by
+    the resolved address. nebula3 has no public API for it, None if the pool
+    doesn't keep it the way we expect.
+    """
+    statuses = getattr(pool, "_addresses_status", None)
+    if not isinstance(statuses, dict):
+        return None
+    ok = getattr(pool, "S_OK", 0)
+    return {address: status == ok for address, status in statuses.items()}
+
+
+def listening(address: Tuple[str, int], timeout: float = 1.0) -> bool:
+    """
+    Whether the host accepts TCP connections, i.e. it is up even though the
+    handshake failed, as when the transport (TLS or not) is the wrong one.
+    """
+    try:
+        with socket.create_connection(address, timeout=timeout):
+            return True
+    except OSError:
+        return False
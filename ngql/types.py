@@ -17,3 +17,21 @@ class LoadDataArgsModel(BaseModel):
     dst: Optional[int] = None
     props: Optional[str] = None
     rank: Optional[int] = None
+    # Args of hashing string ids into INT64 vids
+    vid_hash: bool = False
+    vid_map: Optional[str] = None
+
+
+class BenchArgsModel(BaseModel):
+    iterations: int = 100
+    concurrency: int = 1
+    warmup: int = 0
+
+
+class ExportArgsModel(BaseModel):
+    space: str
+    tag: Optional[str] = None
+    edge: Optional[str] = None
+    output: Optional[str] = None
+    concurrency: Optional[int] = None
+    batch: int = 1000
@@ -1,3 +1,4 @@
+import json
 import pprint
 from typing import Any, ClassVar, Dict, Optional
 
@@ -35,3 +36,40 @@ class FancyPrinter:
         else:
             text = self.pp.pformat(val)
             print(f"\033[1;3;{color}m{text}\033[0m")
+
+
+# COLORS = ["#E2DBBE", "#D5D6AA", "#9DBBAE", "#769FB6", "#188FA7"]
+# solarized dark
+COLORS = [
+    "#93A1A1",
+    "#B58900",
+    "#CB4B16",
+    "#DC322F",
+    "#D33682",
+    "#6C71C4",
+    "#268BD2",
+    "#2AA198",
+    "#859900",
+]
+
+
+def truncate(string: str, length: int = 10) -> str:
+    if len(string) > length:
+        return string[:length] + ".."
+    else:
+        return string
+
+
+def vid_literal(vid: str, int_vid: bool) -> str:
+    return vid if int_vid else json.dumps(vid)
+
+
+def get_color(input_str):
+    hash_val = 0
+    for char in input_str:
+        hash_val = (hash_val * 31 + ord(char)) & 0xFFFFFFFF
+    return COLORS[hash_val % len(COLORS)]
+
+
+def is_human_readable(field):
+    return any(c.isalpha() for c in field) and len(field) < 20
@@ -0,0 +1,126 @@
+import os
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from ngql.utils import FancyPrinter
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+fancy_print = FancyPrinter()
+
+# hash() of NebulaGraph is std::hash of libstdc++, i.e. MurmurHash64A with
+# this seed, reinterpreted as a signed int64
+HASH_SEED = 0xC70F6907
+_MUL = np.uint64(0xC6A4A7935BD1E995)
+_SHIFT = np.uint64(47)
+
+
+def _shift_mix(h: np.ndarray) -> np.ndarray:
+    return h ^ (h >> _SHIFT)
+
+
+def _hash_fixed(data: np.ndarray, length: int) -> np.ndarray:
+    """
+    MurmurHash64A of rows of bytes of the same length, data is a
+    (rows, length) uint8 array.
+    """
+    h = np.full(len(data), HASH_SEED, dtype=np.uint64)
+    h ^= np.uint64(length) * _MUL
+    aligned = length & ~7
+    if aligned:
+        words = np.ascontiguousarray(data[:, :aligned]).view("<u8")
+        for j in range(words.shape[1]):
+            h ^= _shift_mix(words[:, j] * _MUL) * _MUL
+            h *= _MUL
+    if length & 7:
+        tail = np.zeros(len(data), dtype=np.uint64)
+        for j in range(length & 7):
+            tail |= data[:, aligned + j].astype(np.uint64) << np.uint64(8 * j)
+        h ^= tail
+        h *= _MUL
+    return _shift_mix(_shift_mix(h) * _MUL)
+
+
+def nebula_hash(ids: "pd.Series") -> np.ndarray:
+    """
+    Hash strings as hash() of NebulaGraph does, into int64. The ids are
+    grouped by their length in UTF-8 and each group is hashed at once.
+    """
+    encoded = ids.astype("string").str.encode("utf-8").to_numpy(dtype=object)
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    hashes = np.empty(len(encoded), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for length in np.unique(lengths):
+            rows = np.flatnonzero(lengths == length)
+            # fixed width bytes of the group, as a (rows, length) array
+            data = np.empty((len(rows), length), dtype=np.uint8)
+            if length:
+                data[:] = (
+                    np.array(encoded[rows], dtype=f"S{length}")
+                    .view(np.uint8)
+                    .reshape(len(rows), length)
+                )
+            hashes[rows] = _hash_fixed(data, int(length))
+    return hashes.view(np.int64)
+
+
+def _id_strings(values: "pd.Series") -> "pd.Series":
+    """
+    The string form of ids as they'd be written in a string vid space, with
+    the surrounding quotes stripped, and floats that are integers (from a
+    column with missing values) written without the fraction.
+    """
+    import pandas as pd
+
+    if pd.api.types.is_float_dtype(values):
+        integral = values.dropna()
+        if (integral == integral.round()).all():
+            values = values.astype("Int64")
+    strings = values.astype("string")
+    return strings.str.strip('"')
+
+
+def hash_vids(values: "pd.Series") -> "pd.DataFrame":
+    """
+    Map the ids of a column to INT64 vids by hash(). Return a frame of the
+    id strings and their vids, with NA for missing or empty ids, so that the
+    same id gets the same vid in any vertex or edge file.
+    """
+    import pandas as pd
+
+    ids = _id_strings(values)
+    present = (ids.notna() & (ids != "")).to_numpy(dtype=bool)
+    vids = pd.array(np.zeros(len(ids), dtype=np.int64), dtype="Int64")
+    vids[present] = nebula_hash(ids[present])
+    vids[~present] = pd.NA
+    return pd.DataFrame({"id": ids.to_numpy(), "vid": vids}, index=values.index)
+
+
+def write_vid_map(mapping: "pd.DataFrame", path: str) -> int:
+    """
+    Write the id to vid mapping into a Parquet file for reverse lookup,
+    merged with the one already there, thus loading the vertex and edge files
+    of a graph into the same path gives one table. Return the number of
+    distinct ids, ids sharing a vid are warned about.
+    """
+    import pandas as pd
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError("Please install pyarrow to write the vid mapping")
+
+    mapping = mapping.dropna(subset=["vid"])
+    if os.path.exists(path):
+        mapping = pd.concat([pd.read_parquet(path), mapping], ignore_index=True)
+    mapping = mapping.drop_duplicates(subset=["id"]).reset_index(drop=True)
+    collisions = int(mapping["vid"].duplicated().sum())
+    if collisions:
+        fancy_print(
+            f"[WARN] {collisions} ids share a vid with another id in {path}",
+            color="pink",
+        )
+    mapping.astype({"id": "string", "vid": "int64"}).to_parquet(path, index=False)
+    return len(mapping)
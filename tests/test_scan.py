@@ -0,0 +1,95 @@
+import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from nebula3.common.ttypes import PropertyType
+
+from ngql.ng_export import ng_export
+from ngql.scan import LocalScanClient
+from ngql.types import ExportArgsModel
+
+PARTS = 7
+PLAYERS = 500
+FOLLOWS = 300
+
+
+def make_client() -> LocalScanClient:
+    client = LocalScanClient(parts=PARTS)
+    client.create_tag(
+        "player",
+        {
+            "name": PropertyType.STRING,
+            "age": PropertyType.INT64,
+            "born": PropertyType.DATE,
+            "score": PropertyType.DOUBLE,
+        },
+    )
+    for i in range(PLAYERS):
+        client.add_vertex(
+            "player",
+            f"player{i}",
+            {
+                "name": f"name{i}",
+                "age": 20 + i % 20,
+                "born": datetime.date(1990, 1, 1 + i % 28),
+                "score": i / 3,
+            },
+        )
+    client.create_edge("follow", {"degree": PropertyType.INT64})
+    for i in range(FOLLOWS):
+        client.add_edge("follow", f"player{i}", f"player{i + 1}", i % 3, {"degree": i})
+    return client
+
+
+def test_rows_are_spread_over_the_parts():
+    client = make_client()
+    rows = client.rows[(True, "player")]
+    assert sorted(rows) == list(range(1, PARTS + 1))
+    assert sum(len(part_rows) for part_rows in rows.values()) == PLAYERS
+    assert sum(1 for part_rows in rows.values() if part_rows) > 1
+
+
+def test_export_vertices_to_dataframe():
+    df = ng_export(
+        make_client(),
+        ExportArgsModel(space="s", tag="player", batch=33, concurrency=3),
+    )
+    assert isinstance(df, pd.DataFrame)
+    assert list(df.columns) == ["vid", "name", "age", "born", "score"]
+    assert len(df) == PLAYERS
+    assert set(df["vid"]) == {f"player{i}" for i in range(PLAYERS)}
+    assert pd.api.types.is_string_dtype(df["name"])
+    assert pd.api.types.is_integer_dtype(df["age"])
+    assert pd.api.types.is_float_dtype(df["score"])
+    player = df.set_index("vid").loc["player30"]
+    assert player["name"] == "name30"
+    assert player["age"] == 30
+    assert player["born"] == datetime.date(1990, 1, 3)
+
+
+def test_export_edges_to_parquet(tmp_path):
+    ng_export(
+        make_client(),
+        ExportArgsModel(space="s", edge="follow", output=str(tmp_path), batch=50),
+    )
+    files = sorted(path.name for path in tmp_path.iterdir())
+    assert files == [f"part-{part:05d}.parquet" for part in range(1, PARTS + 1)]
+    table = pq.read_table(tmp_path)
+    assert table.num_rows == FOLLOWS
+    assert table.schema.field("src").type == pa.string()
+    assert table.schema.field("dst").type == pa.string()
+    assert table.schema.field("rank").type == pa.int64()
+    assert table.schema.field("degree").type == pa.int64()
+    edges = table.to_pandas().set_index("src")
+    assert edges.loc["player7", "dst"] == "player8"
+    assert edges.loc["player7", "rank"] == 1
+    assert edges.loc["player7", "degree"] == 7
+
+
+def test_export_empty_tag():
+    client = LocalScanClient(parts=3)
+    client.create_tag("team", {"name": PropertyType.STRING})
+    df = ng_export(client, ExportArgsModel(space="s", tag="team"))
+    assert len(df) == 0
+    assert list(df.columns) == ["vid", "name"]